@@ -0,0 +1 @@
+# 本地压测工具，见 bench_generation.py
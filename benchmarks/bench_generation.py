@@ -0,0 +1,261 @@
+"""生成流程压测：在本地模拟服务上分别测量 sync（requests）与 async（aiohttp）路径
+
+在仓库根目录运行:
+    python -m benchmarks.bench_generation --tasks 100 --concurrency 16 --download
+    python -m benchmarks.bench_generation --mode async --queue-latency lognormal:2,0.5 --error-rate 0.05 --json out.json
+
+输出每条路径的提交速率、端到端延迟 p50/p95/p99、每个任务的查询次数、峰值 RSS 与下载吞吐。
+模拟服务在子进程中运行，不与被测代码争用 GIL。
+
+为了让一轮压测在数秒内完成，脚本默认缩短轮询间隔并放宽限流，这些默认值只在
+对应的 MINIMAX_* 环境变量未设置时生效；需要按生产配置测量时直接设置环境变量即可。
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .fake_server import add_server_arguments
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 压测默认配置（环境变量未设置时生效）
+_BENCH_ENV_DEFAULTS = {
+    "MINIMAX_POLL_MIN_INTERVAL": "0.2",
+    "MINIMAX_POLL_QUEUEING_INTERVAL": "1",
+    "MINIMAX_POLL_MAX_INTERVAL": "2",
+    "MINIMAX_SUBMIT_RATE_PER_MINUTE": "60000",
+    "MINIMAX_SUBMIT_BURST": "100",
+    "MINIMAX_QUERY_RATE_PER_MINUTE": "600000",
+    "MINIMAX_QUERY_BURST": "1000",
+    "MINIMAX_RETRY_BASE_DELAY": "0.1",
+    "MINIMAX_LOG_LEVEL": "WARNING",
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http_json(url, method="GET"):
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def _start_fake_server(args, port):
+    """在子进程中启动模拟服务并等待其就绪"""
+    command = [
+        sys.executable, "-m", "benchmarks.fake_server", "--port", str(port),
+        "--queue-latency", args.queue_latency, "--processing-latency", args.processing_latency,
+        "--error-rate", str(args.error_rate), "--fail-rate", str(args.fail_rate), "--file-size", args.file_size,
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=_REPO_ROOT, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("模拟服务启动失败")
+        try:
+            _http_json(f"{base}/_stats")
+            return process, base
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("等待模拟服务就绪超时")
+
+
+def _current_rss():
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # Linux 上 ru_maxrss 单位为 KB，macOS 为字节
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler:
+    """后台线程定期采样 RSS，记录一轮压测期间的峰值"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MiniMaxBenchRss", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = _current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+def _percentile(values, pct):
+    """线性插值百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _make_requests(count, mode):
+    run_id = uuid.uuid4().hex[:8]
+    return [
+        {"model": "MiniMax-Hailuo-2.3", "prompt": f"benchmark {mode} {run_id} #{i}", "duration": 6, "resolution": "768P"}
+        for i in range(count)
+    ]
+
+
+def _run_sync(node, request_list, args):
+    """sync 路径：线程池中调用 _create_and_poll_video_task"""
+    def _timed(request_data):
+        started = time.perf_counter()
+        result, _ = node._create_and_poll_video_task(request_data, args.api_key, args.poll_interval,
+                                                     args.max_wait_time, args.download)
+        return result, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        return list(executor.map(_timed, request_list))
+
+
+def _run_async(node, request_list, args):
+    """async 路径：在包事件循环中并发调用 _async_create_and_poll_video_task"""
+    import asyncio
+
+    async def _batch():
+        session = await node._get_client_session()
+        semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+        async def _timed(request_data):
+            async with semaphore:
+                started = time.perf_counter()
+                result, _ = await node._async_create_and_poll_video_task(
+                    session, request_data, args.api_key, args.poll_interval, args.max_wait_time, args.download)
+                return result, time.perf_counter() - started
+
+        return await asyncio.gather(*[_timed(r) for r in request_list])
+
+    return node._run_coroutine(_batch())
+
+
+def _summarize(mode, outcomes, wall_time, peak_rss, baseline_rss, stats):
+    """把客户端计时与服务端统计汇总为一行结果"""
+    latencies = [elapsed for result, elapsed in outcomes if "error" not in result and result.get("status") == "Success"]
+    submit_times = stats.get("submit_times") or []
+    submit_span = max(submit_times) - min(submit_times) if len(submit_times) > 1 else 0.0
+    download_span = 0.0
+    if stats.get("download_started") and stats.get("download_finished"):
+        download_span = stats["download_finished"] - stats["download_started"]
+    polls = stats.get("polls_per_task") or {}
+    return {
+        "mode": mode,
+        "tasks": len(outcomes),
+        "succeeded": len(latencies),
+        "failed": len(outcomes) - len(latencies),
+        "wall_seconds": round(wall_time, 3),
+        "submissions_per_second": round(len(submit_times) / submit_span, 2) if submit_span > 0 else float(len(submit_times)),
+        "latency_p50": round(_percentile(latencies, 50), 3),
+        "latency_p95": round(_percentile(latencies, 95), 3),
+        "latency_p99": round(_percentile(latencies, 99), 3),
+        "polls_per_task": round(sum(polls.values()) / len(polls), 2) if polls else 0.0,
+        "injected_errors": stats.get("injected_errors", 0),
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+        "rss_growth_mb": round((peak_rss - baseline_rss) / 1024 / 1024, 1),
+        "download_mb": round(stats.get("bytes_served", 0) / 1024 / 1024, 1),
+        "download_mb_per_second": round(stats.get("bytes_served", 0) / 1024 / 1024 / download_span, 1) if download_span > 0 else 0.0,
+    }
+
+
+def _print_report(reports):
+    columns = [
+        ("mode", "mode"), ("tasks", "tasks"), ("ok", "succeeded"), ("wall s", "wall_seconds"),
+        ("submit/s", "submissions_per_second"), ("p50 s", "latency_p50"), ("p95 s", "latency_p95"),
+        ("p99 s", "latency_p99"), ("polls/task", "polls_per_task"), ("errors", "injected_errors"),
+        ("peak RSS MB", "peak_rss_mb"), ("dl MB/s", "download_mb_per_second"),
+    ]
+    widths = [max(len(title), *(len(str(r[key])) for r in reports)) for title, key in columns]
+    print("  ".join(title.rjust(w) for (title, _), w in zip(columns, widths)))
+    for report in reports:
+        print("  ".join(str(report[key]).rjust(w) for (_, key), w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniMax 视频生成流程压测（本地模拟服务）")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--tasks", type=int, default=50, help="每条路径提交的任务数")
+    parser.add_argument("--concurrency", type=int, default=16, help="同时在途的任务数")
+    parser.add_argument("--download", action="store_true", help="完成后下载视频，测量下载吞吐")
+    parser.add_argument("--poll-interval", type=int, default=1)
+    parser.add_argument("--max-wait-time", type=int, default=600)
+    parser.add_argument("--api-key", default="benchmark-key")
+    parser.add_argument("--port", type=int, default=0, help="模拟服务端口，0 表示自动选择")
+    parser.add_argument("--json", dest="json_path", default="", help="把结果写入 JSON 文件")
+    args = add_server_arguments(parser).parse_args()
+
+    process, base = _start_fake_server(args, args.port or _free_port())
+    work_dir = tempfile.mkdtemp(prefix="minimax-bench-")
+    try:
+        # 必须在导入节点模块之前设置：配置在导入时读取
+        os.environ["MINIMAX_API_BASE"] = base
+        os.environ["MINIMAX_CACHE_DIR"] = os.path.join(work_dir, "cache")
+        os.environ["MINIMAX_DOWNLOAD_DIR"] = os.path.join(work_dir, "downloads")
+        os.environ.setdefault("MINIMAX_MAX_IN_FLIGHT_TASKS", str(args.concurrency))
+        for name, value in _BENCH_ENV_DEFAULTS.items():
+            os.environ.setdefault(name, value)
+        sys.path.insert(0, _REPO_ROOT)
+        from module import node
+
+        runners = {"sync": _run_sync, "async": _run_async}
+        modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+        reports = []
+        for mode in modes:
+            _http_json(f"{base}/_reset", method="POST")
+            request_list = _make_requests(args.tasks, mode)
+            baseline_rss = _current_rss()
+            with _RssSampler() as sampler:
+                started = time.perf_counter()
+                outcomes = runners[mode](node, request_list, args)
+                wall_time = time.perf_counter() - started
+            stats = _http_json(f"{base}/_stats")
+            reports.append(_summarize(mode, outcomes, wall_time, sampler.peak, baseline_rss, stats))
+
+        _print_report(reports)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump({"config": vars(args), "results": reports}, f, ensure_ascii=False, indent=2)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""本地 MiniMax API 模拟服务，供压测使用，不消耗真实额度
+
+实现 /v1/video_generation、/v1/query/video_generation、/v1/files/retrieve、/v1/files/upload
+以及视频下载（支持 Range），排队 / 生成耗时、错误率、文件大小均可配置。
+另提供 GET /_stats 与 POST /_reset 供压测脚本读取和清零服务端统计。
+
+单独运行:
+    python -m benchmarks.fake_server --port 18800 --queue-latency lognormal:2,0.5 --processing-latency uniform:5,10
+然后设置 MINIMAX_API_BASE=http://127.0.0.1:18800 即可让节点连到模拟服务。
+"""
+import argparse
+import itertools
+import math
+import random
+import time
+from aiohttp import web
+
+
+def parse_distribution(spec, rng=None):
+    """解析耗时分布描述，返回无参采样函数（单位：秒）
+
+    支持 fixed:S、uniform:A,B、exp:MEAN、lognormal:MEDIAN,SIGMA，只写数字等同于 fixed。
+    """
+    rng = rng or random.Random()
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"不支持的分布: {spec}")
+
+
+def parse_size(text):
+    """解析文件大小，支持 K/M/G 后缀"""
+    text = str(text).strip().upper().rstrip("B")
+    scale = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+class FakeMiniMaxServer:
+    """模拟 MiniMax 视频生成接口的 aiohttp 应用
+
+    每个任务在提交时按分布抽样排队与生成耗时，查询时依次返回 Queueing、Processing、Success。
+    error_rate 为每个接口请求返回临时错误（503 / 500 / 1013）的概率，fail_rate 为任务最终失败的概率。
+    """
+
+    def __init__(self, queue_latency="fixed:0", processing_latency="fixed:1", error_rate=0.0,
+                 fail_rate=0.0, file_size=4 * 1024 * 1024, seed=None):
+        self.rng = random.Random(seed)
+        self.queue_latency = parse_distribution(queue_latency, self.rng)
+        self.processing_latency = parse_distribution(processing_latency, self.rng)
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.file_size = file_size
+        self._payload = bytes(range(256)) * (1024 * 4)
+        self._ids = itertools.count(100000)
+        self._tasks = {}
+        self.reset()
+
+    def reset(self):
+        """清零统计并丢弃已有任务"""
+        self._tasks.clear()
+        self.stats = {
+            "submits": 0,
+            "submit_times": [],
+            "queries": 0,
+            "retrieves": 0,
+            "uploads": 0,
+            "downloads": 0,
+            "bytes_served": 0,
+            "download_started": None,
+            "download_finished": None,
+            "injected_errors": 0,
+            "polls_per_task": {},
+        }
+
+    def _inject_error(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return True
+        return False
+
+    async def submit(self, request):
+        await request.read()
+        if self._inject_error():
+            return web.Response(status=503, text="service busy", headers={"Retry-After": "1"})
+        task_id = str(next(self._ids))
+        now = time.time()
+        queue = max(0.0, self.queue_latency())
+        processing = max(0.0, self.processing_latency())
+        failed = bool(self.fail_rate) and self.rng.random() < self.fail_rate
+        self._tasks[task_id] = (now + queue, now + queue + processing, failed)
+        self.stats["submits"] += 1
+        self.stats["submit_times"].append(now)
+        return web.json_response({"task_id": task_id, "base_resp": {"status_code": 0, "status_msg": "success"}})
+
+    async def query(self, request):
+        task_id = request.query.get("task_id", "")
+        self.stats["queries"] += 1
+        polls = self.stats["polls_per_task"]
+        polls[task_id] = polls.get(task_id, 0) + 1
+        if self._inject_error():
+            return web.Response(status=500, text="internal error")
+        task = self._tasks.get(task_id)
+        if task is None:
+            return web.Response(status=404, text="task not found")
+        started_at, finished_at, failed = task
+        now = time.time()
+        if now < started_at:
+            status = "Queueing"
+        elif now < finished_at:
+            status = "Processing"
+        else:
+            status = "Fail" if failed else "Success"
+        return web.json_response({
+            "task_id": task_id,
+            "status": status,
+            "file_id": f"file{task_id}" if status == "Success" else "",
+            "base_resp": {"status_code": 0, "status_msg": "success"},
+        })
+
+    async def retrieve(self, request):
+        self.stats["retrieves"] += 1
+        if self._inject_error():
+            return web.json_response({"base_resp": {"status_code": 1013, "status_msg": "internal error"}})
+        file_id = request.query.get("file_id", "")
+        download_url = f"http://{request.host}/download/{file_id}.mp4?Expires={int(time.time()) + 3600}"
+        return web.json_response({
+            "file": {"file_id": file_id, "bytes": self.file_size, "download_url": download_url},
+            "base_resp": {"status_code": 0, "status_msg": "success"},
+        })
+
+    async def upload(self, request):
+        await request.read()
+        self.stats["uploads"] += 1
+        return web.json_response({
+            "file": {"file_id": f"img{self.stats['uploads']}"},
+            "base_resp": {"status_code": 0, "status_msg": "success"},
+        })
+
+    async def download(self, request):
+        """按 Range 流式返回确定性内容，不在内存中构造整个文件"""
+        size = self.file_size
+        start, end, status = 0, size - 1, 200
+        range_header = request.headers.get("Range", "")
+        if range_header.startswith("bytes="):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first or 0)
+            end = min(int(last), size - 1) if last else size - 1
+            status = 206
+        headers = {"Accept-Ranges": "bytes", "Content-Type": "video/mp4", "Content-Length": str(end - start + 1)}
+        if status == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        self.stats["downloads"] += 1
+        if self.stats["download_started"] is None:
+            self.stats["download_started"] = time.time()
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        offset = start
+        block = len(self._payload)
+        while offset <= end:
+            # 内容只取决于偏移量，分段下载拼接后与整体下载一致
+            begin = offset % block
+            chunk = self._payload[begin:begin + min(block - begin, end + 1 - offset)]
+            await response.write(chunk)
+            offset += len(chunk)
+            self.stats["bytes_served"] += len(chunk)
+        await response.write_eof()
+        self.stats["download_finished"] = time.time()
+        return response
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def post_reset(self, request):
+        self.reset()
+        return web.json_response({"ok": True})
+
+    def app(self):
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/video_generation", self.submit)
+        app.router.add_get("/v1/query/video_generation", self.query)
+        app.router.add_get("/v1/files/retrieve", self.retrieve)
+        app.router.add_post("/v1/files/upload", self.upload)
+        app.router.add_get("/download/{name}", self.download)
+        app.router.add_get("/_stats", self.get_stats)
+        app.router.add_post("/_reset", self.post_reset)
+        return app
+
+
+def add_server_arguments(parser):
+    """模拟服务的命令行参数，压测脚本复用同一组参数"""
+    parser.add_argument("--queue-latency", default="fixed:0.5", help="排队耗时分布，如 lognormal:2,0.5")
+    parser.add_argument("--processing-latency", default="uniform:1,3", help="生成耗时分布，如 uniform:5,10")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="每个接口请求返回临时错误的概率")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="任务最终生成失败的概率")
+    parser.add_argument("--file-size", default="4M", help="视频文件大小，支持 K/M/G 后缀")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，便于复现")
+    return parser
+
+
+def server_from_args(args):
+    return FakeMiniMaxServer(args.queue_latency, args.processing_latency, args.error_rate,
+                             args.fail_rate, parse_size(args.file_size), args.seed)
+
+
+def main():
+    parser = add_server_arguments(argparse.ArgumentParser(description="本地 MiniMax API 模拟服务"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18800)
+    args = parser.parse_args()
+    print(f"MiniMax 模拟服务: http://{args.host}:{args.port}", flush=True)
+    web.run_app(server_from_args(args).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
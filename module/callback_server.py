@@ -0,0 +1,105 @@
+import asyncio
+import hmac
+import secrets
+from urllib.parse import urlsplit, urlunsplit, urlencode, parse_qsl
+from aiohttp import web
+from .config import CALLBACK_HOST, CALLBACK_PORT, CALLBACK_PATH, CALLBACK_TOKEN
+from .logging import logger
+
+# 回调推送的状态（小写）映射到查询接口的状态写法
+_CALLBACK_STATUS_MAP = {
+    "preparing": "Preparing",
+    "queueing": "Queueing",
+    "processing": "Processing",
+    "success": "Success",
+    "failed": "Fail",
+    "fail": "Fail",
+}
+
+_runner = None
+_start_lock = None
+
+# 校验推送来源的密钥：未配置时每个进程随机生成（重启前提交的任务由兜底轮询取回）
+_CALLBACK_TOKEN = CALLBACK_TOKEN or secrets.token_urlsafe(24)
+
+
+def _callback_url(public_url):
+    """在外部回调地址上附加 token 查询参数"""
+    parts = urlsplit(public_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "token"]
+    query.append(("token", _CALLBACK_TOKEN))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _normalize_callback_payload(payload):
+    """把回调推送的数据转换为与查询接口一致的结构"""
+    result_data = dict(payload)
+    status = str(payload.get("status", ""))
+    result_data["status"] = _CALLBACK_STATUS_MAP.get(status.lower(), status)
+    if "task_id" in result_data:
+        result_data["task_id"] = str(result_data["task_id"])
+    return result_data
+
+
+def _make_handler(on_status):
+    """创建回调处理函数，on_status(task_id, result_data) 在包事件循环中被调用"""
+
+    async def _handle_callback(request):
+        # 只接受携带正确 token 的推送，否则任何人都能伪造任务完成
+        if not hmac.compare_digest(request.query.get("token", ""), _CALLBACK_TOKEN):
+            logger.info(f"[MiniMax] 拒绝 token 不匹配的回调请求: {request.remote}")
+            return web.json_response({"error": "forbidden"}, status=403)
+        try:
+            payload = await request.json()
+        except Exception:
+            return web.json_response({"error": "invalid json"}, status=400)
+
+        # 地址验证：原样返回 challenge
+        challenge = payload.get("challenge")
+        if challenge is not None:
+            logger.info("[MiniMax] 回调地址验证请求")
+            return web.json_response({"challenge": challenge})
+
+        # 状态更新
+        task_id = str(payload.get("task_id", ""))
+        if task_id:
+            result_data = _normalize_callback_payload(payload)
+            logger.info(f"[MiniMax] 收到回调: {task_id} -> {result_data['status']}")
+            on_status(task_id, result_data)
+        return web.json_response({"status": "success"})
+
+    return _handle_callback
+
+
+async def _ensure_callback_server(on_status):
+    """在包事件循环中启动内嵌回调服务（只启动一次），失败时返回 False"""
+    global _runner, _start_lock
+    if _runner is not None:
+        return True
+    if _start_lock is None:
+        _start_lock = asyncio.Lock()
+
+    async with _start_lock:
+        if _runner is not None:
+            return True
+        app = web.Application()
+        app.router.add_post(CALLBACK_PATH, _make_handler(on_status))
+        runner = web.AppRunner(app, access_log=None)
+        try:
+            await runner.setup()
+            await web.TCPSite(runner, CALLBACK_HOST, CALLBACK_PORT).start()
+        except Exception as e:
+            logger.info(f"[MiniMax] 回调服务启动失败，改用轮询: {str(e)}")
+            await runner.cleanup()
+            return False
+        _runner = runner
+        logger.info(f"[MiniMax] 回调服务已启动: http://{CALLBACK_HOST}:{CALLBACK_PORT}{CALLBACK_PATH}")
+        return True
+
+
+async def _stop_callback_server():
+    """停止内嵌回调服务"""
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,171 @@
+import os
+
+
+def _env_str(name, default=""):
+    """读取字符串环境变量"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def _env_int(name, default):
+    """读取整数环境变量，非法值回退为默认值"""
+    try:
+        return int(_env_str(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    """读取浮点数环境变量，非法值回退为默认值"""
+    try:
+        return float(_env_str(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_bool(name, default=False):
+    """读取布尔环境变量（1/true/yes/on 视为 True）"""
+    value = _env_str(name, "")
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# MiniMax API 基础 URL，可指向本地模拟服务做压测（见 benchmarks/）
+MINIMAX_API_BASE = _env_str("MINIMAX_API_BASE", "https://api.minimaxi.com").rstrip("/")
+
+# 执行模式: async（共享事件循环 + aiohttp）或 sync（阻塞 requests）
+EXECUTION_MODE = _env_str("MINIMAX_EXECUTION_MODE", "async").lower()
+# async 模式下节点线程等待事件循环结果的余量（秒）：在 max_wait_time 之外留给提交、上传与下载的时间
+RUN_TIMEOUT_MARGIN = _env_float("MINIMAX_RUN_TIMEOUT_MARGIN", 600.0)
+
+# 共享 aiohttp 连接池上限
+AIOHTTP_CONNECTION_LIMIT = _env_int("MINIMAX_AIOHTTP_CONNECTION_LIMIT", 100)
+
+# 轮询调度器同时发出的查询请求上限
+POLL_MAX_CONCURRENT_QUERIES = _env_int("MINIMAX_POLL_MAX_CONCURRENT_QUERIES", 16)
+
+# 自适应轮询：接近预计完成时的最短间隔、Queueing 阶段的间隔、Processing 阶段的最长间隔
+POLL_MIN_INTERVAL = _env_float("MINIMAX_POLL_MIN_INTERVAL", 1.0)
+POLL_QUEUEING_INTERVAL = _env_float("MINIMAX_POLL_QUEUEING_INTERVAL", 15.0)
+POLL_MAX_INTERVAL = _env_float("MINIMAX_POLL_MAX_INTERVAL", 30.0)
+# 轮询请求失败时指数退避的上限（秒）
+POLL_BACKOFF_MAX = _env_float("MINIMAX_POLL_BACKOFF_MAX", 60.0)
+
+# 设置了 callback_url 时是否跳过轮询，提交后立即返回 task_id
+CALLBACK_SKIP_POLL = _env_bool("MINIMAX_CALLBACK_SKIP_POLL", False)
+
+# 内嵌回调服务：启用后由 MiniMax 推送任务完成状态，轮询只作为兜底
+# 默认只监听本机，由反向代理对外暴露；需要直接对外监听时设置 MINIMAX_CALLBACK_HOST=0.0.0.0
+CALLBACK_SERVER_ENABLED = _env_bool("MINIMAX_CALLBACK_SERVER", False)
+CALLBACK_HOST = _env_str("MINIMAX_CALLBACK_HOST", "127.0.0.1")
+CALLBACK_PORT = _env_int("MINIMAX_CALLBACK_PORT", 8765)
+CALLBACK_PATH = _env_str("MINIMAX_CALLBACK_PATH", "/minimax/callback")
+# 外部可访问的回调地址，节点未填写 callback_url 时自动使用
+CALLBACK_PUBLIC_URL = _env_str("MINIMAX_CALLBACK_PUBLIC_URL", "")
+# 回调密钥：以 token 查询参数附加到自动填写的 callback_url，不匹配的推送一律拒绝；为空时每个进程随机生成
+CALLBACK_TOKEN = _env_str("MINIMAX_CALLBACK_TOKEN", "")
+# 回调模式下的兜底轮询间隔（秒）
+CALLBACK_SAFETY_POLL_INTERVAL = _env_float("MINIMAX_CALLBACK_SAFETY_POLL_INTERVAL", 60.0)
+# 等待者登记之前到达的回调结果保留多久（秒）；过期后由轮询取得结果
+CALLBACK_EARLY_RESULT_TTL = _env_float("MINIMAX_CALLBACK_EARLY_RESULT_TTL", 3600.0)
+
+# 同步路径共享 requests.Session 的连接池大小与视频下载 GET 的自动重试次数（API 请求由重试策略统一重试）
+HTTP_POOL_CONNECTIONS = _env_int("MINIMAX_HTTP_POOL_CONNECTIONS", 10)
+HTTP_POOL_MAXSIZE = _env_int("MINIMAX_HTTP_POOL_MAXSIZE", 32)
+HTTP_MAX_RETRIES = _env_int("MINIMAX_HTTP_MAX_RETRIES", 3)
+
+# 下载视频：是否直接流式写入磁盘、保存目录（为空时使用 ComfyUI 临时目录）与分块大小
+DOWNLOAD_TO_DISK = _env_bool("MINIMAX_DOWNLOAD_TO_DISK", True)
+DOWNLOAD_DIR = _env_str("MINIMAX_DOWNLOAD_DIR", "")
+DOWNLOAD_CHUNK_SIZE = _env_int("MINIMAX_DOWNLOAD_CHUNK_SIZE", 1024 * 1024)
+
+# 分段并行下载：是否启用、分段数、启用的最小文件大小、每个分段的重试次数
+DOWNLOAD_RANGED = _env_bool("MINIMAX_DOWNLOAD_RANGED", True)
+DOWNLOAD_SEGMENTS = _env_int("MINIMAX_DOWNLOAD_SEGMENTS", 4)
+DOWNLOAD_RANGED_MIN_SIZE = _env_int("MINIMAX_DOWNLOAD_RANGED_MIN_SIZE", 8 * 1024 * 1024)
+DOWNLOAD_SEGMENT_RETRIES = _env_int("MINIMAX_DOWNLOAD_SEGMENT_RETRIES", 3)
+
+# 结果缓存：目录（为空时使用 ~/.cache/comfyui-minimax）、总大小上限与最长保留时间
+CACHE_DIR = _env_str("MINIMAX_CACHE_DIR", "")
+CACHE_MAX_BYTES = _env_int("MINIMAX_CACHE_MAX_BYTES", 10 * 1024 * 1024 * 1024)
+CACHE_MAX_AGE = _env_float("MINIMAX_CACHE_MAX_AGE", 7 * 24 * 3600)
+# 签名下载 URL 未标明过期时间时假定的有效期（秒）
+DOWNLOAD_URL_DEFAULT_TTL = _env_float("MINIMAX_DOWNLOAD_URL_DEFAULT_TTL", 3600)
+
+# 下载 URL 内存缓存（按 file_id）：条目上限；剩余有效期不足 MIN_REMAINING 秒时不再使用，
+# 不足 REFRESH_AHEAD 秒时照常返回并在后台提前重新获取
+DOWNLOAD_URL_CACHE_SIZE = _env_int("MINIMAX_DOWNLOAD_URL_CACHE_SIZE", 1024)
+DOWNLOAD_URL_MIN_REMAINING = _env_float("MINIMAX_DOWNLOAD_URL_MIN_REMAINING", 300)
+DOWNLOAD_URL_REFRESH_AHEAD = _env_float("MINIMAX_DOWNLOAD_URL_REFRESH_AHEAD", 900)
+
+# 图片编码：单张图片编码后的字节上限（MiniMax 限制 20MB）与 PNG 压缩级别（0-9，越低越快）
+IMAGE_MAX_BYTES = _env_int("MINIMAX_IMAGE_MAX_BYTES", 20 * 1024 * 1024)
+PNG_COMPRESS_LEVEL = _env_int("MINIMAX_PNG_COMPRESS_LEVEL", 1)
+
+# 已编码图片的内存缓存上限（字节），0 表示禁用
+IMAGE_MEMO_MAX_BYTES = _env_int("MINIMAX_IMAGE_MEMO_MAX_BYTES", 256 * 1024 * 1024)
+
+# 图片上传（默认关闭）：超过阈值（data URI 字符数）的图片先上传到文件接口，提交任务时只发送 URL；失败时回退为内联 base64
+IMAGE_UPLOAD_ENABLED = _env_bool("MINIMAX_IMAGE_UPLOAD", False)
+IMAGE_UPLOAD_MIN_BYTES = _env_int("MINIMAX_IMAGE_UPLOAD_MIN_BYTES", 256 * 1024)
+IMAGE_UPLOAD_PURPOSE = _env_str("MINIMAX_IMAGE_UPLOAD_PURPOSE", "video_generation")
+# 某个 api_key 上传失败（鉴权、额度、服务不可用）后暂停该 Key 上传的时间（秒），期间直接内联
+IMAGE_UPLOAD_RETRY_AFTER = _env_float("MINIMAX_IMAGE_UPLOAD_RETRY_AFTER", 600)
+
+# 日志：级别、单个字段的最大长度（超出截断）、同一任务轮询日志的最小间隔（秒，状态变化时总会输出）
+LOG_LEVEL = _env_str("MINIMAX_LOG_LEVEL", "INFO").upper()
+LOG_MAX_FIELD_CHARS = _env_int("MINIMAX_LOG_MAX_FIELD_CHARS", 256)
+LOG_POLL_INTERVAL = _env_float("MINIMAX_LOG_POLL_INTERVAL", 30)
+
+# 任务日志：记录已提交的任务，进程重启后可接管未取回结果的任务，避免重复付费生成
+TASK_JOURNAL_ENABLED = _env_bool("MINIMAX_TASK_JOURNAL", True)
+TASK_JOURNAL_PATH = _env_str("MINIMAX_TASK_JOURNAL_PATH", "")
+# 超过该时长（秒）的未完成任务不再接管
+TASK_RESUME_MAX_AGE = _env_float("MINIMAX_TASK_RESUME_MAX_AGE", 24 * 3600)
+# 任务归属租约（秒）：进程定期续约，租约过期或同一主机上的进程已退出后其任务才可被接管
+TASK_LEASE_SECONDS = _env_float("MINIMAX_TASK_LEASE_SECONDS", 120)
+# 启动时在后台继续轮询上次未完成的任务（需要 MINIMAX_API_KEY）
+RESUME_ON_START = _env_bool("MINIMAX_RESUME_ON_START", False)
+RESUME_API_KEY = _env_str("MINIMAX_API_KEY", "")
+
+# 客户端限流（按 api_key）：提交与查询各自的令牌桶（每分钟请求数与突发容量，0 表示不限）以及同时在途的任务数上限
+SUBMIT_RATE_PER_MINUTE = _env_float("MINIMAX_SUBMIT_RATE_PER_MINUTE", 60)
+SUBMIT_BURST = _env_int("MINIMAX_SUBMIT_BURST", 5)
+QUERY_RATE_PER_MINUTE = _env_float("MINIMAX_QUERY_RATE_PER_MINUTE", 600)
+QUERY_BURST = _env_int("MINIMAX_QUERY_BURST", 20)
+MAX_IN_FLIGHT_TASKS = _env_int("MINIMAX_MAX_IN_FLIGHT_TASKS", 16)
+# MiniMaxSubmit 提交的任务占用在途名额，由后台等待任务结束后归还；最多等待该时长（秒）
+TASK_SLOT_HOLD_SECONDS = _env_float("MINIMAX_TASK_SLOT_HOLD_SECONDS", 1800)
+
+# API Key 池：逗号或换行分隔的多个 Key（或从文件读取，每行一个）；节点 api_key 留空时从池中分配
+API_KEYS = _env_str("MINIMAX_API_KEYS", "")
+API_KEYS_FILE = _env_str("MINIMAX_API_KEYS_FILE", "")
+# Key 返回鉴权或额度错误后暂停使用的时间（秒）
+API_KEY_EJECT_SECONDS = _env_float("MINIMAX_API_KEY_EJECT_SECONDS", 300)
+
+# 重试与熔断：提交、文件获取等请求遇到临时错误时的最大尝试次数与退避；连续失败达到阈值后熔断一段时间（秒）
+RETRY_MAX_ATTEMPTS = _env_int("MINIMAX_RETRY_MAX_ATTEMPTS", 4)
+RETRY_BASE_DELAY = _env_float("MINIMAX_RETRY_BASE_DELAY", 1.0)
+RETRY_MAX_DELAY = _env_float("MINIMAX_RETRY_MAX_DELAY", 30.0)
+CIRCUIT_FAILURE_THRESHOLD = _env_int("MINIMAX_CIRCUIT_FAILURE_THRESHOLD", 5)
+CIRCUIT_RESET_TIMEOUT = _env_float("MINIMAX_CIRCUIT_RESET_TIMEOUT", 30.0)
+
+# 指标：进程内注册表（Prometheus 文本格式可通过 /minimax/metrics 或 MiniMax Metrics 节点获取）
+METRICS_ENABLED = _env_bool("MINIMAX_METRICS", True)
+# 在节点返回的 response JSON 中附加本次执行的分阶段指标
+METRICS_IN_RESPONSE = _env_bool("MINIMAX_METRICS_IN_RESPONSE", False)
+
+# 性能分析：开启后对节点执行及编码、生成、下载等函数做 cProfile + tracemalloc 采集
+PROFILE_ENABLED = _env_bool("MINIMAX_PROFILE", False)
+# 分析结果目录（默认缓存目录下的 profiles/），只保留最近 PROFILE_KEEP 次
+PROFILE_DIR = _env_str("MINIMAX_PROFILE_DIR", "")
+PROFILE_KEEP = _env_int("MINIMAX_PROFILE_KEEP", 50)
+# 抽样比例（0~1），生产环境可只分析一部分执行
+PROFILE_SAMPLE_RATE = _env_float("MINIMAX_PROFILE_SAMPLE_RATE", 1.0)
+# 报告中列出的热点函数与分配位置个数
+PROFILE_TOP_N = _env_int("MINIMAX_PROFILE_TOP_N", 10)
+# tracemalloc 记录的调用栈深度
+PROFILE_TRACEMALLOC_FRAMES = _env_int("MINIMAX_PROFILE_TRACEMALLOC_FRAMES", 1)
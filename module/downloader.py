@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .config import DOWNLOAD_SEGMENTS, DOWNLOAD_SEGMENT_RETRIES, DOWNLOAD_CHUNK_SIZE
+from .http_session import _get_http_session
+from .logging import logger
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+
+def _probe_range_support(download_url, timeout=10):
+    """用 Range: bytes=0-0 探测服务器是否支持分段下载，支持时返回 (总大小, ETag)，否则返回 (None, None)"""
+    try:
+        with _get_http_session().get(download_url, headers={"Range": "bytes=0-0"}, timeout=timeout, stream=True) as response:
+            if response.status_code != 206:
+                return None, None
+            match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+            if not match:
+                return None, None
+            return int(match.group(1)), response.headers.get("ETag", "")
+    except Exception as e:
+        logger.info(f"[MiniMax] 分段下载探测失败: {str(e)}")
+        return None, None
+
+
+class _RangedDownload:
+    """一次可续传的分段并行下载
+
+    数据写入 dest_path.part，进度保存在 dest_path.part.json；中断后再次下载同一文件时，
+    若总大小与 ETag 一致，则只补齐各分段未完成的部分。
+    """
+
+    def __init__(self, download_url, dest_path, total_size, etag="", segments=DOWNLOAD_SEGMENTS, timeout=300):
+        self.download_url = download_url
+        self.dest_path = dest_path
+        self.part_path = dest_path + ".part"
+        self.state_path = dest_path + ".part.json"
+        self.total_size = total_size
+        self.etag = etag
+        self.segment_count = max(1, segments)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._segments = []
+
+    def _load_state(self):
+        """读取已保存的进度，与当前文件不一致时返回 None"""
+        if not (os.path.exists(self.state_path) and os.path.exists(self.part_path)):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception:
+            return None
+        if state.get("total_size") != self.total_size or state.get("etag", "") != self.etag:
+            return None
+        if os.path.getsize(self.part_path) != self.total_size:
+            return None
+        return state.get("segments")
+
+    def _save_state(self):
+        """保存各分段的完成进度"""
+        with self._lock:
+            state = {"total_size": self.total_size, "etag": self.etag, "segments": self._segments}
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+
+    def _init_segments(self):
+        """切分分段并预分配 .part 文件；有可用进度时续传"""
+        segments = self._load_state()
+        if segments:
+            done = sum(s[2] for s in segments)
+            logger.info(f"[MiniMax] 续传下载: 已完成 {done}/{self.total_size} 字节")
+            self._segments = segments
+            return
+
+        segment_size = -(-self.total_size // self.segment_count)
+        self._segments = []
+        for start in range(0, self.total_size, segment_size):
+            end = min(start + segment_size, self.total_size) - 1
+            # [起始字节, 结束字节(含), 已下载字节数]
+            self._segments.append([start, end, 0])
+        with open(self.part_path, "wb") as f:
+            f.truncate(self.total_size)
+        self._save_state()
+
+    def _fetch_segment(self, index):
+        """下载一个分段，失败时从已完成位置重试"""
+        start, end, _ = self._segments[index]
+        last_error = None
+        for attempt in range(DOWNLOAD_SEGMENT_RETRIES + 1):
+            offset = start + self._segments[index][2]
+            if offset > end:
+                return True
+            try:
+                headers = {"Range": f"bytes={offset}-{end}"}
+                with _get_http_session().get(self.download_url, headers=headers, timeout=(10, self.timeout), stream=True) as response:
+                    if response.status_code != 206:
+                        raise ValueError(f"服务器未返回分段内容: HTTP {response.status_code}")
+                    with open(self.part_path, "r+b") as f:
+                        f.seek(offset)
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            # 防止服务器多返回数据越过分段边界
+                            chunk = chunk[:end + 1 - offset]
+                            f.write(chunk)
+                            offset += len(chunk)
+                            with self._lock:
+                                self._segments[index][2] = offset - start
+                            if offset > end:
+                                break
+                if offset > end:
+                    self._save_state()
+                    return True
+                raise ValueError(f"分段数据不完整: {offset - start}/{end - start + 1}")
+            except Exception as e:
+                last_error = e
+                self._save_state()
+                logger.info(f"[MiniMax] 分段 {index} 下载失败 (第 {attempt + 1} 次): {str(e)}")
+        raise RuntimeError(f"分段 {index} 下载失败: {str(last_error)}")
+
+    def run(self):
+        """执行下载，成功返回 dest_path；失败保留进度以便续传并返回 None"""
+        try:
+            self._init_segments()
+            pending = [i for i, s in enumerate(self._segments) if s[0] + s[2] <= s[1]]
+            logger.info(f"[MiniMax] 分段并行下载: {self.total_size} 字节，{len(pending)}/{len(self._segments)} 个分段待下载")
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="MiniMaxDownload") as executor:
+                    # list() 触发并传播分段的异常
+                    list(executor.map(self._fetch_segment, pending))
+
+            # 校验最终大小与 Content-Range 报告的总大小一致
+            downloaded = sum(s[2] for s in self._segments)
+            actual_size = os.path.getsize(self.part_path)
+            if downloaded != self.total_size or actual_size != self.total_size:
+                raise ValueError(f"下载大小不一致: {downloaded}/{actual_size}，期望 {self.total_size}")
+
+            os.replace(self.part_path, self.dest_path)
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+            logger.info(f"[MiniMax] 视频下载完成，大小: {self.total_size} 字节，保存到: {self.dest_path}")
+            return self.dest_path
+
+        except Exception as e:
+            logger.info(f"[MiniMax] 分段下载失败，已保留进度以便续传: {str(e)}")
+            return None
+
+
+def _ranged_download(download_url, dest_path, total_size, etag="", timeout=300):
+    """分段并行、可续传地下载到 dest_path"""
+    return _RangedDownload(download_url, dest_path, total_size, etag, timeout=timeout).run()
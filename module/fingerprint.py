@@ -0,0 +1,10 @@
+def _node_is_changed(cls, cache_mode="use", **kwargs):
+    """生成节点共用的 IS_CHANGED
+
+    ComfyUI 计算 IS_CHANGED 时只传入控件值（连线输入如 IMAGE 不会传入），并且已按控件值与上游
+    输出缓存节点结果，因此这里不需要再计算输入指纹。cache_mode 为 refresh/bypass 时返回 NaN
+    （与自身不相等），强制重新执行；否则返回固定值，交给 ComfyUI 自身的缓存判断。
+    """
+    if cache_mode in ("refresh", "bypass"):
+        return float("nan")
+    return cache_mode
@@ -0,0 +1,50 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import MINIMAX_API_BASE, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES
+
+_session = None
+_lock = threading.Lock()
+
+
+def _create_http_session():
+    """创建带连接池与重试策略的 requests.Session"""
+    session = requests.Session()
+    # 视频下载：只对幂等的 GET/HEAD 在连接错误、429 与 5xx 时自动重试
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # MiniMax API 请求由 _RETRY_POLICY（及轮询循环）统一退避重试并上报熔断器，连接层不再重试，
+    # 否则一次请求会在两层重试下放大成十几次并重复等待 Retry-After
+    api_adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=Retry(total=0, read=False, redirect=False, raise_on_status=False),
+    )
+    session.mount(f"{MINIMAX_API_BASE}/v1/", api_adapter)
+    return session
+
+
+def _get_http_session():
+    """获取进程内共享的 requests.Session，所有节点与轮询复用同一个 keep-alive 连接池"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_http_session()
+    return _session
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from .config import IMAGE_MEMO_MAX_BYTES
+from .tensor_convert import _tensor_to_uint8
+
+
+def _content_digest(image_np):
+    """uint8 图片数组的全量内容摘要：编码结果只取决于这些字节，任何一个像素不同摘要都不同"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(tuple(image_np.shape)).encode("utf-8"))
+    h.update(memoryview(image_np).cast("B") if image_np.flags.c_contiguous else image_np.tobytes())
+    return h.hexdigest()
+
+
+class _EncodedImageMemo:
+    """已编码图片 data URI 的内存缓存
+
+    键为 (内容摘要, 编码选项)：同一 IMAGE tensor 接入多个节点或节点重复执行时只编码一次。
+    内容摘要是转换为 uint8 后全部字节的哈希，按 tensor 身份（弱引用）与其 _version 计数缓存，
+    同一对象未被原地修改时无需重新计算；内容相同的不同 tensor 通过摘要命中。按字节数做 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes=IMAGE_MEMO_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # id(tensor) -> (弱引用, _version, 摘要)
+        self._digests = {}
+        # (摘要, 编码选项) -> data URI
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+
+    def _digest(self, tensor):
+        """tensor 的内容摘要，优先使用按身份缓存的结果"""
+        key = id(tensor)
+        version = getattr(tensor, "_version", 0)
+        with self._lock:
+            cached = self._digests.get(key)
+            if cached is not None and cached[0]() is tensor and cached[1] == version:
+                return cached[2]
+        digest = _content_digest(_tensor_to_uint8(tensor))
+        try:
+            ref = weakref.ref(tensor, lambda _, key=key: self._forget(key))
+        except TypeError:
+            return digest
+        with self._lock:
+            self._digests[key] = (ref, version, digest)
+        return digest
+
+    def _forget(self, key):
+        """tensor 被回收时移除其摘要"""
+        with self._lock:
+            cached = self._digests.get(key)
+            if cached is not None and cached[0]() is None:
+                del self._digests[key]
+
+    def key(self, tensor, encode_options):
+        """计算缓存键"""
+        return (self._digest(tensor), tuple(sorted((encode_options or {}).items())))
+
+    @staticmethod
+    def array_key(image_np, encode_options):
+        """已转换为 uint8 的图片数组的缓存键"""
+        return (_content_digest(image_np), tuple(sorted((encode_options or {}).items())))
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """保存编码结果，超出上限时淘汰最久未使用的条目"""
+        size = len(value)
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old)
+            self._entries[key] = value
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def get_or_encode(self, tensor, encode_options, encode_fn):
+        """命中缓存直接返回，否则调用 encode_fn(tensor, **encode_options) 编码并缓存"""
+        if self.max_bytes <= 0:
+            return encode_fn(tensor, **(encode_options or {}))
+        key = self.key(tensor, encode_options)
+        value = self.get(key)
+        if value is None:
+            value = encode_fn(tensor, **(encode_options or {}))
+            self.put(key, value)
+        return value
+
+
+# 进程内共享的图片编码缓存
+_IMAGE_MEMO = _EncodedImageMemo()
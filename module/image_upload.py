@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import threading
+import time
+import requests
+import aiohttp
+from .config import IMAGE_UPLOAD_ENABLED, IMAGE_UPLOAD_MIN_BYTES, IMAGE_UPLOAD_RETRY_AFTER
+from .result_cache import _signed_url_expiry
+from .key_pool import _AUTH_ERROR_CODES, _QUOTA_ERROR_CODES
+
+# 下载 URL 剩余有效期不足该秒数时重新获取，保证服务端拉取图片时 URL 仍然有效
+_URL_REFRESH_MARGIN = 300
+
+# 文件接口拒绝单张图片（格式、尺寸、内容等）时的 HTTP 状态
+_REJECTED_IMAGE_HTTP_STATUSES = (400, 413, 415)
+
+
+class _ImageRejectedError(ValueError):
+    """文件接口拒绝了这张图片，只影响这一张，不暂停上传"""
+
+
+def _upload_error(base_resp):
+    """上传接口返回非 0 status_code 时的异常：鉴权 / 额度问题属于 Key，其余视为图片被拒绝"""
+    status_code = base_resp.get("status_code", 0)
+    message = base_resp.get("status_msg", "上传失败")
+    if status_code in _AUTH_ERROR_CODES or status_code in _QUOTA_ERROR_CODES:
+        return ValueError(f"{status_code} {message}")
+    return _ImageRejectedError(f"{status_code} {message}")
+
+
+def _is_image_rejection(error):
+    """上传失败是否只与这张图片有关"""
+    if isinstance(error, _ImageRejectedError):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in _REJECTED_IMAGE_HTTP_STATUSES
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in _REJECTED_IMAGE_HTTP_STATUSES
+    return False
+
+
+def _parse_data_uri(data_uri):
+    """解析 data URI，返回 (mime_type, 字节)"""
+    header, _, payload = data_uri.partition(",")
+    mime_type = header[len("data:"):].split(";")[0] or "application/octet-stream"
+    return mime_type, base64.b64decode(payload)
+
+
+def _should_upload(value):
+    """只上传足够大的内联图片，小图片内联的开销低于一次上传"""
+    return isinstance(value, str) and value.startswith("data:image/") and len(value) >= IMAGE_UPLOAD_MIN_BYTES
+
+
+def _replace_images(value, replace_fn):
+    """复制请求数据，把其中需要上传的 data URI 替换为 replace_fn 的返回值"""
+    if isinstance(value, dict):
+        return {k: _replace_images(v, replace_fn) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_images(v, replace_fn) for v in value]
+    if _should_upload(value):
+        return replace_fn(value)
+    return value
+
+
+def _collect_images(value, found=None):
+    """收集请求数据中需要上传的 data URI（去重，保持顺序）"""
+    found = [] if found is None else found
+    if isinstance(value, dict):
+        for v in value.values():
+            _collect_images(v, found)
+    elif isinstance(value, list):
+        for v in value:
+            _collect_images(v, found)
+    elif _should_upload(value) and value not in found:
+        found.append(value)
+    return found
+
+
+class _ImageUploadCache:
+    """已上传图片的缓存：按 (api_key, 图片内容哈希) 记录 file_id 与下载 URL
+
+    URL 临近过期时只需按 file_id 重新获取，无需再次上传。
+    某个 api_key 上传失败（鉴权、额度、服务不可用）时只暂停该 Key 的上传一段时间，期间请求直接内联图片；
+    单张图片被拒绝不影响其它图片。
+    """
+
+    def __init__(self, retry_after=IMAGE_UPLOAD_RETRY_AFTER):
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._entries = {}
+        # api_key -> 暂停上传截止时间
+        self._disabled_until = {}
+
+    @staticmethod
+    def key(data_uri, api_key):
+        h = hashlib.sha256()
+        h.update((api_key or "").encode("utf-8"))
+        h.update(b"\0")
+        h.update(data_uri.encode("ascii"))
+        return h.hexdigest()
+
+    def enabled(self, api_key):
+        with self._lock:
+            return IMAGE_UPLOAD_ENABLED and time.time() >= self._disabled_until.get(api_key or "", 0.0)
+
+    def disable(self, api_key):
+        """该 api_key 上传失败后暂停其上传"""
+        with self._lock:
+            self._disabled_until[api_key or ""] = time.time() + self.retry_after
+
+    def get(self, key):
+        """返回 (file_id, 仍然有效的下载 URL 或 None)；未上传过返回 (None, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        if entry["expires_at"] - time.time() > _URL_REFRESH_MARGIN:
+            return entry["file_id"], entry["download_url"]
+        return entry["file_id"], None
+
+    def put(self, key, file_id, download_url):
+        with self._lock:
+            self._entries[key] = {
+                "file_id": file_id,
+                "download_url": download_url,
+                "expires_at": _signed_url_expiry(download_url),
+            }
+
+    def forget(self, key):
+        """file_id 已失效（无法再获取 URL）时移除，下次重新上传"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# 进程内共享的图片上传缓存
+_IMAGE_UPLOAD_CACHE = _ImageUploadCache()
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from .config import API_KEYS, API_KEYS_FILE, API_KEY_EJECT_SECONDS
+from .rate_limit import _get_limiter
+from .task_journal import _key_hash
+from .logging import logger, _mask_secret
+
+# 鉴权失败：Key 无效或无权限
+_AUTH_ERROR_CODES = (1004, 2049)
+# 额度/限流：请求频率超限、余额不足、用量超限
+_QUOTA_ERROR_CODES = (1002, 1008, 1039, 2056)
+_EJECT_HTTP_STATUSES = (401, 403, 429)
+
+
+def _load_api_keys():
+    """从环境变量与 Key 文件读取 Key 列表（去重，保持顺序）"""
+    text = API_KEYS
+    if API_KEYS_FILE and os.path.exists(API_KEYS_FILE):
+        with open(API_KEYS_FILE, "r", encoding="utf-8") as f:
+            text += "\n" + f.read()
+    keys = []
+    for line in text.replace(",", "\n").splitlines():
+        key = line.strip()
+        if key and not key.startswith("#") and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class _ApiKeyPool:
+    """多个 API Key 之间分配提交
+
+    按 (在途任务数, 提交令牌桶需等待的时间) 选择最空闲的 Key；任务创建后的轮询与文件获取
+    固定使用创建它的 Key。返回鉴权或额度错误的 Key 暂停使用一段时间。
+    """
+
+    def __init__(self, keys=None, eject_seconds=API_KEY_EJECT_SECONDS):
+        self.keys = list(keys) if keys is not None else _load_api_keys()
+        self.eject_seconds = eject_seconds
+        self._ejected_until = {}
+        self._rotation = 0
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        return bool(self.keys)
+
+    def resolve(self, api_key):
+        """节点填写了 api_key 时直接使用，留空时从池中选择"""
+        if (api_key and api_key.strip()) or not self.keys:
+            return api_key
+        return self.select()
+
+    def owner_key(self, key_hash, api_key):
+        """创建任务的 Key：节点填写了 api_key 时直接使用，否则按记录的 Key 哈希在池中查找，找不到时从池中选择"""
+        if (api_key and api_key.strip()) or not self.keys:
+            return api_key
+        for key in self.keys:
+            if key_hash and _key_hash(key) == key_hash:
+                return key
+        return self.select()
+
+    def is_ejected(self, api_key):
+        with self._lock:
+            return self._ejected_until.get(api_key, 0) > time.time()
+
+    def candidates(self, api_key):
+        """可能提交过该请求的 Key：节点填写的 Key，或池中所有 Key"""
+        if (api_key and api_key.strip()) or not self.keys:
+            return [api_key]
+        return list(self.keys)
+
+    def select(self):
+        now = time.time()
+        with self._lock:
+            available = [k for k in self.keys if self._ejected_until.get(k, 0) <= now]
+            if not available:
+                # 全部被暂停时选择最早恢复的 Key，而不是直接失败
+                return min(self.keys, key=lambda k: self._ejected_until.get(k, 0))
+            # 负载相同时轮流分配
+            self._rotation = (self._rotation + 1) % len(available)
+            rotation = self._rotation
+
+        def _load(item):
+            index, key = item
+            limiter = _get_limiter(key)
+            in_flight = limiter.in_flight.in_use() + limiter.in_flight.queued() if limiter.in_flight else 0
+            return (in_flight, limiter.submit.delay(), (index - rotation) % len(available))
+
+        return min(enumerate(available), key=_load)[1]
+
+    def eject(self, api_key, reason):
+        if api_key not in self.keys:
+            return
+        with self._lock:
+            self._ejected_until[api_key] = time.time() + self.eject_seconds
+        logger.info(f"[MiniMax] API Key {_mask_secret(api_key)} 暂停使用 {self.eject_seconds:.0f} 秒: {reason}")
+
+    def report_status(self, api_key, status_code, status_msg=""):
+        """根据 base_resp.status_code 判断是否需要暂停该 Key"""
+        if status_code in _AUTH_ERROR_CODES or status_code in _QUOTA_ERROR_CODES:
+            self.eject(api_key, f"{status_code} {status_msg}".strip())
+
+    def report_http_status(self, api_key, http_status):
+        if http_status in _EJECT_HTTP_STATUSES:
+            self.eject(api_key, f"HTTP {http_status}")
+
+
+# 进程内共享的 API Key 池
+_KEY_POOL = _ApiKeyPool()
@@ -1,6 +1,13 @@
 import logging
 import copy
+import hashlib
+import json
+import re
 import sys
+import threading
+import time
+from collections import OrderedDict
+from .config import LOG_LEVEL, LOG_MAX_FIELD_CHARS, LOG_POLL_INTERVAL
 
 
 class ColoredFormatter(logging.Formatter):
@@ -21,6 +28,117 @@ class ColoredFormatter(logging.Formatter):
         return super().format(colored_record)
 
 
+# 视为敏感信息、输出时需要遮盖的字段名
+_SECRET_KEYS = ("api_key", "apikey", "authorization", "token", "secret", "password")
+
+_DATA_URI_RE = re.compile(r"data:([\w/+.-]+);base64,[A-Za-z0-9+/=]{16,}")
+_BEARER_RE = re.compile(r"(Bearer\s+)[A-Za-z0-9._~+/=-]+")
+# URL 查询参数中的令牌，如自动填写的 callback_url?token=...
+_TOKEN_PARAM_RE = re.compile(r"([?&][\w.-]*token=)([^&#\s\"']+)", re.IGNORECASE)
+
+
+def _mask_secret(value):
+    """遮盖密钥，只保留末 4 位便于辨认"""
+    value = str(value)
+    return f"***{value[-4:]}" if len(value) > 8 else "***"
+
+
+def _summarize_data_uri(value):
+    """用 MIME 类型、大小与内容摘要代替 data URI"""
+    header = value[:value.find(",")] if "," in value else value[:32]
+    digest = hashlib.sha256(value.encode("utf-8", "replace")).hexdigest()[:12]
+    return f"<{header},{len(value)} chars,sha256:{digest}>"
+
+
+def _redact(value, max_chars=LOG_MAX_FIELD_CHARS):
+    """返回适合写入日志的副本：data URI 替换为摘要，密钥与 URL 中的令牌遮盖，过长字符串截断"""
+    if isinstance(value, dict):
+        return {
+            k: _mask_secret(v) if isinstance(k, str) and k.lower() in _SECRET_KEYS and v else _redact(v, max_chars)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_redact(v, max_chars) for v in value]
+    if isinstance(value, str):
+        if value.startswith("data:"):
+            return _summarize_data_uri(value)
+        if "token=" in value.lower():
+            value = _mask_token_params(value)
+        if max_chars and len(value) > max_chars:
+            return f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+    return value
+
+
+def _mask_token_params(text):
+    return _TOKEN_PARAM_RE.sub(lambda m: m.group(1) + _mask_secret(m.group(2)), text)
+
+
+def _redact_text(text):
+    """清理任意日志文本中的 data URI、Bearer 令牌与 URL 中的令牌参数"""
+    if "base64," in text:
+        text = _DATA_URI_RE.sub(lambda m: _summarize_data_uri(m.group(0)), text)
+    if "Bearer" in text:
+        text = _BEARER_RE.sub(lambda m: m.group(1) + _mask_secret(m.group(0)), text)
+    if "token=" in text.lower():
+        text = _mask_token_params(text)
+    return text
+
+
+class _LazyJson:
+    """延迟序列化：只有日志级别启用、真正输出时才做脱敏与 json.dumps
+
+    用法: logger.info("请求数据: %s", _LazyJson(request_data))
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return json.dumps(_redact(self.value), ensure_ascii=False)
+
+
+class RedactingFilter(logging.Filter):
+    """兜底过滤器：输出前清理消息中残留的 data URI 与令牌（仅在记录会被输出时执行）"""
+
+    def filter(self, record):
+        # 格式化结果写回 record，之后的 Formatter 不会再次格式化参数
+        record.msg = _redact_text(record.getMessage())
+        record.args = None
+        return True
+
+
+class _RateLimitedLog:
+    """按键限流：值变化时立即允许输出，否则同一键在 interval 秒内只输出一次"""
+
+    def __init__(self, interval=LOG_POLL_INTERVAL, max_keys=4096):
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._last = OrderedDict()
+
+    def allow(self, key, value=None):
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and last[0] == value and now - last[1] < self.interval:
+                return False
+            self._last[key] = (value, now)
+            self._last.move_to_end(key)
+            while len(self._last) > self.max_keys:
+                self._last.popitem(last=False)
+            return True
+
+    def forget(self, key):
+        with self._lock:
+            self._last.pop(key, None)
+
+
+# 轮询日志限流：每个任务状态变化时输出，状态不变时每 LOG_POLL_INTERVAL 秒最多输出一次
+_POLL_LOG = _RateLimitedLog()
+
+
 # Create a new logger
 logger = logging.getLogger("MiniMaxVideo")
 logger.propagate = False
@@ -32,8 +150,11 @@ if not logger.handlers:
         ColoredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     )
     logger.addHandler(handler)
+    logger.addFilter(RedactingFilter())
 
 # Configure logger
-loglevel = getattr(logging, "INFO", None)
+loglevel = getattr(logging, LOG_LEVEL, None)
+if not isinstance(loglevel, int):
+    loglevel = logging.INFO
 logger.setLevel(loglevel)
 
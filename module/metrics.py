@@ -0,0 +1,312 @@
+import bisect
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from .config import METRICS_ENABLED
+from .logging import logger
+
+# ComfyUI 环境中通过服务器路由暴露 Prometheus 指标
+try:
+    from server import PromptServer
+    PROMPT_SERVER_AVAILABLE = True
+except ImportError:
+    PROMPT_SERVER_AVAILABLE = False
+
+# 耗时直方图的默认分桶（秒）
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# 每个任务查询次数的分桶
+_POLL_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+# 字节数 / 吞吐（字节每秒）的分桶
+_BYTES_BUCKETS = tuple(float(4 ** i * 1024) for i in range(12))
+
+
+def _format_labels(names, values, extra=None):
+    """Prometheus 标签字符串，如 {stage="submit",le="0.5"}"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Counter:
+    """单调递增计数器，按标签值分别计数"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.label_names, key), value) for key, value in sorted(self._values.items())]
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "": value for key, value in self._values.items()}
+
+
+class _Histogram:
+    """累积分桶直方图，按标签值分别统计 count / sum / 各分桶计数"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=_SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    le = ("le", _format_value(bound))
+                    result.append((self.name + "_bucket", _format_labels(self.label_names, key, le), cumulative))
+                result.append((self.name + "_sum", _format_labels(self.label_names, key), total))
+                result.append((self.name + "_count", _format_labels(self.label_names, key), count))
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                ",".join(key) or "": {"count": count, "sum": round(total, 6), "avg": round(total / count, 6) if count else 0}
+                for key, (_, total, count) in self._values.items()
+            }
+
+
+class _MetricsRegistry:
+    """进程内指标注册表：同名指标只创建一次，可导出为 Prometheus 文本格式或 dict"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(_Counter, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=_SECONDS_BUCKETS):
+        return self._get_or_create(_Histogram, name, help_text, label_names, buckets)
+
+    def render_prometheus(self):
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """全部指标的 dict 快照"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+# 进程内共享的指标注册表
+_METRICS = _MetricsRegistry()
+
+_STAGE_SECONDS = _METRICS.histogram("minimax_stage_seconds", "各阶段耗时（秒）", ("stage",))
+_STAGE_BYTES = _METRICS.counter("minimax_stage_bytes_total", "各阶段传输的字节数", ("stage",))
+_IMAGE_PAYLOAD_BYTES = _METRICS.histogram("minimax_image_payload_bytes", "编码后图片 data URI 的大小（字节）", buckets=_BYTES_BUCKETS)
+_DOWNLOAD_THROUGHPUT = _METRICS.histogram("minimax_download_bytes_per_second", "视频下载吞吐（字节/秒）", buckets=_BYTES_BUCKETS)
+_TASK_STATUS_SECONDS = _METRICS.histogram("minimax_task_status_seconds", "轮询观测到的任务在各状态停留的时间（秒）", ("status",))
+_POLLS_PER_TASK = _METRICS.histogram("minimax_polls_per_task", "每个任务到达终态前的查询次数", buckets=_POLL_BUCKETS)
+_TASKS_FINISHED = _METRICS.counter("minimax_tasks_finished_total", "到达终态的任务数", ("status",))
+
+
+class _GenerationTrace:
+    """一次节点执行内各阶段的指标汇总，可选地附加到节点返回的 response JSON 中"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages = {}
+        self.statuses = {}
+        self.polls = 0
+
+    def add_stage(self, stage, seconds, nbytes=None):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            if nbytes is not None:
+                entry["bytes"] = entry.get("bytes", 0) + nbytes
+
+    def add_task(self, durations, polls):
+        with self._lock:
+            for status, seconds in durations.items():
+                self.statuses[status] = self.statuses.get(status, 0.0) + seconds
+            self.polls += polls
+
+    def to_dict(self):
+        with self._lock:
+            stages = {}
+            for stage, entry in self.stages.items():
+                item = {"count": entry["count"], "seconds": round(entry["seconds"], 4)}
+                if "bytes" in entry:
+                    item["bytes"] = entry["bytes"]
+                    if entry["seconds"] > 0:
+                        item["bytes_per_second"] = round(entry["bytes"] / entry["seconds"], 1)
+                stages[stage] = item
+            return {
+                "total_seconds": round(time.time() - self.started_at, 4),
+                "stages": stages,
+                "status_seconds": {k: round(v, 4) for k, v in self.statuses.items()},
+                "polls": self.polls,
+            }
+
+
+# 当前节点执行的追踪；asyncio 任务与 run_coroutine_threadsafe 会复制上下文，线程池需显式复制
+_CURRENT_TRACE = contextvars.ContextVar("minimax_trace", default=None)
+
+
+def _current_trace():
+    return _CURRENT_TRACE.get()
+
+
+def _traced(run):
+    """节点 run 方法的装饰器：为一次节点执行建立独立的指标追踪"""
+    @functools.wraps(run)
+    def wrapper(*args, **kwargs):
+        token = _CURRENT_TRACE.set(_GenerationTrace())
+        try:
+            return run(*args, **kwargs)
+        finally:
+            _CURRENT_TRACE.reset(token)
+    return wrapper
+
+
+def _record_stage(stage, seconds, nbytes=None, trace=None):
+    """记录一个阶段的耗时（及字节数）到注册表和当前追踪"""
+    if not METRICS_ENABLED:
+        return
+    _STAGE_SECONDS.observe(seconds, stage=stage)
+    if nbytes is not None:
+        _STAGE_BYTES.inc(nbytes, stage=stage)
+    trace = trace or _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.add_stage(stage, seconds, nbytes)
+
+
+@contextmanager
+def _timed_stage(stage):
+    """计时一个阶段；可在 with 块内设置 measure["bytes"] 记录字节数，异常时不记录"""
+    measure = {}
+    started = time.perf_counter()
+    yield measure
+    _record_stage(stage, time.perf_counter() - started, measure.get("bytes"))
+
+
+def _record_image_payload(nbytes):
+    if METRICS_ENABLED:
+        _IMAGE_PAYLOAD_BYTES.observe(nbytes)
+
+
+def _record_download(nbytes, seconds):
+    """记录一次视频下载的字节数与吞吐"""
+    _record_stage("download", seconds, nbytes)
+    if METRICS_ENABLED and seconds > 0:
+        _DOWNLOAD_THROUGHPUT.observe(nbytes / seconds)
+
+
+class _StatusClock:
+    """按轮询结果累计任务在各状态的停留时间
+
+    两次查询之间的时间计入前一次观测到的状态；提交到第一次查询之间的时间计入第一次观测到的状态。
+    polls 由调用方在每次发出查询时累加。
+    """
+
+    def __init__(self, started_at=None):
+        self.last_status = None
+        self.last_change = time.time() if started_at is None else started_at
+        self.durations = {}
+        self.polls = 0
+
+    def observe(self, status, now=None):
+        now = time.time() if now is None else now
+        if self.last_status is None:
+            self.last_status = status
+        elif status != self.last_status:
+            self.durations[self.last_status] = self.durations.get(self.last_status, 0.0) + now - self.last_change
+            self.last_status = status
+            self.last_change = now
+
+    def finish(self, traces=()):
+        """任务到达终态：写入注册表与相关追踪"""
+        if not METRICS_ENABLED:
+            return
+        for status, seconds in self.durations.items():
+            _TASK_STATUS_SECONDS.observe(seconds, status=status)
+        _POLLS_PER_TASK.observe(self.polls)
+        _TASKS_FINISHED.inc(status=self.last_status or "Unknown")
+        for trace in traces:
+            if trace is not None:
+                trace.add_task(self.durations, self.polls)
+
+
+def _register_metrics_route():
+    """在 ComfyUI 服务器上注册 GET /minimax/metrics（Prometheus 文本格式）"""
+    if not (METRICS_ENABLED and PROMPT_SERVER_AVAILABLE):
+        return
+    try:
+        from aiohttp import web
+
+        @PromptServer.instance.routes.get("/minimax/metrics")
+        async def _metrics_handler(request):
+            return web.Response(text=_METRICS.render_prometheus(), content_type="text/plain", charset="utf-8",
+                                headers={"X-Content-Type-Options": "nosniff"})
+    except Exception as e:
+        logger.info(f"[MiniMax] 注册指标路由失败: {str(e)}")
+
+
+_register_metrics_route()
@@ -1,15 +1,54 @@
+import os
 import json
+import re
 import requests
 import time
+import threading
 import asyncio
+import contextvars
+from contextlib import contextmanager, asynccontextmanager
 import aiohttp
 import base64
 import torch
-import numpy as np
 from PIL import Image
 import io
 from io import BytesIO
-from .logging import logger
+from .logging import logger, _LazyJson, _POLL_LOG
+from .config import (
+    MINIMAX_API_BASE, EXECUTION_MODE, POLL_MAX_CONCURRENT_QUERIES, CALLBACK_SKIP_POLL,
+    CALLBACK_SERVER_ENABLED, CALLBACK_PUBLIC_URL, CALLBACK_SAFETY_POLL_INTERVAL,
+    DOWNLOAD_TO_DISK, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_RANGED, DOWNLOAD_RANGED_MIN_SIZE,
+    IMAGE_MAX_BYTES, PNG_COMPRESS_LEVEL, IMAGE_UPLOAD_PURPOSE,
+    RESUME_ON_START, RESUME_API_KEY, TASK_RESUME_MAX_AGE, TASK_SLOT_HOLD_SECONDS, METRICS_IN_RESPONSE,
+    RUN_TIMEOUT_MARGIN
+)
+from .runtime import _get_client_session, _run_coroutine, _submit_coroutine
+from .http_session import _get_http_session
+from .storage import _download_path, _DOWNLOAD_LOCKS
+from .downloader import _probe_range_support, _ranged_download
+from .result_cache import _RESULT_CACHE, CACHE_MODES, _request_cache_key
+from .task_journal import _TASK_JOURNAL, _key_hash
+from .rate_limit import _get_limiter
+from .key_pool import _KEY_POOL
+from .resilience import (
+    _RETRY_POLICY, _CIRCUIT_BREAKER, _RetryableError, _check_base_resp, _is_fatal_http_error,
+    _parse_retry_after, _retry_after_of, _REJECTED_HTTP_STATUSES
+)
+from .tensor_convert import _tensor_to_uint8
+from .image_memo import _IMAGE_MEMO
+from .url_cache import _DOWNLOAD_URL_CACHE
+from .video_frames import _decode_video_frames
+from .image_upload import (
+    _IMAGE_UPLOAD_CACHE, _parse_data_uri, _collect_images, _replace_images, _upload_error, _is_image_rejection
+)
+from .fingerprint import _node_is_changed
+from .poller import _PollScheduler
+from .poll_policy import _POLL_POLICY, _poll_profile
+from .callback_server import _ensure_callback_server, _callback_url
+from .profiling import _profiled, _profiled_node
+from .metrics import (
+    _METRICS, _traced, _current_trace, _timed_stage, _record_image_payload, _record_download, _StatusClock
+)
 
 # 尝试导入 VideoFromFile，如果不可用则使用字符串 URL
 try:
@@ -20,14 +59,45 @@ except ImportError:
     logger.info("[MiniMax] VideoFromFile 不可用，将使用 URL 字符串返回视频")
 
 
-# MiniMax API 基础 URL
-MINIMAX_API_BASE = "https://api.minimaxi.com"
+# 支持的图片编码格式
+IMAGE_FORMATS = ["png", "jpeg", "webp"]
+_IMAGE_MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+_IMAGE_PIL_FORMATS = {"image/png": "PNG", "image/jpeg": "JPEG", "image/webp": "WEBP"}
 
+# 生成分辨率对应的短边像素数，用于把输入图片缩小到模型实际使用的尺寸
+_RESOLUTION_SHORT_SIDE = {"512P": 512, "720P": 720, "768P": 768, "1080P": 1080}
 
-def _image_tensor_to_base64(image_tensor, mime_type="image/png"):
-    """将 ComfyUI 图片 tensor 转换为 base64 data URI"""
+
+def _image_encode_options(image_format="png", image_quality=90, resolution=None, downscale=True):
+    """根据节点参数构建图片编码选项"""
+    return {
+        "mime_type": _IMAGE_MIME_TYPES.get(image_format, "image/png"),
+        "quality": image_quality,
+        "target_resolution": _RESOLUTION_SHORT_SIDE.get(resolution) if downscale else None,
+    }
+
+
+def _encode_pil_image(image, mime_type, quality):
+    """按格式编码 PIL Image，返回字节"""
+    buffer = io.BytesIO()
+    image_format = _IMAGE_PIL_FORMATS[mime_type]
+    if image_format == "PNG":
+        # 低压缩级别：体积略大但编码速度快数倍
+        image.save(buffer, format=image_format, compress_level=PNG_COMPRESS_LEVEL)
+    elif image_format == "JPEG":
+        image.save(buffer, format=image_format, quality=quality, optimize=False)
+    else:
+        image.save(buffer, format=image_format, quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _image_tensor_to_base64(image_tensor, mime_type="image/png", quality=90, target_resolution=None, max_bytes=None):
+    """将 ComfyUI 图片 tensor 转换为 base64 data URI
+
+    支持 PNG/JPEG/WebP；target_resolution 为目标短边像素数，大于它的图片会先缩小；
+    编码结果超过 max_bytes 时依次降低质量、缩小尺寸直到满足大小限制。
+    """
     # ComfyUI 图片格式: (B, H, W, C) 或 (H, W, C)，值范围 [0, 1]
-    # 转换为 PIL Image
     if len(image_tensor.shape) == 4:
         # 取第一张图片
         image_tensor = image_tensor[0]
@@ -36,15 +106,23 @@ def _image_tensor_to_base64(image_tensor, mime_type="image/png"):
     if len(image_tensor.shape) != 3:
         raise ValueError(f"不支持的图片 tensor 形状: {image_tensor.shape}")
     
-    # 转换为 numpy array，值范围 [0, 255]
-    image_np = (image_tensor.cpu().numpy() * 255).astype(np.uint8)
+    # 转换为 uint8 numpy array，值范围 [0, 255]（复用线程内缓冲区）
+    image_np = _tensor_to_uint8(image_tensor)
+    return _image_array_to_base64(image_np, mime_type, quality, target_resolution, max_bytes)
+
+
+def _image_array_to_base64(image_np, mime_type="image/png", quality=90, target_resolution=None, max_bytes=None):
+    """将 (H, W, C) uint8 数组编码为 base64 data URI"""
+    if mime_type not in _IMAGE_PIL_FORMATS:
+        mime_type = "image/png"
+    if max_bytes is None:
+        max_bytes = IMAGE_MAX_BYTES
     
     # 转换为 PIL Image
     channels = image_np.shape[2]
     if channels == 4:  # RGBA
         image = Image.fromarray(image_np, 'RGBA')
-        # MiniMax API 支持 PNG，可以保留 RGBA
-        # 但如果需要 JPEG，转换为 RGB
+        # PNG 和 WebP 可以保留 RGBA，JPEG 需要转换为 RGB
         if mime_type == "image/jpeg":
             # 创建白色背景并合成
             rgb_image = Image.new('RGB', image.size, (255, 255, 255))
@@ -55,37 +133,68 @@ def _image_tensor_to_base64(image_tensor, mime_type="image/png"):
     else:
         raise ValueError(f"不支持的通道数: {channels}")
     
-    # 转换为 base64
-    buffer = io.BytesIO()
-    # 根据 mime_type 确定格式
-    if mime_type == "image/jpeg":
-        image_format = 'JPEG'
-        # 确保是 RGB 模式
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-    else:  # 默认使用 PNG
-        image_format = 'PNG'
-        mime_type = "image/png"
+    # 缩小到目标分辨率（按短边），模型不会使用更高的分辨率
+    if target_resolution and min(image.size) > target_resolution:
+        scale = target_resolution / min(image.size)
+        new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(new_size, Image.BICUBIC, reducing_gap=2.0)
     
-    image.save(buffer, format=image_format)
-    image_bytes = buffer.getvalue()
-    base64_str = base64.b64encode(image_bytes).decode('utf-8')
+    # 编码，超出大小限制时先降质量（JPEG/WebP），再缩小尺寸
+    image_bytes = _encode_pil_image(image, mime_type, quality)
+    while max_bytes and len(image_bytes) > max_bytes:
+        if mime_type != "image/png" and quality > 40:
+            quality = max(40, quality - 15)
+        elif min(image.size) > 64:
+            image = image.resize((max(1, int(image.width * 0.75)), max(1, int(image.height * 0.75))), Image.BICUBIC)
+        else:
+            raise ValueError(f"图片编码后仍超过大小限制: {len(image_bytes)} > {max_bytes} 字节")
+        image_bytes = _encode_pil_image(image, mime_type, quality)
+    
+    base64_str = base64.b64encode(image_bytes).decode('ascii')
     
     # 返回 data URI
     return f"data:{mime_type};base64,{base64_str}"
 
 
-def _process_image_input(image_input, image_url_input):
+@_profiled
+def _image_batch_to_base64_list(image_tensor, encode_options=None):
+    """将 (B, H, W, C) 图片批次中的每一张都转换为 base64 data URI"""
+    encode_options = encode_options or {}
+    if len(image_tensor.shape) == 3:
+        return [_image_tensor_to_base64(image_tensor, **encode_options)]
+    if len(image_tensor.shape) != 4:
+        raise ValueError(f"不支持的图片 tensor 形状: {image_tensor.shape}")
+    with _timed_stage("image_encode") as measure:
+        # 整批一次向量化转换为 uint8，按每帧的全量内容摘要查编码缓存，未命中的帧再逐张编码
+        batch_np = _tensor_to_uint8(image_tensor)
+        keys = [_IMAGE_MEMO.array_key(batch_np[i], encode_options) for i in range(batch_np.shape[0])]
+        results = [_IMAGE_MEMO.get(key) for key in keys]
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = _image_array_to_base64(batch_np[i], **encode_options)
+                _IMAGE_MEMO.put(keys[i], results[i])
+        measure["bytes"] = sum(len(result) for result in results)
+    for result in results:
+        _record_image_payload(len(result))
+    return results
+
+
+@_profiled
+def _process_image_input(image_input, image_url_input, encode_options=None):
     """处理图片输入：优先使用 IMAGE tensor，否则使用 URL 字符串"""
+    encode_options = encode_options or {}
     if image_input is not None:
+        # 如果是列表，取第一个
+        if isinstance(image_input, (list, tuple)) and len(image_input) > 0:
+            image_input = image_input[0]
         # 检查是否是 tensor
         if isinstance(image_input, torch.Tensor):
-            # 转换为 base64 data URI
-            return _image_tensor_to_base64(image_input)
-        elif isinstance(image_input, (list, tuple)) and len(image_input) > 0:
-            # 如果是列表，取第一个
-            if isinstance(image_input[0], torch.Tensor):
-                return _image_tensor_to_base64(image_input[0])
+            # 转换为 base64 data URI（相同图片只编码一次）
+            with _timed_stage("image_encode") as measure:
+                data_uri = _IMAGE_MEMO.get_or_encode(image_input, encode_options, _image_tensor_to_base64)
+                measure["bytes"] = len(data_uri)
+            _record_image_payload(len(data_uri))
+            return data_uri
     
     # 如果没有提供 IMAGE tensor，使用 URL 字符串
     if image_url_input and image_url_input.strip():
@@ -94,14 +203,18 @@ def _process_image_input(image_input, image_url_input):
     return None
 
 
-def _poll_video_task(task_id, api_key, poll_interval, max_wait_time):
-    """轮询视频生成任务结果"""
+def _poll_video_task(task_id, api_key, poll_interval, max_wait_time, profile=None):
+    """轮询视频生成任务结果，等待间隔由自适应轮询策略决定"""
     query_url = f"{MINIMAX_API_BASE}/v1/query/video_generation"
     headers = {
         "Authorization": f"Bearer {api_key}" if api_key else ""
     }
     
     start_time = time.time()
+    # 连续失败次数，用于指数退避
+    error_count = 0
+    # 各状态停留时间与查询次数
+    clock = _StatusClock(start_time)
     
     while True:
         try:
@@ -111,19 +224,36 @@ def _poll_video_task(task_id, api_key, poll_interval, max_wait_time):
                 logger.info(f"[MiniMax] {error_msg}")
                 return {"error": error_msg, "task_id": task_id}
             
-            logger.info(f"[MiniMax] 轮询任务状态: {task_id}")
+            logger.debug("[MiniMax] 轮询任务状态: %s", task_id)
+            
+            # API 熔断期间任务仍在服务端运行，等熔断结束再查询
+            circuit_wait = _CIRCUIT_BREAKER.remaining()
+            if circuit_wait > 0:
+                time.sleep(min(circuit_wait, max(0, max_wait_time - (time.time() - start_time))))
+                continue
             
-            # 查询任务状态
-            response = requests.get(query_url, headers=headers, params={"task_id": task_id}, timeout=10)
+            # 查询任务状态（按 api_key 限流）
+            _get_limiter(api_key).query.acquire()
+            clock.polls += 1
+            with _timed_stage("query"):
+                response = _get_http_session().get(query_url, headers=headers, params={"task_id": task_id}, timeout=10)
             response.raise_for_status()
             
             result_data = response.json()
+            _check_base_resp(result_data)
+            _RETRY_POLICY.record(None)
             task_status = result_data.get("status", "")
+            error_count = 0
+            clock.observe(task_status)
+            if task_status not in ["Preparing", "Queueing", "Processing"]:
+                clock.finish((_current_trace(),))
             
-            logger.info(f"[MiniMax] 任务状态: {task_status}")
+            if _POLL_LOG.allow(task_id, task_status):
+                logger.info(f"[MiniMax] 任务 {task_id} 状态: {task_status}")
             
             # 任务完成
             if task_status == "Success":
+                _POLL_POLICY.record_completion(profile, time.time() - start_time)
                 logger.info(f"[MiniMax] 任务完成成功")
                 return result_data
             
@@ -135,7 +265,10 @@ def _poll_video_task(task_id, api_key, poll_interval, max_wait_time):
             
             # 继续等待
             elif task_status in ["Preparing", "Queueing", "Processing"]:
-                time.sleep(poll_interval)
+                elapsed = time.time() - start_time
+                delay = _POLL_POLICY.next_interval(task_status, elapsed, poll_interval, profile)
+                # 不要睡过超时时间点
+                time.sleep(max(0, min(delay, max_wait_time - elapsed)))
                 continue
             
             # 未知状态
@@ -144,106 +277,132 @@ def _poll_video_task(task_id, api_key, poll_interval, max_wait_time):
                 return result_data
                 
         except requests.exceptions.RequestException as e:
+            error_count += 1
             error_msg = f"轮询请求失败: {str(e)}"
-            logger.info(f"[MiniMax] {error_msg}，继续重试...")
+            _RETRY_POLICY.record(e)
+            # 鉴权失败、任务不存在等 4xx 错误重试也不会成功
+            if _is_fatal_http_error(e):
+                logger.info(f"[MiniMax] {error_msg}")
+                return {"error": error_msg, "task_id": task_id}
+            if _POLL_LOG.allow((task_id, "error")):
+                logger.info(f"[MiniMax] {error_msg}，继续重试...")
             # 检查是否超时
             if time.time() - start_time > max_wait_time:
                 error_msg = f"任务轮询超时 ({max_wait_time}秒)，最后一次请求失败: {str(e)}"
                 logger.info(f"[MiniMax] {error_msg}")
                 return {"error": error_msg, "task_id": task_id}
-            # 等待后继续重试
-            time.sleep(poll_interval)
+            # 指数退避后继续重试，服务端给出 Retry-After 时至少等待该时长
+            time.sleep(max(_POLL_POLICY.error_backoff(error_count, poll_interval), _retry_after_of(e) or 0))
             continue
             
         except Exception as e:
+            error_count += 1
             error_msg = f"轮询过程出错: {str(e)}"
-            logger.info(f"[MiniMax] {error_msg}，继续重试...")
+            _RETRY_POLICY.record(e)
+            if _POLL_LOG.allow((task_id, "error")):
+                logger.info(f"[MiniMax] {error_msg}，继续重试...")
             # 检查是否超时
             if time.time() - start_time > max_wait_time:
                 error_msg = f"任务轮询超时 ({max_wait_time}秒)，最后一次请求出错: {str(e)}"
                 logger.info(f"[MiniMax] {error_msg}")
                 return {"error": error_msg, "task_id": task_id}
-            # 等待后继续重试
-            time.sleep(poll_interval)
+            # 指数退避后继续重试，服务端给出 Retry-After 时至少等待该时长
+            time.sleep(max(_POLL_POLICY.error_backoff(error_count, poll_interval), _retry_after_of(e) or 0))
             continue
 
 
-async def _async_poll_video_task(session, task_id, api_key, poll_interval, max_wait_time):
-    """异步轮询视频生成任务结果"""
+async def _async_query_video_task(session, task_id, api_key):
+    """异步查询一次视频生成任务状态"""
     query_url = f"{MINIMAX_API_BASE}/v1/query/video_generation"
     headers = {
         "Authorization": f"Bearer {api_key}" if api_key else ""
     }
     
-    start_time = time.time()
-    
-    while True:
-        try:
-            # 检查是否超时
-            if time.time() - start_time > max_wait_time:
-                error_msg = f"任务轮询超时 ({max_wait_time}秒)"
-                logger.info(f"[MiniMax] {error_msg}")
-                return {"error": error_msg, "task_id": task_id}
-            
-            logger.info(f"[MiniMax] 轮询任务状态: {task_id}")
-            
-            # 查询任务状态
-            async with session.get(query_url, headers=headers, params={"task_id": task_id}) as response:
-                response.raise_for_status()
-                result_data = await response.json()
-            
-            task_status = result_data.get("status", "")
-            logger.info(f"[MiniMax] 任务状态: {task_status}")
-            
-            # 任务完成
-            if task_status == "Success":
-                logger.info(f"[MiniMax] 任务完成成功")
-                return result_data
-            
-            # 任务失败
-            elif task_status == "Fail":
-                error_msg = result_data.get("base_resp", {}).get("status_msg", "任务执行失败")
-                logger.info(f"[MiniMax] 任务执行失败: {error_msg}")
-                return result_data
-            
-            # 继续等待
-            elif task_status in ["Preparing", "Queueing", "Processing"]:
-                await asyncio.sleep(poll_interval)
-                continue
-            
-            # 未知状态
-            else:
-                logger.info(f"[MiniMax] 未知任务状态: {task_status}")
-                return result_data
-                
-        except Exception as e:
-            error_msg = f"轮询过程出错: {str(e)}"
-            logger.info(f"[MiniMax] {error_msg}，继续重试...")
-            # 检查是否超时
-            if time.time() - start_time > max_wait_time:
-                error_msg = f"任务轮询超时 ({max_wait_time}秒)，最后一次请求出错: {str(e)}"
-                logger.info(f"[MiniMax] {error_msg}")
-                return {"error": error_msg, "task_id": task_id}
-            # 等待后继续重试
-            await asyncio.sleep(poll_interval)
-            continue
+    await _get_limiter(api_key).query.acquire_async()
+    with _timed_stage("query"):
+        async with session.get(query_url, headers=headers, params={"task_id": task_id},
+                               timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            result_data = await response.json()
+    _check_base_resp(result_data)
+    return result_data
 
 
-def _get_video_download_url(file_id, api_key):
-    """获取视频下载 URL"""
+# 进程内共享的轮询调度器，所有异步等待都登记到这里
+_POLL_SCHEDULER = _PollScheduler(_async_query_video_task, POLL_MAX_CONCURRENT_QUERIES, _POLL_POLICY)
+
+
+async def _async_poll_video_task(session, task_id, api_key, poll_interval, max_wait_time, profile=None, push=False):
+    """异步等待视频生成任务结果（由共享轮询调度器统一查询，push=True 时主要等待回调推送）"""
+    logger.info(f"[MiniMax] 登记轮询任务: {task_id}")
+    push_interval = max(poll_interval, CALLBACK_SAFETY_POLL_INTERVAL) if push else None
+    return await _POLL_SCHEDULER.wait(session, task_id, api_key, poll_interval, max_wait_time, profile, push_interval)
+
+
+async def _async_prepare_callback(request_data):
+    """启用内嵌回调服务时启动服务并补全 callback_url，返回 (request_data, 是否等待回调推送)
+
+    只有 callback_url 指向本服务（MINIMAX_CALLBACK_PUBLIC_URL）时才等待推送；
+    用户自己的回调地址不会通知到这里，仍按正常间隔轮询。
+    """
+    if not CALLBACK_SERVER_ENABLED or not CALLBACK_PUBLIC_URL:
+        return request_data, False
+    callback_url = request_data.get("callback_url")
+    if callback_url and callback_url != CALLBACK_PUBLIC_URL:
+        return request_data, False
+    if not await _ensure_callback_server(_POLL_SCHEDULER.notify):
+        return request_data, False
+    return dict(request_data, callback_url=_callback_url(CALLBACK_PUBLIC_URL)), True
+
+
+def _get_video_download_url(file_id, api_key, refresh=False):
+    """获取视频下载 URL：优先使用按 file_id 缓存的有效 URL，临近过期时在后台提前重新获取
+
+    refresh=True 时跳过缓存直接重新获取（如缓存的链接下载失败后重新签名）。
+    """
+    if not refresh:
+        download_url, stale = _DOWNLOAD_URL_CACHE.get(file_id)
+        if download_url:
+            if stale and _DOWNLOAD_URL_CACHE.begin_refresh(file_id):
+                threading.Thread(target=_refresh_video_download_url, args=(file_id, api_key),
+                                 name="MiniMaxUrlRefresh", daemon=True).start()
+            return download_url
+    return _fetch_video_download_url(file_id, api_key)
+
+
+def _refresh_video_download_url(file_id, api_key):
+    """后台重新获取临近过期的下载 URL"""
+    try:
+        _fetch_video_download_url(file_id, api_key)
+    finally:
+        _DOWNLOAD_URL_CACHE.end_refresh(file_id)
+
+
+def _fetch_video_download_url(file_id, api_key):
+    """调用 /v1/files/retrieve 获取下载 URL 并写入缓存"""
     retrieve_url = f"{MINIMAX_API_BASE}/v1/files/retrieve"
     headers = {
         "Authorization": f"Bearer {api_key}" if api_key else ""
     }
     
-    try:
-        response = requests.get(retrieve_url, headers=headers, params={"file_id": file_id}, timeout=10)
+    def _get():
+        _get_limiter(api_key).query.acquire()
+        with _timed_stage("retrieve"):
+            response = _get_http_session().get(retrieve_url, headers=headers, params={"file_id": file_id}, timeout=10)
         response.raise_for_status()
         result_data = response.json()
+        _check_base_resp(result_data)
+        return result_data
+    
+    try:
+        # 获取文件信息是幂等的，临时错误时退避重试
+        result_data = _RETRY_POLICY.call(_get, what="获取下载 URL")
         
-        download_url = result_data.get("file", {}).get("download_url", "")
+        file_info = result_data.get("file", {})
+        download_url = file_info.get("download_url", "")
         if download_url:
             logger.info(f"[MiniMax] 获取下载 URL 成功: {download_url}")
+            _DOWNLOAD_URL_CACHE.put(file_id, download_url, file_info.get("bytes", 0))
             return download_url
         else:
             error_msg = "未找到下载 URL"
@@ -256,21 +415,52 @@ def _get_video_download_url(file_id, api_key):
         return None
 
 
-async def _async_get_video_download_url(session, file_id, api_key):
-    """异步获取视频下载 URL"""
+async def _async_get_video_download_url(session, file_id, api_key, refresh=False):
+    """异步获取视频下载 URL：优先使用缓存，临近过期时在包事件循环中后台重新获取"""
+    if not refresh:
+        download_url, stale = _DOWNLOAD_URL_CACHE.get(file_id)
+        if download_url:
+            if stale and _DOWNLOAD_URL_CACHE.begin_refresh(file_id):
+                _submit_coroutine(_async_refresh_video_download_url(file_id, api_key))
+            return download_url
+    return await _async_fetch_video_download_url(session, file_id, api_key)
+
+
+async def _async_refresh_video_download_url(file_id, api_key):
+    """后台重新获取临近过期的下载 URL"""
+    try:
+        session = await _get_client_session()
+        await _async_fetch_video_download_url(session, file_id, api_key)
+    finally:
+        _DOWNLOAD_URL_CACHE.end_refresh(file_id)
+
+
+async def _async_fetch_video_download_url(session, file_id, api_key):
+    """异步调用 /v1/files/retrieve 获取下载 URL 并写入缓存"""
     retrieve_url = f"{MINIMAX_API_BASE}/v1/files/retrieve"
     headers = {
         "Authorization": f"Bearer {api_key}" if api_key else ""
     }
     
+    async def _get():
+        await _get_limiter(api_key).query.acquire_async()
+        with _timed_stage("retrieve"):
+            async with session.get(retrieve_url, headers=headers, params={"file_id": file_id},
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                result_data = await response.json()
+        _check_base_resp(result_data)
+        return result_data
+    
     try:
-        async with session.get(retrieve_url, headers=headers, params={"file_id": file_id}) as response:
-            response.raise_for_status()
-            result_data = await response.json()
+        # 获取文件信息是幂等的，临时错误时退避重试
+        result_data = await _RETRY_POLICY.call_async(_get, what="获取下载 URL")
         
-        download_url = result_data.get("file", {}).get("download_url", "")
+        file_info = result_data.get("file", {})
+        download_url = file_info.get("download_url", "")
         if download_url:
             logger.info(f"[MiniMax] 获取下载 URL 成功: {download_url}")
+            _DOWNLOAD_URL_CACHE.put(file_id, download_url, file_info.get("bytes", 0))
             return download_url
         else:
             error_msg = "未找到下载 URL"
@@ -283,20 +473,208 @@ async def _async_get_video_download_url(session, file_id, api_key):
         return None
 
 
-def _download_video(download_url, timeout=300):
-    """下载视频文件到 BytesIO"""
+def _upload_image(data_uri, api_key):
+    """上传图片到文件接口，返回 file_id"""
+    endpoint = f"{MINIMAX_API_BASE}/v1/files/upload"
+    headers = {
+        "Authorization": f"Bearer {api_key}" if api_key else ""
+    }
+    mime_type, image_bytes = _parse_data_uri(data_uri)
+    files = {"file": (f"image.{mime_type.split('/')[-1]}", image_bytes, mime_type)}
+    
+    def _post():
+        _get_limiter(api_key).query.acquire()
+        with _timed_stage("image_upload") as measure:
+            response = _get_http_session().post(endpoint, headers=headers, data={"purpose": IMAGE_UPLOAD_PURPOSE},
+                                                files=files, timeout=60)
+            measure["bytes"] = len(image_bytes)
+        response.raise_for_status()
+        result_data = response.json()
+        _check_base_resp(result_data)
+        return result_data
+    
+    # 重复上传只会多一个文件，按幂等请求重试
+    result_data = _RETRY_POLICY.call(_post, what="上传图片")
+    
+    base_resp = result_data.get("base_resp", {})
+    if base_resp.get("status_code", 0) != 0:
+        raise _upload_error(base_resp)
+    file_id = result_data.get("file", {}).get("file_id")
+    if not file_id:
+        raise ValueError("上传响应中未找到 file_id")
+    logger.info(f"[MiniMax] 图片上传成功，file_id: {file_id}，大小: {len(image_bytes)} 字节")
+    return str(file_id)
+
+
+async def _async_upload_image(session, data_uri, api_key):
+    """异步上传图片到文件接口，返回 file_id"""
+    endpoint = f"{MINIMAX_API_BASE}/v1/files/upload"
+    headers = {
+        "Authorization": f"Bearer {api_key}" if api_key else ""
+    }
+    mime_type, image_bytes = _parse_data_uri(data_uri)
+    
+    async def _post():
+        # FormData 只能发送一次，每次尝试重新构建
+        form = aiohttp.FormData()
+        form.add_field("purpose", IMAGE_UPLOAD_PURPOSE)
+        form.add_field("file", image_bytes, filename=f"image.{mime_type.split('/')[-1]}", content_type=mime_type)
+        
+        await _get_limiter(api_key).query.acquire_async()
+        with _timed_stage("image_upload") as measure:
+            async with session.post(endpoint, headers=headers, data=form,
+                                    timeout=aiohttp.ClientTimeout(total=60)) as response:
+                response.raise_for_status()
+                result_data = await response.json()
+            measure["bytes"] = len(image_bytes)
+        _check_base_resp(result_data)
+        return result_data
+    
+    # 重复上传只会多一个文件，按幂等请求重试
+    result_data = await _RETRY_POLICY.call_async(_post, what="上传图片")
+    
+    base_resp = result_data.get("base_resp", {})
+    if base_resp.get("status_code", 0) != 0:
+        raise _upload_error(base_resp)
+    file_id = result_data.get("file", {}).get("file_id")
+    if not file_id:
+        raise ValueError("上传响应中未找到 file_id")
+    logger.info(f"[MiniMax] 图片上传成功，file_id: {file_id}，大小: {len(image_bytes)} 字节")
+    return str(file_id)
+
+
+def _resolve_image_url(data_uri, api_key):
+    """获取图片上传后的 URL：缓存中 URL 有效则直接使用，临近过期按 file_id 重新获取，否则上传"""
+    key = _IMAGE_UPLOAD_CACHE.key(data_uri, api_key)
+    file_id, image_url = _IMAGE_UPLOAD_CACHE.get(key)
+    if image_url:
+        return image_url
+    if file_id:
+        image_url = _get_video_download_url(file_id, api_key)
+        if not image_url:
+            # file_id 已失效：丢弃缓存并重新上传
+            _IMAGE_UPLOAD_CACHE.forget(key)
+    if not image_url:
+        file_id = _upload_image(data_uri, api_key)
+        image_url = _get_video_download_url(file_id, api_key)
+    if not image_url:
+        raise ValueError(f"未获取到图片 URL: {file_id}")
+    _IMAGE_UPLOAD_CACHE.put(key, file_id, image_url)
+    return image_url
+
+
+async def _async_resolve_image_url(session, data_uri, api_key):
+    """异步获取图片上传后的 URL"""
+    key = _IMAGE_UPLOAD_CACHE.key(data_uri, api_key)
+    file_id, image_url = _IMAGE_UPLOAD_CACHE.get(key)
+    if image_url:
+        return image_url
+    if file_id:
+        image_url = await _async_get_video_download_url(session, file_id, api_key)
+        if not image_url:
+            # file_id 已失效：丢弃缓存并重新上传
+            _IMAGE_UPLOAD_CACHE.forget(key)
+    if not image_url:
+        file_id = await _async_upload_image(session, data_uri, api_key)
+        image_url = await _async_get_video_download_url(session, file_id, api_key)
+    if not image_url:
+        raise ValueError(f"未获取到图片 URL: {file_id}")
+    _IMAGE_UPLOAD_CACHE.put(key, file_id, image_url)
+    return image_url
+
+
+def _upload_request_images(request_data, api_key):
+    """把请求中较大的内联图片替换为上传后的 URL，上传失败的图片保留内联"""
+    if not _IMAGE_UPLOAD_CACHE.enabled(api_key):
+        return request_data
+    images = _collect_images(request_data)
+    if not images:
+        return request_data
+    image_urls = {}
+    for image in images:
+        try:
+            image_urls[image] = _resolve_image_url(image, api_key)
+        except Exception as e:
+            if _handle_upload_failure(e, api_key):
+                break
+    return _replace_images(request_data, lambda image: image_urls.get(image, image))
+
+
+def _handle_upload_failure(error, api_key):
+    """处理一次图片上传失败：图片被拒绝时只内联这一张返回 False；Key 或服务问题时暂停该 Key 上传并返回 True"""
+    if _is_image_rejection(error):
+        logger.info(f"[MiniMax] 图片被文件接口拒绝，该图片改为内联提交: {str(error)}")
+        return False
+    logger.info(f"[MiniMax] 图片上传失败，暂停该 Key 的上传并改为内联提交: {str(error)}")
+    _IMAGE_UPLOAD_CACHE.disable(api_key)
+    return True
+
+
+async def _async_upload_request_images(session, request_data, api_key):
+    """异步上传请求中较大的内联图片（并发），上传失败的图片保留内联"""
+    if not _IMAGE_UPLOAD_CACHE.enabled(api_key):
+        return request_data
+    images = _collect_images(request_data)
+    if not images:
+        return request_data
+    results = await asyncio.gather(*(_async_resolve_image_url(session, image, api_key) for image in images),
+                                   return_exceptions=True)
+    image_urls = {}
+    backoff = False
+    for image, result in zip(images, results):
+        if isinstance(result, BaseException):
+            # 同一批次多张图片因 Key 问题失败时只记录一次
+            if not backoff:
+                backoff = _handle_upload_failure(result, api_key)
+        else:
+            image_urls[image] = result
+    return _replace_images(request_data, lambda image: image_urls.get(image, image))
+
+
+def _check_content_length(headers, size):
+    """校验下载字节数与 Content-Length 一致（压缩传输时跳过）"""
+    content_length = headers.get("Content-Length")
+    if content_length and not headers.get("Content-Encoding") and int(content_length) != size:
+        raise ValueError(f"下载大小不一致: {size}/{content_length} 字节")
+
+
+@_profiled
+def _download_video(download_url, timeout=300, dest_path=None):
+    """下载视频文件：默认流式写入磁盘并返回文件路径，关闭 DOWNLOAD_TO_DISK 时返回 BytesIO"""
     try:
         logger.info(f"[MiniMax] 开始下载视频: {download_url}")
-        response = requests.get(download_url, timeout=timeout, stream=True)
-        response.raise_for_status()
         
-        video_data = BytesIO()
-        for chunk in response.iter_content(chunk_size=8192):
-            video_data.write(chunk)
+        # 大文件且服务器支持 Range 时分段并行下载，可断点续传
+        if DOWNLOAD_TO_DISK and DOWNLOAD_RANGED:
+            dest_path = dest_path or _download_path()
+            total_size, etag = _probe_range_support(download_url)
+            if total_size and total_size >= DOWNLOAD_RANGED_MIN_SIZE:
+                return _ranged_download(download_url, dest_path, total_size, etag, timeout)
         
-        video_data.seek(0)
-        logger.info(f"[MiniMax] 视频下载完成，大小: {len(video_data.getvalue())} 字节")
-        return video_data
+        with _get_http_session().get(download_url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            
+            if not DOWNLOAD_TO_DISK:
+                video_data = BytesIO()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    video_data.write(chunk)
+                video_data.seek(0)
+                logger.info(f"[MiniMax] 视频下载完成，大小: {video_data.getbuffer().nbytes} 字节")
+                return video_data
+            
+            # 先写入 .part 文件，完成后再原子替换，避免留下不完整的视频
+            dest_path = dest_path or _download_path()
+            part_path = dest_path + ".part"
+            size = 0
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            _check_content_length(response.headers, size)
+        
+        os.replace(part_path, dest_path)
+        logger.info(f"[MiniMax] 视频下载完成，大小: {size} 字节，保存到: {dest_path}")
+        return dest_path
         
     except Exception as e:
         error_msg = f"下载视频失败: {str(e)}"
@@ -304,17 +682,41 @@ def _download_video(download_url, timeout=300):
         return None
 
 
-async def _async_download_video(session, download_url, timeout=300):
-    """异步下载视频文件到 BytesIO"""
+@_profiled
+async def _async_download_video(session, download_url, timeout=300, dest_path=None):
+    """异步下载视频文件：默认流式写入磁盘并返回文件路径，关闭 DOWNLOAD_TO_DISK 时返回 BytesIO"""
+    # 分段并行下载复用同步路径的连接池，在线程池中执行，不阻塞事件循环
+    if DOWNLOAD_TO_DISK and DOWNLOAD_RANGED:
+        loop = asyncio.get_running_loop()
+        # 复制上下文，指标追踪与采样决定随之进入线程池
+        return await loop.run_in_executor(None, contextvars.copy_context().run, _download_video, download_url, timeout, dest_path)
+    
     try:
         logger.info(f"[MiniMax] 开始下载视频: {download_url}")
         async with session.get(download_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
             response.raise_for_status()
-            video_data = BytesIO(await response.read())
+            
+            if not DOWNLOAD_TO_DISK:
+                video_data = BytesIO()
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    video_data.write(chunk)
+                video_data.seek(0)
+                logger.info(f"[MiniMax] 视频下载完成，大小: {video_data.getbuffer().nbytes} 字节")
+                return video_data
+            
+            # 先写入 .part 文件，完成后再原子替换，避免留下不完整的视频
+            dest_path = dest_path or _download_path()
+            part_path = dest_path + ".part"
+            size = 0
+            with open(part_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            _check_content_length(response.headers, size)
         
-        video_data.seek(0)
-        logger.info(f"[MiniMax] 视频下载完成，大小: {len(video_data.getvalue())} 字节")
-        return video_data
+        os.replace(part_path, dest_path)
+        logger.info(f"[MiniMax] 视频下载完成，大小: {size} 字节，保存到: {dest_path}")
+        return dest_path
         
     except Exception as e:
         error_msg = f"下载视频失败: {str(e)}"
@@ -322,85 +724,372 @@ async def _async_download_video(session, download_url, timeout=300):
         return None
 
 
-def _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video=False):
-    """创建视频生成任务并轮询结果，最后获取下载 URL，可选择下载视频"""
-    endpoint = f"{MINIMAX_API_BASE}/v1/video_generation"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}" if api_key else ""
+def _download_video_resigned(file_id, api_key, download_url):
+    """下载视频并记录指标；链接失效导致下载失败时按 file_id 重新签名再下载一次
+
+    返回 (video_data, 实际使用的 download_url)。
+    """
+    dest_path = _download_path(file_id)
+    # 同一 file_id 同时只有一个下载写 .part 文件；排在后面的直接复用已下载完成的文件
+    with _DOWNLOAD_LOCKS.hold(dest_path):
+        if DOWNLOAD_TO_DISK and os.path.exists(dest_path):
+            logger.info(f"[MiniMax] 复用已下载的视频: {dest_path}")
+            return dest_path, download_url
+        download_started = time.perf_counter()
+        video_data = _download_video(download_url, dest_path=dest_path)
+        _record_video_download(video_data, time.perf_counter() - download_started)
+        if video_data or not file_id:
+            return video_data, download_url
+        fresh_url = _get_video_download_url(file_id, api_key, refresh=True)
+        if not fresh_url or fresh_url == download_url:
+            return None, download_url
+        logger.info(f"[MiniMax] 下载失败，已重新签名下载 URL 后重试: {file_id}")
+        download_started = time.perf_counter()
+        video_data = _download_video(fresh_url, dest_path=dest_path)
+        _record_video_download(video_data, time.perf_counter() - download_started)
+        return video_data, fresh_url
+
+
+async def _async_download_video_resigned(session, file_id, api_key, download_url):
+    """异步下载视频；链接失效导致下载失败时按 file_id 重新签名再下载一次"""
+    dest_path = _download_path(file_id)
+    async with _DOWNLOAD_LOCKS.hold_async(dest_path):
+        if DOWNLOAD_TO_DISK and os.path.exists(dest_path):
+            logger.info(f"[MiniMax] 复用已下载的视频: {dest_path}")
+            return dest_path, download_url
+        download_started = time.perf_counter()
+        video_data = await _async_download_video(session, download_url, dest_path=dest_path)
+        _record_video_download(video_data, time.perf_counter() - download_started)
+        if video_data or not file_id:
+            return video_data, download_url
+        fresh_url = await _async_get_video_download_url(session, file_id, api_key, refresh=True)
+        if not fresh_url or fresh_url == download_url:
+            return None, download_url
+        logger.info(f"[MiniMax] 下载失败，已重新签名下载 URL 后重试: {file_id}")
+        download_started = time.perf_counter()
+        video_data = await _async_download_video(session, fresh_url, dest_path=dest_path)
+        _record_video_download(video_data, time.perf_counter() - download_started)
+        return video_data, fresh_url
+
+
+def _record_video_download(video_data, seconds):
+    """记录一次成功下载的字节数与吞吐"""
+    if isinstance(video_data, str):
+        _record_download(os.path.getsize(video_data), seconds)
+    elif video_data is not None:
+        _record_download(video_data.getbuffer().nbytes, seconds)
+
+
+def _callback_pending_result(task_id, request_data):
+    """跳过轮询时返回的结果：任务已提交，完成状态将推送到 callback_url"""
+    logger.info(f"[MiniMax] 已配置 callback_url，跳过轮询: {task_id}")
+    return {
+        "task_id": task_id,
+        "status": "Submitted",
+        "callback_url": request_data.get("callback_url", "")
     }
+
+
+def _submit_video_task(request_data, api_key, reassign=False):
+    """提交视频生成任务，返回 (task_id, None, 实际使用的 api_key)；接口返回错误时返回 (None, 错误结果, api_key)
+
+    reassign=True 表示 api_key 是从 Key 池分配的：某次尝试让它被暂停（如 429）后，重试换用池中的其他 Key。
+    """
+    endpoint = f"{MINIMAX_API_BASE}/v1/video_generation"
     
-    try:
-        logger.info(f"[MiniMax] 发送请求到: {endpoint}, 请求数据: {json.dumps(request_data, ensure_ascii=False)}")
-        
-        # 提交任务
-        response = requests.post(endpoint, headers=headers, json=request_data, timeout=30)
+    logger.info("[MiniMax] 发送请求到: %s, 请求数据: %s", endpoint, _LazyJson(request_data))
+    
+    def _post():
+        nonlocal api_key
+        if reassign and _KEY_POOL.is_ejected(api_key):
+            api_key = _KEY_POOL.select()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}" if api_key else ""
+        }
+        # 提交任务（按 api_key 限流）
+        _get_limiter(api_key).submit.acquire()
+        with _timed_stage("submit"):
+            response = _get_http_session().post(endpoint, headers=headers, json=request_data, timeout=30)
+        _KEY_POOL.report_http_status(api_key, response.status_code)
         response.raise_for_status()
         response_data = response.json()
+        # 在重试之前报告给 Key 池：限流/额度错误码会暂停当前 Key，下一次尝试即可换用其它 Key
+        base_resp = response_data.get("base_resp") or {}
+        _KEY_POOL.report_status(api_key, base_resp.get("status_code"), base_resp.get("status_msg", ""))
+        _check_base_resp(response_data)
+        return response_data
+    
+    # 提交不是幂等的：只在确定服务端未受理时重试（连接失败、429/503、限流等临时错误码）
+    try:
+        response_data = _RETRY_POLICY.call(_post, idempotent=False, what="提交任务")
+    except _RetryableError as e:
+        if e.response_data is None:
+            raise
+        response_data = e.response_data
+    
+    logger.info("[MiniMax] 请求成功: %s", _LazyJson(response_data))
+    
+    # 检查响应状态
+    base_resp = response_data.get("base_resp", {})
+    status_code = base_resp.get("status_code", -1)
+    
+    if status_code != 0:
+        error_msg = base_resp.get("status_msg", "请求失败")
+        logger.info(f"[MiniMax] 请求失败: {error_msg}")
+        return None, {"error": error_msg, "base_resp": base_resp}, api_key
+    
+    # 获取 task_id
+    task_id = response_data.get("task_id", "")
+    if not task_id:
+        error_msg = "未获取到 task_id"
+        logger.info(f"[MiniMax] {error_msg}")
+        return None, {"error": error_msg}, api_key
+    
+    logger.info(f"[MiniMax] 获取到任务ID: {task_id}")
+    return task_id, None, api_key
+
+
+async def _async_submit_video_task(session, request_data, api_key, reassign=False):
+    """异步提交视频生成任务，返回值与 reassign 的含义同 _submit_video_task"""
+    endpoint = f"{MINIMAX_API_BASE}/v1/video_generation"
+    
+    logger.info("[MiniMax] 发送请求到: %s, 请求数据: %s", endpoint, _LazyJson(request_data))
+    
+    async def _post():
+        nonlocal api_key
+        if reassign and _KEY_POOL.is_ejected(api_key):
+            api_key = _KEY_POOL.select()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}" if api_key else ""
+        }
+        # 提交任务（按 api_key 限流）
+        await _get_limiter(api_key).submit.acquire_async()
+        with _timed_stage("submit"):
+            async with session.post(endpoint, headers=headers, json=request_data,
+                                    timeout=aiohttp.ClientTimeout(total=30)) as response:
+                if response.status != 200:
+                    _KEY_POOL.report_http_status(api_key, response.status)
+                    response_text = await response.text()
+                    if response.status in _REJECTED_HTTP_STATUSES:
+                        raise _RetryableError(f"API 请求失败: {response.status} {response_text}",
+                                              _parse_retry_after(response.headers.get("Retry-After")))
+                    raise ValueError(f"API 请求失败: {response.status} {response_text}")
+                response_data = await response.json()
+        # 在重试之前报告给 Key 池：限流/额度错误码会暂停当前 Key，下一次尝试即可换用其它 Key
+        base_resp = response_data.get("base_resp") or {}
+        _KEY_POOL.report_status(api_key, base_resp.get("status_code"), base_resp.get("status_msg", ""))
+        _check_base_resp(response_data)
+        return response_data
+    
+    # 提交不是幂等的：只在确定服务端未受理时重试（连接失败、429/503、限流等临时错误码）
+    try:
+        response_data = await _RETRY_POLICY.call_async(_post, idempotent=False, what="提交任务")
+    except _RetryableError as e:
+        if e.response_data is None:
+            raise
+        response_data = e.response_data
+    
+    logger.info("[MiniMax] 请求成功: %s", _LazyJson(response_data))
+    
+    # 检查响应状态
+    base_resp = response_data.get("base_resp", {})
+    status_code = base_resp.get("status_code", -1)
+    
+    if status_code != 0:
+        error_msg = base_resp.get("status_msg", "请求失败")
+        logger.info(f"[MiniMax] 请求失败: {error_msg}")
+        return None, {"error": error_msg, "base_resp": base_resp}, api_key
+    
+    # 获取 task_id
+    task_id = response_data.get("task_id", "")
+    if not task_id:
+        error_msg = "未获取到 task_id"
+        logger.info(f"[MiniMax] {error_msg}")
+        return None, {"error": error_msg}, api_key
+    
+    logger.info(f"[MiniMax] 获取到任务ID: {task_id}")
+    return task_id, None, api_key
+
+
+def _collect_video_task(task_id, api_key, poll_interval, max_wait_time, download_video=False, profile=None):
+    """轮询已提交的任务直到结束，获取下载 URL，可选择下载视频"""
+    # 轮询任务状态
+    with _TASK_JOURNAL.waiting(task_id):
+        task_result = _poll_video_task(task_id, api_key, poll_interval, max_wait_time, profile)
+    _TASK_JOURNAL.update(task_id, task_result, collected=True)
+    
+    # 检查是否有错误
+    if "error" in task_result:
+        return task_result, None
+    
+    # 检查任务状态
+    if task_result.get("status") != "Success":
+        return task_result, None
+    
+    # 获取 file_id
+    file_id = task_result.get("file_id", "")
+    if not file_id:
+        error_msg = "未获取到 file_id"
+        logger.info(f"[MiniMax] {error_msg}")
+        return {"error": error_msg, "task_result": task_result}, None
+    
+    # 获取下载 URL
+    download_url = _get_video_download_url(file_id, api_key)
+    if not download_url:
+        return {"error": "获取下载 URL 失败", "task_result": task_result, "file_id": file_id}, None
+    
+    # 返回完整结果
+    result = {
+        "task_id": task_id,
+        "file_id": file_id,
+        "download_url": download_url,
+        "status": "Success",
+        "task_result": task_result
+    }
+    
+    # 如果需要下载视频
+    video_object = None
+    if download_video:
+        video_data, download_url = _download_video_resigned(file_id, api_key, download_url)
+        result["download_url"] = download_url
+        if isinstance(video_data, str):
+            result["video_path"] = video_data
+        if video_data and VIDEO_FROM_FILE_AVAILABLE:
+            video_object = VideoFromFile(video_data)
+        elif video_data:
+            # 如果 VideoFromFile 不可用，返回 URL
+            video_object = download_url
+    
+    return result, video_object
+
+
+async def _async_collect_video_task(session, task_id, api_key, poll_interval, max_wait_time, download_video=False, profile=None, push=False):
+    """异步轮询已提交的任务直到结束，获取下载 URL，可选择下载视频"""
+    # 轮询任务状态
+    with _TASK_JOURNAL.waiting(task_id):
+        task_result = await _async_poll_video_task(session, task_id, api_key, poll_interval, max_wait_time, profile, push)
+    _TASK_JOURNAL.update(task_id, task_result, collected=True)
+    
+    # 检查是否有错误
+    if "error" in task_result:
+        return task_result, None
+    
+    # 检查任务状态
+    if task_result.get("status") != "Success":
+        return task_result, None
+    
+    # 获取 file_id
+    file_id = task_result.get("file_id", "")
+    if not file_id:
+        error_msg = "未获取到 file_id"
+        logger.info(f"[MiniMax] {error_msg}")
+        return {"error": error_msg, "task_result": task_result}, None
+    
+    # 获取下载 URL
+    download_url = await _async_get_video_download_url(session, file_id, api_key)
+    if not download_url:
+        return {"error": "获取下载 URL 失败", "task_result": task_result, "file_id": file_id}, None
+    
+    # 返回完整结果
+    result = {
+        "task_id": task_id,
+        "file_id": file_id,
+        "download_url": download_url,
+        "status": "Success",
+        "task_result": task_result
+    }
+    
+    # 如果需要下载视频
+    video_object = None
+    if download_video:
+        video_data, download_url = await _async_download_video_resigned(session, file_id, api_key, download_url)
+        result["download_url"] = download_url
+        if isinstance(video_data, str):
+            result["video_path"] = video_data
+        if video_data and VIDEO_FROM_FILE_AVAILABLE:
+            video_object = VideoFromFile(video_data)
+        elif video_data:
+            # 如果 VideoFromFile 不可用，返回 URL
+            video_object = download_url
+    
+    return result, video_object
+
+
+def _claim_or_assign_key(fingerprint, api_key):
+    """返回 (可接管的 task_id 或 None, 使用的 api_key)；节点未填写 api_key 时从 Key 池分配"""
+    for candidate in _KEY_POOL.candidates(api_key):
+        task_id = _TASK_JOURNAL.claim(fingerprint, candidate)
+        if task_id:
+            return task_id, candidate
+    return None, _KEY_POOL.resolve(api_key)
+
+
+@contextmanager
+def _task_slot(api_key, acquire=True):
+    """等待任务期间占用该 Key 的在途名额（排队获取）；acquire=False 时名额已由其它路径持有，不再占用"""
+    limiter = _get_limiter(api_key) if acquire else None
+    if limiter is not None:
+        limiter.acquire_task()
+    try:
+        yield
+    finally:
+        if limiter is not None:
+            limiter.release_task()
+
+
+@asynccontextmanager
+async def _async_task_slot(api_key, acquire=True):
+    """_task_slot 的异步版本"""
+    limiter = _get_limiter(api_key) if acquire else None
+    if limiter is not None:
+        await limiter.acquire_task_async()
+    try:
+        yield
+    finally:
+        if limiter is not None:
+            limiter.release_task()
+
+
+@_profiled
+def _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video=False):
+    """创建视频生成任务并轮询结果，最后获取下载 URL，可选择下载视频"""
+    fingerprint = _request_cache_key(request_data)
+    profile = _poll_profile(request_data)
+    
+    # 上一个进程提交了相同请求但未取回结果时直接接管（沿用创建它的 Key），避免重复付费生成
+    reassign = _KEY_POOL.enabled() and not (api_key and api_key.strip())
+    task_id, api_key = _claim_or_assign_key(fingerprint, api_key)
+    
+    # 同一 api_key 同时在途的任务数达到上限时按先后顺序排队
+    limiter = _get_limiter(api_key)
+    limiter.acquire_task()
+    try:
+        if task_id:
+            logger.info(f"[MiniMax] 接管未完成的任务: {task_id}")
+            return _collect_video_task(task_id, api_key, poll_interval, max_wait_time, download_video, profile)
         
-        logger.info(f"[MiniMax] 请求成功: {json.dumps(response_data, ensure_ascii=False)}")
-        
-        # 检查响应状态
-        base_resp = response_data.get("base_resp", {})
-        status_code = base_resp.get("status_code", -1)
-        
-        if status_code != 0:
-            error_msg = base_resp.get("status_msg", "请求失败")
-            logger.info(f"[MiniMax] 请求失败: {error_msg}")
-            return {"error": error_msg, "base_resp": base_resp}, None
-        
-        # 获取 task_id
-        task_id = response_data.get("task_id", "")
-        if not task_id:
-            error_msg = "未获取到 task_id"
-            logger.info(f"[MiniMax] {error_msg}")
-            return {"error": error_msg}, None
-        
-        logger.info(f"[MiniMax] 获取到任务ID: {task_id}")
-        
-        # 轮询任务状态
-        task_result = _poll_video_task(task_id, api_key, poll_interval, max_wait_time)
-        
-        # 检查是否有错误
-        if "error" in task_result:
-            return task_result, None
-        
-        # 检查任务状态
-        if task_result.get("status") != "Success":
-            return task_result, None
-        
-        # 获取 file_id
-        file_id = task_result.get("file_id", "")
-        if not file_id:
-            error_msg = "未获取到 file_id"
-            logger.info(f"[MiniMax] {error_msg}")
-            return {"error": error_msg, "task_result": task_result}, None
+        # 较大的图片先上传，请求体中只携带 URL
+        request_data = _upload_request_images(request_data, api_key)
         
-        # 获取下载 URL
-        download_url = _get_video_download_url(file_id, api_key)
-        if not download_url:
-            return {"error": "获取下载 URL 失败", "task_result": task_result, "file_id": file_id}, None
-        
-        # 返回完整结果
-        result = {
-            "task_id": task_id,
-            "file_id": file_id,
-            "download_url": download_url,
-            "status": "Success",
-            "task_result": task_result
-        }
+        task_id, error_result, submit_key = _submit_video_task(request_data, api_key, reassign)
+        if submit_key != api_key:
+            # 提交时换用了池中另一个 Key：在途名额随之转移，之后的轮询与下载都使用该 Key
+            new_limiter = _get_limiter(submit_key)
+            new_limiter.acquire_task()
+            limiter.release_task()
+            limiter, api_key = new_limiter, submit_key
+        if error_result is not None:
+            return error_result, None
+        _TASK_JOURNAL.record_submit(task_id, fingerprint, api_key, profile)
         
-        # 如果需要下载视频
-        video_object = None
-        if download_video:
-            video_data = _download_video(download_url)
-            if video_data and VIDEO_FROM_FILE_AVAILABLE:
-                video_object = VideoFromFile(video_data)
-            elif video_data:
-                # 如果 VideoFromFile 不可用，返回 URL
-                video_object = download_url
+        # 配置了回调且要求跳过轮询时，提交后立即返回
+        if CALLBACK_SKIP_POLL and request_data.get("callback_url"):
+            _TASK_JOURNAL.mark_collected(task_id)
+            return _callback_pending_result(task_id, request_data), None
         
-        return result, video_object
+        return _collect_video_task(task_id, api_key, poll_interval, max_wait_time, download_video, profile)
         
     except requests.exceptions.RequestException as e:
         error_msg = f"API 请求失败: {str(e)}"
@@ -411,94 +1100,541 @@ def _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_t
         error_msg = f"未知错误: {str(e)}"
         logger.info(f"[MiniMax] {error_msg}")
         return {"error": error_msg}, None
+        
+    finally:
+        limiter.release_task()
 
 
+@_profiled
 async def _async_create_and_poll_video_task(session, request_data, api_key, poll_interval, max_wait_time, download_video=False):
     """异步创建视频生成任务并轮询结果，最后获取下载 URL，可选择下载视频"""
-    endpoint = f"{MINIMAX_API_BASE}/v1/video_generation"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}" if api_key else ""
-    }
+    fingerprint = _request_cache_key(request_data)
+    profile = _poll_profile(request_data)
+    
+    # 上一个进程提交了相同请求但未取回结果时直接接管（沿用创建它的 Key），避免重复付费生成
+    reassign = _KEY_POOL.enabled() and not (api_key and api_key.strip())
+    task_id, api_key = _claim_or_assign_key(fingerprint, api_key)
     
+    # 同一 api_key 同时在途的任务数达到上限时按先后顺序排队
+    limiter = _get_limiter(api_key)
+    await limiter.acquire_task_async()
     try:
-        logger.info(f"[MiniMax] 发送请求到: {endpoint}, 请求数据: {json.dumps(request_data, ensure_ascii=False)}")
-        
-        # 提交任务
-        async with session.post(endpoint, headers=headers, json=request_data) as response:
-            if response.status != 200:
-                response_text = await response.text()
-                raise ValueError(f"API 请求失败: {response.status} {response_text}")
-            response_data = await response.json()
-        
-        logger.info(f"[MiniMax] 请求成功: {json.dumps(response_data, ensure_ascii=False)}")
-        
-        # 检查响应状态
-        base_resp = response_data.get("base_resp", {})
-        status_code = base_resp.get("status_code", -1)
-        
-        if status_code != 0:
-            error_msg = base_resp.get("status_msg", "请求失败")
-            logger.info(f"[MiniMax] 请求失败: {error_msg}")
-            return {"error": error_msg, "base_resp": base_resp}, None
-        
-        # 获取 task_id
-        task_id = response_data.get("task_id", "")
-        if not task_id:
-            error_msg = "未获取到 task_id"
-            logger.info(f"[MiniMax] {error_msg}")
-            return {"error": error_msg}, None
+        if task_id:
+            logger.info(f"[MiniMax] 接管未完成的任务: {task_id}")
+            return await _async_collect_video_task(session, task_id, api_key, poll_interval, max_wait_time, download_video, profile)
         
-        logger.info(f"[MiniMax] 获取到任务ID: {task_id}")
+        # 启用回调服务时由推送唤醒，轮询只作为兜底
+        request_data, push = await _async_prepare_callback(request_data)
         
-        # 轮询任务状态
-        task_result = await _async_poll_video_task(session, task_id, api_key, poll_interval, max_wait_time)
+        # 较大的图片先上传，请求体中只携带 URL
+        request_data = await _async_upload_request_images(session, request_data, api_key)
         
-        # 检查是否有错误
-        if "error" in task_result:
-            return task_result, None
+        task_id, error_result, submit_key = await _async_submit_video_task(session, request_data, api_key, reassign)
+        if submit_key != api_key:
+            # 提交时换用了池中另一个 Key：在途名额随之转移，之后的轮询与下载都使用该 Key
+            new_limiter = _get_limiter(submit_key)
+            await new_limiter.acquire_task_async()
+            limiter.release_task()
+            limiter, api_key = new_limiter, submit_key
+        if error_result is not None:
+            return error_result, None
+        _TASK_JOURNAL.record_submit(task_id, fingerprint, api_key, profile)
         
-        # 检查任务状态
-        if task_result.get("status") != "Success":
-            return task_result, None
+        # 配置了回调且要求跳过轮询时，提交后立即返回
+        if CALLBACK_SKIP_POLL and request_data.get("callback_url") and not push:
+            _TASK_JOURNAL.mark_collected(task_id)
+            return _callback_pending_result(task_id, request_data), None
         
-        # 获取 file_id
-        file_id = task_result.get("file_id", "")
-        if not file_id:
-            error_msg = "未获取到 file_id"
-            logger.info(f"[MiniMax] {error_msg}")
-            return {"error": error_msg, "task_result": task_result}, None
+        return await _async_collect_video_task(session, task_id, api_key, poll_interval, max_wait_time, download_video, profile, push)
         
-        # 获取下载 URL
-        download_url = await _async_get_video_download_url(session, file_id, api_key)
+    except Exception as e:
+        error_msg = f"未知错误: {str(e)}"
+        logger.info(f"[MiniMax] {error_msg}")
+        return {"error": error_msg}, None
+        
+    finally:
+        limiter.release_task()
+
+
+async def _async_generate_video(request_data, api_key, poll_interval, max_wait_time, download_video=False):
+    """在包事件循环中使用共享会话执行完整的生成流程"""
+    session = await _get_client_session()
+    return await _async_create_and_poll_video_task(session, request_data, api_key, poll_interval, max_wait_time, download_video)
+
+
+def _lookup_cached_result(request_data, api_key, download_video, cache_mode):
+    """按 cache_mode 查找结果缓存，返回 (缓存键, 命中时的 (result, video_object) 或 None)"""
+    if cache_mode == "bypass":
+        return None, None
+    key = _request_cache_key(request_data)
+    if cache_mode != "use":
+        return key, None
+    return key, _cached_outcome(key, api_key, download_video)
+
+
+def _cached_outcome(key, api_key, download_video):
+    """按缓存键取出缓存结果，返回 (result, video_object)；未命中或无法使用时返回 None"""
+    entry = _RESULT_CACHE.get(key)
+    if entry is None:
+        return None
+    
+    result = dict(entry["result"])
+    file_id = entry.get("file_id", "")
+    download_url = entry.get("download_url", "")
+    # 文件只能由创建任务的 Key 获取
+    task_key = _KEY_POOL.owner_key(entry.get("key_hash", ""), api_key)
+    
+    # 签名 URL 已过期：用 file_id 重新获取
+    if entry.get("url_expires_at", 0) <= time.time():
+        download_url = _get_video_download_url(file_id, task_key) if file_id else None
         if not download_url:
-            return {"error": "获取下载 URL 失败", "task_result": task_result, "file_id": file_id}, None
-        
-        # 返回完整结果
-        result = {
-            "task_id": task_id,
-            "file_id": file_id,
-            "download_url": download_url,
-            "status": "Success",
-            "task_result": task_result
+            logger.info(f"[MiniMax] 缓存的下载 URL 已过期且无法刷新，重新生成")
+            return None
+        _RESULT_CACHE.update_download_url(key, download_url)
+        result["download_url"] = download_url
+    
+    video_object = None
+    if download_video:
+        video_path = entry.get("video_path", "")
+        if not video_path:
+            # 缓存中没有视频文件：按缓存的 URL 下载一次
+            video_data, fresh_url = _download_video_resigned(file_id, task_key, download_url)
+            if not video_data:
+                return None
+            if fresh_url != download_url:
+                download_url = fresh_url
+                _RESULT_CACHE.update_download_url(key, download_url)
+                result["download_url"] = download_url
+            if isinstance(video_data, str):
+                video_path = video_data
+                _RESULT_CACHE.put(key, result, video_path, entry.get("key_hash", ""))
+            elif VIDEO_FROM_FILE_AVAILABLE:
+                video_object = VideoFromFile(video_data)
+        if video_path:
+            result["video_path"] = video_path
+            video_object = VideoFromFile(video_path) if VIDEO_FROM_FILE_AVAILABLE else download_url
+        elif video_object is None:
+            video_object = download_url
+    
+    result["cache_hit"] = True
+    logger.info(f"[MiniMax] 命中结果缓存: task_id={result.get('task_id', '')}")
+    return result, video_object
+
+
+def _cached_task_key(cache_key, api_key):
+    """缓存结果对应任务的创建 Key"""
+    entry = _RESULT_CACHE.get(cache_key)
+    return _KEY_POOL.owner_key(entry.get("key_hash", "") if entry else "", api_key)
+
+
+def _store_cached_result(cache_key, result, api_key=None):
+    """生成成功后写入结果缓存，连同创建任务的 Key 的哈希（未知时从任务日志查找）"""
+    if cache_key and isinstance(result, dict) and "error" not in result:
+        if api_key and api_key.strip():
+            key_hash = _key_hash(api_key)
+        else:
+            key_hash = _TASK_JOURNAL.key_hash_of(result.get("task_id", ""))
+        _RESULT_CACHE.put(cache_key, result, result.get("video_path"), key_hash)
+
+
+def _attach_metrics(result):
+    """开启 MINIMAX_METRICS_IN_RESPONSE 时返回附加了本次节点执行分阶段指标的结果副本"""
+    trace = _current_trace()
+    if not METRICS_IN_RESPONSE or trace is None or not isinstance(result, dict):
+        return result
+    return dict(result, metrics=trace.to_dict())
+
+
+def _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video=False, cache_mode="use"):
+    """按执行模式创建任务并等待结果：默认在共享事件循环上走 aiohttp 路径，sync 模式走 requests 路径"""
+    cache_key, cached = _lookup_cached_result(request_data, api_key, download_video, cache_mode)
+    if cached is not None:
+        return _attach_metrics(cached[0]), cached[1]
+    
+    if EXECUTION_MODE == "sync":
+        outcome = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+    else:
+        # 当前线程只等待 Future，轮询与下载都在共享事件循环中进行
+        outcome = _run_coroutine(_async_generate_video(request_data, api_key, poll_interval, max_wait_time, download_video),
+                                 max_wait_time + RUN_TIMEOUT_MARGIN)
+    
+    _store_cached_result(cache_key, outcome[0], api_key)
+    return _attach_metrics(outcome[0]), outcome[1]
+
+
+async def _async_generate_video_batch(request_list, api_key, poll_interval, max_wait_time, download_video=False, max_concurrency=8):
+    """并发提交并等待多个生成任务，以信号量限制同时在途的任务数，结果按输入顺序返回"""
+    session = await _get_client_session()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def _run_one(index, request_data):
+        async with semaphore:
+            logger.info(f"[MiniMax Batch] 开始第 {index + 1}/{len(request_list)} 个任务")
+            return await _async_create_and_poll_video_task(session, request_data, api_key, poll_interval, max_wait_time, download_video)
+    
+    return await asyncio.gather(*[_run_one(i, r) for i, r in enumerate(request_list)])
+
+
+def _generate_video_batch(request_list, api_key, poll_interval, max_wait_time, download_video=False, max_concurrency=8, cache_mode="use"):
+    """按执行模式批量生成视频：async 模式在共享事件循环中并发，sync 模式使用线程池；命中缓存的项不再提交"""
+    outcomes = [None] * len(request_list)
+    cache_keys = [None] * len(request_list)
+    for i, request_data in enumerate(request_list):
+        cache_keys[i], outcomes[i] = _lookup_cached_result(request_data, api_key, download_video, cache_mode)
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    pending_requests = [request_list[i] for i in pending]
+    
+    if not pending_requests:
+        generated = []
+    elif EXECUTION_MODE == "sync":
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = [
+                # 每个任务复制一份上下文，指标追踪随之进入线程池
+                executor.submit(contextvars.copy_context().run, _create_and_poll_video_task, r, api_key, poll_interval, max_wait_time, download_video)
+                for r in pending_requests
+            ]
+            generated = [f.result() for f in futures]
+    else:
+        # 超过并发上限的任务分批执行，等待上限按批数放宽
+        rounds = -(-len(pending_requests) // max(1, max_concurrency))
+        generated = _run_coroutine(_async_generate_video_batch(pending_requests, api_key, poll_interval, max_wait_time, download_video, max_concurrency),
+                                   rounds * max_wait_time + RUN_TIMEOUT_MARGIN)
+    
+    for i, outcome in zip(pending, generated):
+        _store_cached_result(cache_keys[i], outcome[0], api_key)
+        outcomes[i] = outcome
+    return outcomes
+
+
+def _task_handle(task_id, api_key, profile, cache_key=None, mode="", push=False, error=None, cached=False, watched=False):
+    """MiniMaxSubmit 输出的任务句柄（MINIMAX_TASK），只在节点之间传递，不写入 JSON 输出
+
+    watched=True 表示任务的在途名额由后台等待持有（见 _async_release_when_done），Collect 不再占用。
+    """
+    return {
+        "task_id": task_id or "",
+        "api_key": api_key,
+        "profile": profile,
+        "cache_key": cache_key,
+        "mode": mode,
+        "push": push,
+        "error": error,
+        "cached": cached,
+        "watched": watched,
+        "submitted_at": time.time(),
+    }
+
+
+def _task_handle_summary(handle):
+    """任务句柄中可以公开的字段"""
+    summary = {"task_id": handle["task_id"], "mode": handle.get("mode", "")}
+    if handle.get("cached"):
+        summary["cache_hit"] = True
+    if handle.get("error"):
+        summary["error"] = handle["error"].get("error", "")
+    return summary
+
+
+def _submit_only(request_data, api_key, cache_mode="use", mode=""):
+    """只提交任务、不等待结果，返回任务句柄；命中结果缓存或可接管未完成的相同任务时不再提交"""
+    cache_key, cached = _lookup_cached_result(request_data, api_key, False, cache_mode)
+    profile = _poll_profile(request_data)
+    if cached is not None:
+        return _task_handle(cached[0].get("task_id", ""), _cached_task_key(cache_key, api_key), profile, cache_key, mode, cached=True)
+    
+    fingerprint = _request_cache_key(request_data)
+    reassign = _KEY_POOL.enabled() and not (api_key and api_key.strip())
+    task_id, api_key = _claim_or_assign_key(fingerprint, api_key)
+    if task_id:
+        logger.info(f"[MiniMax] 接管未完成的任务: {task_id}")
+        return _task_handle(task_id, api_key, profile, cache_key, mode)
+    
+    # 提交的任务在被 Collect 之前一直占用该 Key 的在途名额，与其它节点共用同一上限
+    limiter = _get_limiter(api_key)
+    limiter.acquire_task()
+    try:
+        if EXECUTION_MODE == "sync":
+            # 较大的图片先上传，请求体中只携带 URL
+            request_data = _upload_request_images(request_data, api_key)
+            push = False
+            task_id, error_result, submit_key = _submit_video_task(request_data, api_key, reassign)
+        else:
+            request_data, push, task_id, error_result, submit_key = _run_coroutine(_async_submit_only(request_data, api_key, reassign), RUN_TIMEOUT_MARGIN)
+    except Exception as e:
+        limiter.release_task()
+        error_msg = f"API 请求失败: {str(e)}"
+        logger.info(f"[MiniMax] {error_msg}")
+        return _task_handle("", api_key, profile, cache_key, mode, error={"error": error_msg})
+    
+    if submit_key != api_key:
+        # 提交时换用了池中另一个 Key：在途名额随之转移
+        new_limiter = _get_limiter(submit_key)
+        new_limiter.acquire_task()
+        limiter.release_task()
+        limiter, api_key = new_limiter, submit_key
+    if error_result is not None:
+        limiter.release_task()
+        return _task_handle("", api_key, profile, cache_key, mode, error=error_result)
+    _TASK_JOURNAL.record_submit(task_id, fingerprint, api_key, profile)
+    _submit_coroutine(_async_release_when_done(task_id, api_key, profile, push))
+    return _task_handle(task_id, api_key, profile, cache_key, mode, push, watched=True)
+
+
+async def _async_submit_only(request_data, api_key, reassign=False):
+    """在包事件循环中上传图片并提交任务，返回 (request_data, 是否等待回调推送, task_id, 错误结果, 实际使用的 api_key)"""
+    session = await _get_client_session()
+    request_data, push = await _async_prepare_callback(request_data)
+    request_data = await _async_upload_request_images(session, request_data, api_key)
+    task_id, error_result, api_key = await _async_submit_video_task(session, request_data, api_key, reassign)
+    return request_data, push, task_id, error_result, api_key
+
+
+async def _async_release_when_done(task_id, api_key, profile, push):
+    """在后台等待 MiniMaxSubmit 提交的任务结束（最多 TASK_SLOT_HOLD_SECONDS 秒），之后归还它占用的在途名额"""
+    try:
+        session = await _get_client_session()
+        task_result = await _async_poll_video_task(session, task_id, api_key, 3, TASK_SLOT_HOLD_SECONDS, profile, push)
+        _TASK_JOURNAL.update(task_id, task_result)
+    except Exception as e:
+        logger.info(f"[MiniMax] 后台等待任务 {task_id} 出错: {str(e)}")
+    finally:
+        _get_limiter(api_key).release_task()
+
+
+async def _async_collect_handles(handles, poll_interval, max_wait_time, download_video=False, max_concurrency=8):
+    """并发等待多个已提交任务的结果，结果按输入顺序返回"""
+    session = await _get_client_session()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def _collect_one(handle):
+        async with semaphore:
+            try:
+                async with _async_task_slot(handle["api_key"], not handle.get("watched")):
+                    return await _async_collect_video_task(session, handle["task_id"], handle["api_key"], poll_interval,
+                                                           max_wait_time, download_video, handle.get("profile"), handle.get("push", False))
+            except Exception as e:
+                error_msg = f"未知错误: {str(e)}"
+                logger.info(f"[MiniMax] {error_msg}")
+                return {"error": error_msg, "task_id": handle["task_id"]}, None
+    
+    return await asyncio.gather(*[_collect_one(h) for h in handles])
+
+
+def _collect_handles(handles, poll_interval, max_wait_time, download_video=False, max_concurrency=8):
+    """等待 MiniMaxSubmit 提交的任务并取回结果，返回按输入顺序排列的 [(result, video_object)]"""
+    outcomes = [None] * len(handles)
+    for i, handle in enumerate(handles):
+        if handle.get("error"):
+            outcomes[i] = (dict(handle["error"]), None)
+        elif handle.get("cached") and handle.get("cache_key"):
+            # 提交时命中缓存：缓存仍可用就直接返回，否则按 task_id 重新取回
+            outcomes[i] = _cached_outcome(handle["cache_key"], handle["api_key"], download_video)
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    pending_handles = [handles[i] for i in pending]
+    
+    def _collect_one(handle):
+        try:
+            with _task_slot(handle["api_key"], not handle.get("watched")):
+                return _collect_video_task(handle["task_id"], handle["api_key"], poll_interval, max_wait_time,
+                                           download_video, handle.get("profile"))
+        except Exception as e:
+            error_msg = f"未知错误: {str(e)}"
+            logger.info(f"[MiniMax] {error_msg}")
+            return {"error": error_msg, "task_id": handle["task_id"]}, None
+    
+    if not pending_handles:
+        collected = []
+    elif EXECUTION_MODE == "sync":
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, _collect_one, h) for h in pending_handles]
+            collected = [f.result() for f in futures]
+    else:
+        rounds = -(-len(pending_handles) // max(1, max_concurrency))
+        collected = _run_coroutine(_async_collect_handles(pending_handles, poll_interval, max_wait_time, download_video, max_concurrency),
+                                   rounds * max_wait_time + RUN_TIMEOUT_MARGIN)
+    
+    for i, outcome in zip(pending, collected):
+        _store_cached_result(handles[i].get("cache_key"), outcome[0], handles[i].get("api_key"))
+        outcomes[i] = outcome
+    return outcomes
+
+
+def _journal_profile(row):
+    """从任务日志记录还原轮询画像"""
+    return (row.get("model", ""), row.get("duration"), row.get("resolution", ""))
+
+
+def _resumable_tasks(api_key, claim=True):
+    """已退出进程留下的未完成任务，返回 [(任务记录, 创建它的 api_key)]；节点未填写 api_key 时查找池中所有 Key"""
+    tasks = []
+    for candidate in _KEY_POOL.candidates(api_key):
+        for row in _TASK_JOURNAL.unfinished(candidate):
+            if not claim or _TASK_JOURNAL.claim_task(row["task_id"], row["owner"]):
+                tasks.append((row, candidate))
+    return tasks
+
+
+async def _async_resume_tasks(api_key, poll_interval, max_wait_time, download_video=False, collect=True):
+    """继续处理已退出进程留下的未完成任务，返回 (任务记录列表, 结果列表)
+
+    collect=True 时接管任务并取回结果；collect=False 时只轮询并把状态与 file_id
+    写回任务日志（启动钩子使用），之后相同的请求会直接接管已完成的任务。
+    """
+    session = await _get_client_session()
+    tasks = _resumable_tasks(api_key, claim=collect)
+    
+    async def _resume_one(row, task_key):
+        profile = _journal_profile(row)
+        async with _async_task_slot(task_key):
+            if collect:
+                return await _async_collect_video_task(session, row["task_id"], task_key, poll_interval, max_wait_time, download_video, profile)
+            task_result = await _async_poll_video_task(session, row["task_id"], task_key, poll_interval, max_wait_time, profile)
+        _TASK_JOURNAL.update(row["task_id"], task_result)
+        return task_result, None
+    
+    outcomes = await asyncio.gather(*[_resume_one(row, task_key) for row, task_key in tasks])
+    return [row for row, _ in tasks], outcomes
+
+
+def _resume_tasks(api_key, poll_interval, max_wait_time, download_video=False, max_concurrency=8):
+    """接管并取回已退出进程留下的未完成任务，返回 (任务记录列表, 结果列表)"""
+    if EXECUTION_MODE != "sync":
+        return _run_coroutine(_async_resume_tasks(api_key, poll_interval, max_wait_time, download_video),
+                              max_wait_time + RUN_TIMEOUT_MARGIN)
+    
+    tasks = _resumable_tasks(api_key)
+    if not tasks:
+        return [], []
+    
+    def _resume_one(row, task_key):
+        with _task_slot(task_key):
+            return _collect_video_task(row["task_id"], task_key, poll_interval, max_wait_time, download_video, _journal_profile(row))
+    
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, _resume_one, row, task_key)
+            for row, task_key in tasks
+        ]
+        return [row for row, _ in tasks], [f.result() for f in futures]
+
+
+def _resume_on_start():
+    """启动钩子：配置了 MINIMAX_RESUME_ON_START 与 MINIMAX_API_KEY（或 Key 池）时，在后台继续轮询上次未完成的任务"""
+    if not (RESUME_ON_START and (RESUME_API_KEY or _KEY_POOL.enabled())):
+        return
+    pending = _resumable_tasks(RESUME_API_KEY, claim=False)
+    if pending:
+        logger.info(f"[MiniMax] 后台继续轮询上次未完成的 {len(pending)} 个任务")
+        _submit_coroutine(_async_resume_tasks(RESUME_API_KEY, 3, TASK_RESUME_MAX_AGE, collect=False))
+
+
+_resume_on_start()
+
+
+def _build_smart_request(prompt, image1, image1_url, image2, image2_url, subject_image_mode,
+                         t2v_model, i2v_model, startend_model, subject_model, prompt_optimizer,
+                         fast_pretreatment, duration, resolution, callback_url, aigc_watermark, encode_options):
+    """根据图片输入自动选择生成模式并构建请求数据，返回 (request_data, mode)"""
+    # 检查图片输入
+    has_image1 = image1 is not None or (image1_url and image1_url.strip())
+    has_image2 = image2 is not None or (image2_url and image2_url.strip())
+    
+    # 确定生成模式
+    if not has_image1:
+        # 模式1: 文生视频
+        mode = "text_to_video"
+        logger.info(f"[MiniMax] 检测到模式: {mode}")
+        
+        if not prompt or prompt.strip() == "":
+            raise ValueError("文生视频模式需要提供 prompt")
+        
+        request_data = {
+            "model": t2v_model,
+            "prompt": prompt,
+            "prompt_optimizer": prompt_optimizer,
+            "fast_pretreatment": fast_pretreatment,
+            "duration": duration,
+            "resolution": resolution,
+            "aigc_watermark": aigc_watermark
         }
         
-        # 如果需要下载视频
-        video_object = None
-        if download_video:
-            video_data = await _async_download_video(session, download_url)
-            if video_data and VIDEO_FROM_FILE_AVAILABLE:
-                video_object = VideoFromFile(video_data)
-            elif video_data:
-                # 如果 VideoFromFile 不可用，返回 URL
-                video_object = download_url
+    elif has_image1 and not has_image2:
+        # 模式2: 单图片模式
+        processed_image1 = _process_image_input(image1, image1_url, encode_options)
+        if not processed_image1:
+            raise ValueError("image1 或 image1_url 必须提供其一")
+        
+        if subject_image_mode:
+            # 模式2a: 主体参考生成视频
+            mode = "subject_reference_to_video"
+            logger.info(f"[MiniMax] 检测到模式: {mode}")
+            
+            request_data = {
+                "model": subject_model,
+                "subject_reference": [
+                    {
+                        "type": "character",
+                        "image": [processed_image1]
+                    }
+                ],
+                "prompt_optimizer": prompt_optimizer,
+                "aigc_watermark": aigc_watermark
+            }
+            
+            # 主体参考生成视频不支持 duration、resolution、fast_pretreatment
+            if prompt and prompt.strip():
+                request_data["prompt"] = prompt
+        else:
+            # 模式2b: 图生视频
+            mode = "image_to_video"
+            logger.info(f"[MiniMax] 检测到模式: {mode}")
+            
+            request_data = {
+                "model": i2v_model,
+                "first_frame_image": processed_image1,
+                "prompt_optimizer": prompt_optimizer,
+                "fast_pretreatment": fast_pretreatment,
+                "duration": duration,
+                "resolution": resolution,
+                "aigc_watermark": aigc_watermark
+            }
+            
+            if prompt and prompt.strip():
+                request_data["prompt"] = prompt
+    else:
+        # 模式3: 首尾帧生视频
+        mode = "start_end_to_video"
+        logger.info(f"[MiniMax] 检测到模式: {mode}")
+        
+        processed_image1 = _process_image_input(image1, image1_url, encode_options)
+        processed_image2 = _process_image_input(image2, image2_url, encode_options)
         
-        return result, video_object
+        if not processed_image1:
+            raise ValueError("image1 或 image1_url 必须提供")
+        if not processed_image2:
+            raise ValueError("image2 或 image2_url 必须提供")
         
-    except Exception as e:
-        error_msg = f"未知错误: {str(e)}"
-        logger.info(f"[MiniMax] {error_msg}")
-        return {"error": error_msg}, None
+        request_data = {
+            "model": startend_model,
+            "first_frame_image": processed_image1,
+            "last_frame_image": processed_image2,
+            "prompt_optimizer": prompt_optimizer,
+            "duration": duration,
+            "resolution": resolution,
+            "aigc_watermark": aigc_watermark
+        }
+        
+        if prompt and prompt.strip():
+            request_data["prompt"] = prompt
+    
+    # 添加 callback_url
+    if callback_url and callback_url.strip():
+        request_data["callback_url"] = callback_url
+
+    return request_data, mode
 
 
 # ==================== 节点类定义 ====================
@@ -516,7 +1652,7 @@ class MiniMaxTextToVideo:
         
         return {
             "required": {
-                "api_key": ("STRING", {"default": ""}),
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
                 "model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-02", "T2V-01-Director", "T2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
                 "prompt": ("STRING", {"multiline": True, "default": ""}),
             },
@@ -530,6 +1666,7 @@ class MiniMaxTextToVideo:
                 "download_video": ("BOOLEAN", {"default": False}),
                 "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
                 "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
             }
         }
     
@@ -540,11 +1677,15 @@ class MiniMaxTextToVideo:
     
     OUTPUT_NODE = True
     
+    IS_CHANGED = classmethod(_node_is_changed)
+    
     CATEGORY = "MiniMax"
     
+    @_profiled_node
+    @_traced
     def run(self, api_key, model, prompt, prompt_optimizer=True, fast_pretreatment=False, 
             duration=6, resolution="768P", callback_url="", aigc_watermark=False,
-            download_video=False, poll_interval=3, max_wait_time=600):
+            download_video=False, poll_interval=3, max_wait_time=600, cache_mode="use"):
         try:
             if not prompt or prompt.strip() == "":
                 raise ValueError("prompt 不能为空")
@@ -564,7 +1705,7 @@ class MiniMaxTextToVideo:
                 request_data["callback_url"] = callback_url
             
             # 创建任务并轮询
-            result, video_object = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+            result, video_object = _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video, cache_mode)
             
             # 返回 JSON 响应和视频对象
             response_json = json.dumps(result, ensure_ascii=False, indent=2)
@@ -590,7 +1731,7 @@ class MiniMaxImageToVideo:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "api_key": ("STRING", {"default": ""}),
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
                 "model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-2.3-Fast", "MiniMax-Hailuo-02", "I2V-01-Director", "I2V-01-live", "I2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
             },
             "optional": {
@@ -606,6 +1747,10 @@ class MiniMaxImageToVideo:
                 "download_video": ("BOOLEAN", {"default": False}),
                 "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
                 "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
             }
         }
     
@@ -616,14 +1761,22 @@ class MiniMaxImageToVideo:
     
     OUTPUT_NODE = True
     
+    IS_CHANGED = classmethod(_node_is_changed)
+    
     CATEGORY = "MiniMax"
     
+    @_profiled_node
+    @_traced
     def run(self, api_key, model, first_frame_image=None, first_frame_image_url="", prompt="", prompt_optimizer=True, 
             fast_pretreatment=False, duration=6, resolution="768P", callback_url="", 
-            aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600):
+            aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
         try:
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, resolution, image_downscale)
+            
             # 处理图片输入
-            processed_image = _process_image_input(first_frame_image, first_frame_image_url)
+            processed_image = _process_image_input(first_frame_image, first_frame_image_url, encode_options)
             if not processed_image:
                 raise ValueError("first_frame_image 或 first_frame_image_url 必须提供其一")
             
@@ -645,7 +1798,7 @@ class MiniMaxImageToVideo:
                 request_data["callback_url"] = callback_url
             
             # 创建任务并轮询
-            result, video_object = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+            result, video_object = _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video, cache_mode)
             
             # 返回 JSON 响应和视频对象
             response_json = json.dumps(result, ensure_ascii=False, indent=2)
@@ -671,7 +1824,7 @@ class MiniMaxStartEndToVideo:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "api_key": ("STRING", {"default": ""}),
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
                 "model": (["MiniMax-Hailuo-02"], {"default": "MiniMax-Hailuo-02"}),
             },
             "optional": {
@@ -688,6 +1841,10 @@ class MiniMaxStartEndToVideo:
                 "download_video": ("BOOLEAN", {"default": False}),
                 "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
                 "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
             }
         }
     
@@ -698,20 +1855,28 @@ class MiniMaxStartEndToVideo:
     
     OUTPUT_NODE = True
     
+    IS_CHANGED = classmethod(_node_is_changed)
+    
     CATEGORY = "MiniMax"
     
+    @_profiled_node
+    @_traced
     def run(self, api_key, model, first_frame_image=None, first_frame_image_url="", 
             last_frame_image=None, last_frame_image_url="", prompt="", 
             prompt_optimizer=True, duration=6, resolution="768P", callback_url="", 
-            aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600):
+            aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
         try:
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, resolution, image_downscale)
+            
             # 处理首帧图片输入
-            processed_first_image = _process_image_input(first_frame_image, first_frame_image_url)
+            processed_first_image = _process_image_input(first_frame_image, first_frame_image_url, encode_options)
             if not processed_first_image:
                 raise ValueError("first_frame_image 或 first_frame_image_url 必须提供其一")
             
             # 处理尾帧图片输入
-            processed_last_image = _process_image_input(last_frame_image, last_frame_image_url)
+            processed_last_image = _process_image_input(last_frame_image, last_frame_image_url, encode_options)
             if not processed_last_image:
                 raise ValueError("last_frame_image 或 last_frame_image_url 必须提供其一")
             
@@ -733,7 +1898,7 @@ class MiniMaxStartEndToVideo:
                 request_data["callback_url"] = callback_url
             
             # 创建任务并轮询
-            result, video_object = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+            result, video_object = _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video, cache_mode)
             
             # 返回 JSON 响应和视频对象
             response_json = json.dumps(result, ensure_ascii=False, indent=2)
@@ -759,7 +1924,7 @@ class MiniMaxSubjectReferenceToVideo:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "api_key": ("STRING", {"default": ""}),
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
                 "model": (["S2V-01"], {"default": "S2V-01"}),
             },
             "optional": {
@@ -772,6 +1937,10 @@ class MiniMaxSubjectReferenceToVideo:
                 "download_video": ("BOOLEAN", {"default": False}),
                 "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
                 "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
             }
         }
     
@@ -782,13 +1951,21 @@ class MiniMaxSubjectReferenceToVideo:
     
     OUTPUT_NODE = True
     
+    IS_CHANGED = classmethod(_node_is_changed)
+    
     CATEGORY = "MiniMax"
     
+    @_profiled_node
+    @_traced
     def run(self, api_key, model, subject_image=None, subject_image_url="", prompt="", prompt_optimizer=True, 
-            callback_url="", aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600):
+            callback_url="", aigc_watermark=False, download_video=False, poll_interval=3, max_wait_time=600,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
         try:
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, None, image_downscale)
+            
             # 处理主体图片输入
-            processed_image = _process_image_input(subject_image, subject_image_url)
+            processed_image = _process_image_input(subject_image, subject_image_url, encode_options)
             if not processed_image:
                 raise ValueError("subject_image 或 subject_image_url 必须提供其一")
             
@@ -812,7 +1989,7 @@ class MiniMaxSubjectReferenceToVideo:
                 request_data["callback_url"] = callback_url
             
             # 创建任务并轮询
-            result, video_object = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+            result, video_object = _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video, cache_mode)
             
             # 返回 JSON 响应和视频对象
             response_json = json.dumps(result, ensure_ascii=False, indent=2)
@@ -838,7 +2015,7 @@ class MiniMaxSmartVideoGeneration:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "api_key": ("STRING", {"default": ""}),
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
                 "prompt": ("STRING", {"multiline": True, "default": ""}),
             },
             "optional": {
@@ -865,6 +2042,10 @@ class MiniMaxSmartVideoGeneration:
                 "download_video": ("BOOLEAN", {"default": False}),
                 "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
                 "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
             }
         }
     
@@ -875,113 +2056,31 @@ class MiniMaxSmartVideoGeneration:
     
     OUTPUT_NODE = True
     
+    IS_CHANGED = classmethod(_node_is_changed)
+    
     CATEGORY = "MiniMax"
     
+    @_profiled_node
+    @_traced
     def run(self, api_key, prompt, image1=None, image1_url="", image2=None, image2_url="", 
             subject_image_mode=False, t2v_model="MiniMax-Hailuo-2.3", i2v_model="MiniMax-Hailuo-2.3",
             startend_model="MiniMax-Hailuo-02", subject_model="S2V-01",
             prompt_optimizer=True, fast_pretreatment=False, duration=6, resolution="768P",
             callback_url="", aigc_watermark=False, download_video=False,
-            poll_interval=3, max_wait_time=600):
+            poll_interval=3, max_wait_time=600,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
         try:
-            # 检查图片输入
-            has_image1 = image1 is not None or (image1_url and image1_url.strip())
-            has_image2 = image2 is not None or (image2_url and image2_url.strip())
-            
-            # 确定生成模式
-            if not has_image1:
-                # 模式1: 文生视频
-                mode = "text_to_video"
-                logger.info(f"[MiniMax Smart] 检测到模式: {mode}")
-                
-                if not prompt or prompt.strip() == "":
-                    raise ValueError("文生视频模式需要提供 prompt")
-                
-                request_data = {
-                    "model": t2v_model,
-                    "prompt": prompt,
-                    "prompt_optimizer": prompt_optimizer,
-                    "fast_pretreatment": fast_pretreatment,
-                    "duration": duration,
-                    "resolution": resolution,
-                    "aigc_watermark": aigc_watermark
-                }
-                
-            elif has_image1 and not has_image2:
-                # 模式2: 单图片模式
-                processed_image1 = _process_image_input(image1, image1_url)
-                if not processed_image1:
-                    raise ValueError("image1 或 image1_url 必须提供其一")
-                
-                if subject_image_mode:
-                    # 模式2a: 主体参考生成视频
-                    mode = "subject_reference_to_video"
-                    logger.info(f"[MiniMax Smart] 检测到模式: {mode}")
-                    
-                    request_data = {
-                        "model": subject_model,
-                        "subject_reference": [
-                            {
-                                "type": "character",
-                                "image": [processed_image1]
-                            }
-                        ],
-                        "prompt_optimizer": prompt_optimizer,
-                        "aigc_watermark": aigc_watermark
-                    }
-                    
-                    # 主体参考生成视频不支持 duration、resolution、fast_pretreatment
-                    if prompt and prompt.strip():
-                        request_data["prompt"] = prompt
-                else:
-                    # 模式2b: 图生视频
-                    mode = "image_to_video"
-                    logger.info(f"[MiniMax Smart] 检测到模式: {mode}")
-                    
-                    request_data = {
-                        "model": i2v_model,
-                        "first_frame_image": processed_image1,
-                        "prompt_optimizer": prompt_optimizer,
-                        "fast_pretreatment": fast_pretreatment,
-                        "duration": duration,
-                        "resolution": resolution,
-                        "aigc_watermark": aigc_watermark
-                    }
-                    
-                    if prompt and prompt.strip():
-                        request_data["prompt"] = prompt
-            else:
-                # 模式3: 首尾帧生视频
-                mode = "start_end_to_video"
-                logger.info(f"[MiniMax Smart] 检测到模式: {mode}")
-                
-                processed_image1 = _process_image_input(image1, image1_url)
-                processed_image2 = _process_image_input(image2, image2_url)
-                
-                if not processed_image1:
-                    raise ValueError("image1 或 image1_url 必须提供")
-                if not processed_image2:
-                    raise ValueError("image2 或 image2_url 必须提供")
-                
-                request_data = {
-                    "model": startend_model,
-                    "first_frame_image": processed_image1,
-                    "last_frame_image": processed_image2,
-                    "prompt_optimizer": prompt_optimizer,
-                    "duration": duration,
-                    "resolution": resolution,
-                    "aigc_watermark": aigc_watermark
-                }
-                
-                if prompt and prompt.strip():
-                    request_data["prompt"] = prompt
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, resolution, image_downscale)
             
-            # 添加 callback_url
-            if callback_url and callback_url.strip():
-                request_data["callback_url"] = callback_url
+            # 根据图片输入确定生成模式并构建请求
+            request_data, mode = _build_smart_request(
+                prompt, image1, image1_url, image2, image2_url, subject_image_mode,
+                t2v_model, i2v_model, startend_model, subject_model, prompt_optimizer,
+                fast_pretreatment, duration, resolution, callback_url, aigc_watermark, encode_options)
             
             # 创建任务并轮询
-            result, video_object = _create_and_poll_video_task(request_data, api_key, poll_interval, max_wait_time, download_video)
+            result, video_object = _generate_video(request_data, api_key, poll_interval, max_wait_time, download_video, cache_mode)
             
             # 在结果中添加模式信息
             if isinstance(result, dict) and "error" not in result:
@@ -1004,6 +2103,472 @@ class MiniMaxSmartVideoGeneration:
             return (error_json, "", "error")
 
 
+class MiniMaxBatchVideoGeneration:
+    """批量视频生成节点 - 多个 prompt 和/或整个 IMAGE 批次并发生成"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
+                "prompts": ("STRING", {"multiline": True, "default": "", "tooltip": "每行一个 prompt；只有一行时对所有图片共用"}),
+            },
+            "optional": {
+                "images": ("IMAGE",),
+                "image_urls": ("STRING", {"multiline": True, "default": "", "tooltip": "每行一个图片 URL，未连接 images 时使用"}),
+                # 文生视频模型
+                "t2v_model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-02", "T2V-01-Director", "T2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
+                # 图生视频模型
+                "i2v_model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-2.3-Fast", "MiniMax-Hailuo-02", "I2V-01-Director", "I2V-01-live", "I2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
+                "prompt_optimizer": ("BOOLEAN", {"default": True}),
+                "fast_pretreatment": ("BOOLEAN", {"default": False}),
+                "duration": ("INT", {"default": 6, "min": 6, "max": 10}),
+                "resolution": (["512P", "720P", "768P", "1080P"], {"default": "768P"}),
+                "callback_url": ("STRING", {"default": ""}),
+                "aigc_watermark": ("BOOLEAN", {"default": False}),
+                "download_video": ("BOOLEAN", {"default": False}),
+                "max_concurrency": ("INT", {"default": 8, "min": 1, "max": 64}),
+                "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
+                "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
+            }
+        }
+    
+    RETURN_TYPES = ("STRING", "STRING" if not VIDEO_FROM_FILE_AVAILABLE else "VIDEO", "STRING")
+    RETURN_NAMES = ("response", "videos", "status")
+    OUTPUT_IS_LIST = (False, True, False)
+    
+    FUNCTION = "run"
+    
+    OUTPUT_NODE = True
+    
+    IS_CHANGED = classmethod(_node_is_changed)
+    
+    CATEGORY = "MiniMax"
+    
+    @_profiled_node
+    @_traced
+    def run(self, api_key, prompts, images=None, image_urls="", t2v_model="MiniMax-Hailuo-2.3",
+            i2v_model="MiniMax-Hailuo-2.3", prompt_optimizer=True, fast_pretreatment=False,
+            duration=6, resolution="768P", callback_url="", aigc_watermark=False,
+            download_video=False, max_concurrency=8, poll_interval=3, max_wait_time=600,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
+        try:
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, resolution, image_downscale)
+            
+            prompt_list = [line.strip() for line in (prompts or "").splitlines() if line.strip()]
+            
+            # 处理图片输入：IMAGE 批次中的每一张都参与生成
+            if images is not None:
+                image_list = _image_batch_to_base64_list(images, encode_options)
+            else:
+                image_list = [line.strip() for line in (image_urls or "").splitlines() if line.strip()]
+            
+            if not prompt_list and not image_list:
+                raise ValueError("prompts 与 images/image_urls 至少提供其一")
+            
+            # 对齐 prompt 与图片数量，只有一个时广播到所有任务
+            if image_list and prompt_list and len(prompt_list) not in (1, len(image_list)) and len(image_list) != 1:
+                raise ValueError(f"prompt 数量 ({len(prompt_list)}) 与图片数量 ({len(image_list)}) 不匹配")
+            count = max(len(prompt_list), len(image_list))
+            
+            # 构建每个任务的请求数据
+            request_list = []
+            for i in range(count):
+                prompt = prompt_list[i if len(prompt_list) > 1 else 0] if prompt_list else ""
+                request_data = {
+                    "prompt_optimizer": prompt_optimizer,
+                    "fast_pretreatment": fast_pretreatment,
+                    "duration": duration,
+                    "resolution": resolution,
+                    "aigc_watermark": aigc_watermark
+                }
+                if image_list:
+                    request_data["model"] = i2v_model
+                    request_data["first_frame_image"] = image_list[i if len(image_list) > 1 else 0]
+                else:
+                    request_data["model"] = t2v_model
+                if prompt:
+                    request_data["prompt"] = prompt
+                if callback_url and callback_url.strip():
+                    request_data["callback_url"] = callback_url
+                request_list.append(request_data)
+            
+            logger.info(f"[MiniMax Batch] 共 {count} 个任务，最大并发 {max_concurrency}")
+            
+            # 并发创建任务并轮询
+            outcomes = _generate_video_batch(request_list, api_key, poll_interval, max_wait_time, download_video, max_concurrency, cache_mode)
+            
+            # 按输入顺序整理结果与逐项状态
+            results = []
+            video_outputs = []
+            status_items = []
+            for i, (result, video_object) in enumerate(outcomes):
+                results.append(result)
+                ok = "error" not in result and result.get("status") == "Success"
+                if video_object is None:
+                    video_outputs.append(result.get("download_url", "") if ok else "")
+                else:
+                    video_outputs.append(video_object)
+                status_items.append({
+                    "index": i,
+                    "status": result.get("status", "Error") if "error" not in result else "Error",
+                    "task_id": result.get("task_id", ""),
+                    "download_url": result.get("download_url", ""),
+                    "error": result.get("error", ""),
+                })
+            
+            succeeded = sum(1 for item in status_items if item["status"] == "Success")
+            status_json = json.dumps(_attach_metrics({
+                "total": count,
+                "succeeded": succeeded,
+                "failed": count - succeeded,
+                "items": status_items
+            }), ensure_ascii=False, indent=2)
+            response_json = json.dumps(results, ensure_ascii=False, indent=2)
+            
+            return (response_json, video_outputs, status_json)
+            
+        except Exception as e:
+            error_msg = f"未知错误: {str(e)}"
+            logger.info(f"[MiniMax Batch] {error_msg}")
+            error_json = json.dumps({"error": error_msg}, ensure_ascii=False)
+            return (error_json, [""], error_json)
+
+
+class MiniMaxResumeTasks:
+    """恢复任务节点 - 取回 ComfyUI 重启前已提交但未取回结果的任务"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
+            },
+            "optional": {
+                "download_video": ("BOOLEAN", {"default": False}),
+                "max_concurrency": ("INT", {"default": 8, "min": 1, "max": 64}),
+                "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
+                "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600}),
+            }
+        }
+    
+    RETURN_TYPES = ("STRING", "STRING" if not VIDEO_FROM_FILE_AVAILABLE else "VIDEO", "STRING")
+    RETURN_NAMES = ("response", "videos", "status")
+    OUTPUT_IS_LIST = (False, True, False)
+    
+    FUNCTION = "run"
+    
+    OUTPUT_NODE = True
+    
+    @classmethod
+    def IS_CHANGED(s, **kwargs):
+        # 结果取决于任务日志，每次都重新执行
+        return float("nan")
+    
+    CATEGORY = "MiniMax"
+    
+    @_profiled_node
+    @_traced
+    def run(self, api_key, download_video=False, max_concurrency=8, poll_interval=3, max_wait_time=600):
+        try:
+            rows, outcomes = _resume_tasks(api_key, poll_interval, max_wait_time, download_video, max_concurrency)
+            logger.info(f"[MiniMax Resume] 接管 {len(rows)} 个未完成的任务")
+            
+            results = []
+            video_outputs = []
+            status_items = []
+            for row, (result, video_object) in zip(rows, outcomes):
+                results.append(result)
+                ok = "error" not in result and result.get("status") == "Success"
+                if video_object is None:
+                    video_outputs.append(result.get("download_url", "") if ok else "")
+                else:
+                    video_outputs.append(video_object)
+                status_items.append({
+                    "task_id": row["task_id"],
+                    "model": row.get("model", ""),
+                    "submitted_at": row.get("created_at", 0),
+                    "status": result.get("status", "Error") if "error" not in result else "Error",
+                    "download_url": result.get("download_url", ""),
+                    "error": result.get("error", ""),
+                })
+            
+            succeeded = sum(1 for item in status_items if item["status"] == "Success")
+            status_json = json.dumps(_attach_metrics({
+                "total": len(rows),
+                "succeeded": succeeded,
+                "failed": len(rows) - succeeded,
+                "items": status_items
+            }), ensure_ascii=False, indent=2)
+            response_json = json.dumps(results, ensure_ascii=False, indent=2)
+            
+            return (response_json, video_outputs or [""], status_json)
+            
+        except Exception as e:
+            error_msg = f"未知错误: {str(e)}"
+            logger.info(f"[MiniMax Resume] {error_msg}")
+            error_json = json.dumps({"error": error_msg}, ensure_ascii=False)
+            return (error_json, [""], error_json)
+
+
+class MiniMaxSubmit:
+    """提交任务节点 - 提交后立即返回任务句柄，由 MiniMaxCollect 稍后取回结果"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "api_key": ("STRING", {"default": "", "tooltip": "留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
+                "prompt": ("STRING", {"multiline": True, "default": ""}),
+            },
+            "optional": {
+                "tasks": ("MINIMAX_TASK", {"tooltip": "串联上一个提交节点的任务，输出时一并传给 MiniMaxCollect"}),
+                "image1": ("IMAGE",),
+                "image1_url": ("STRING", {"default": ""}),
+                "image2": ("IMAGE",),
+                "image2_url": ("STRING", {"default": ""}),
+                "subject_image_mode": ("BOOLEAN", {"default": False, "tooltip": "当只有一个图片时，True=主体参考生成，False=图生视频"}),
+                # 文生视频模型
+                "t2v_model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-02", "T2V-01-Director", "T2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
+                # 图生视频模型
+                "i2v_model": (["MiniMax-Hailuo-2.3", "MiniMax-Hailuo-2.3-Fast", "MiniMax-Hailuo-02", "I2V-01-Director", "I2V-01-live", "I2V-01"], {"default": "MiniMax-Hailuo-2.3"}),
+                # 首尾帧模型
+                "startend_model": (["MiniMax-Hailuo-02"], {"default": "MiniMax-Hailuo-02"}),
+                # 主体参考模型
+                "subject_model": (["S2V-01"], {"default": "S2V-01"}),
+                # 通用参数
+                "prompt_optimizer": ("BOOLEAN", {"default": True}),
+                "fast_pretreatment": ("BOOLEAN", {"default": False}),
+                "duration": ("INT", {"default": 6, "min": 6, "max": 10}),
+                "resolution": (["512P", "720P", "768P", "1080P"], {"default": "768P"}),
+                "callback_url": ("STRING", {"default": ""}),
+                "aigc_watermark": ("BOOLEAN", {"default": False}),
+                "image_format": (IMAGE_FORMATS, {"default": "png", "tooltip": "上传图片的编码格式，JPEG/WebP 体积更小"}),
+                "image_quality": ("INT", {"default": 90, "min": 1, "max": 100, "tooltip": "JPEG/WebP 编码质量"}),
+                "image_downscale": ("BOOLEAN", {"default": True, "tooltip": "将图片缩小到生成分辨率对应的尺寸再上传"}),
+                "cache_mode": (CACHE_MODES, {"default": "use", "tooltip": "use=命中缓存直接返回，refresh=重新生成并更新缓存，bypass=不使用缓存"}),
+            }
+        }
+    
+    RETURN_TYPES = ("MINIMAX_TASK", "STRING")
+    RETURN_NAMES = ("tasks", "task_id")
+    
+    FUNCTION = "run"
+    
+    IS_CHANGED = classmethod(_node_is_changed)
+    
+    CATEGORY = "MiniMax"
+    
+    @_profiled_node
+    @_traced
+    def run(self, api_key, prompt, tasks=None, image1=None, image1_url="", image2=None, image2_url="",
+            subject_image_mode=False, t2v_model="MiniMax-Hailuo-2.3", i2v_model="MiniMax-Hailuo-2.3",
+            startend_model="MiniMax-Hailuo-02", subject_model="S2V-01",
+            prompt_optimizer=True, fast_pretreatment=False, duration=6, resolution="768P",
+            callback_url="", aigc_watermark=False,
+            image_format="png", image_quality=90, image_downscale=True, cache_mode="use"):
+        previous = list(tasks or [])
+        try:
+            # 图片编码选项（格式、质量、按生成分辨率缩小）
+            encode_options = _image_encode_options(image_format, image_quality, resolution, image_downscale)
+            
+            # 根据图片输入确定生成模式并构建请求
+            request_data, mode = _build_smart_request(
+                prompt, image1, image1_url, image2, image2_url, subject_image_mode,
+                t2v_model, i2v_model, startend_model, subject_model, prompt_optimizer,
+                fast_pretreatment, duration, resolution, callback_url, aigc_watermark, encode_options)
+            
+            # 只提交，不等待生成结束
+            handle = _submit_only(request_data, api_key, cache_mode, mode)
+            
+        except Exception as e:
+            error_msg = f"未知错误: {str(e)}"
+            logger.info(f"[MiniMax Submit] {error_msg}")
+            handle = _task_handle("", "", None, error={"error": error_msg})
+        
+        logger.info(f"[MiniMax Submit] 已提交: {json.dumps(_task_handle_summary(handle), ensure_ascii=False)}")
+        return (previous + [handle], handle["task_id"])
+
+
+class MiniMaxCollect:
+    """取回结果节点 - 等待一个或多个 MiniMaxSubmit 提交的任务并取回视频"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {},
+            "optional": {
+                "tasks": ("MINIMAX_TASK",),
+                "task_ids": ("STRING", {"multiline": True, "default": "", "tooltip": "按 task_id 取回其他地方提交的任务，每行一个"}),
+                "api_key": ("STRING", {"default": "", "tooltip": "task_ids 对应的 api_key；留空时从 MINIMAX_API_KEYS 配置的 Key 池中分配"}),
+                "download_video": ("BOOLEAN", {"default": False}),
+                "max_concurrency": ("INT", {"default": 8, "min": 1, "max": 64}),
+                "poll_interval": ("INT", {"default": 3, "min": 1, "max": 30}),
+                "max_wait_time": ("INT", {"default": 600, "min": 30, "max": 3600, "tooltip": "从开始取回算起的最长等待时间（秒）"}),
+            }
+        }
+    
+    RETURN_TYPES = ("STRING", "STRING" if not VIDEO_FROM_FILE_AVAILABLE else "VIDEO", "STRING")
+    RETURN_NAMES = ("response", "videos", "status")
+    OUTPUT_IS_LIST = (False, True, False)
+    
+    FUNCTION = "run"
+    
+    OUTPUT_NODE = True
+    
+    CATEGORY = "MiniMax"
+    
+    @_profiled_node
+    @_traced
+    def run(self, tasks=None, task_ids="", api_key="", download_video=False, max_concurrency=8,
+            poll_interval=3, max_wait_time=600):
+        try:
+            handles = list(tasks or [])
+            for task_id in re.split(r"[\s,]+", task_ids or ""):
+                if task_id:
+                    key = _KEY_POOL.owner_key(_TASK_JOURNAL.key_hash_of(task_id), api_key)
+                    handles.append(_task_handle(task_id, key, None))
+            if not handles:
+                raise ValueError("tasks 与 task_ids 至少提供其一")
+            
+            logger.info(f"[MiniMax Collect] 等待 {len(handles)} 个任务，最大并发 {max_concurrency}")
+            outcomes = _collect_handles(handles, poll_interval, max_wait_time, download_video, max_concurrency)
+            
+            # 按输入顺序整理结果与逐项状态
+            results = []
+            video_outputs = []
+            status_items = []
+            for i, (handle, (result, video_object)) in enumerate(zip(handles, outcomes)):
+                if isinstance(result, dict) and "error" not in result and handle.get("mode"):
+                    result["generation_mode"] = handle["mode"]
+                results.append(result)
+                ok = "error" not in result and result.get("status") == "Success"
+                if video_object is None:
+                    video_outputs.append(result.get("download_url", "") if ok else "")
+                else:
+                    video_outputs.append(video_object)
+                status_items.append({
+                    "index": i,
+                    "task_id": handle["task_id"],
+                    "status": result.get("status", "Error") if "error" not in result else "Error",
+                    "wait_seconds": round(time.time() - handle["submitted_at"], 1),
+                    "download_url": result.get("download_url", ""),
+                    "error": result.get("error", ""),
+                })
+            
+            succeeded = sum(1 for item in status_items if item["status"] == "Success")
+            status_json = json.dumps(_attach_metrics({
+                "total": len(handles),
+                "succeeded": succeeded,
+                "failed": len(handles) - succeeded,
+                "items": status_items
+            }), ensure_ascii=False, indent=2)
+            response_json = json.dumps(results, ensure_ascii=False, indent=2)
+            
+            return (response_json, video_outputs, status_json)
+            
+        except Exception as e:
+            error_msg = f"未知错误: {str(e)}"
+            logger.info(f"[MiniMax Collect] {error_msg}")
+            error_json = json.dumps({"error": error_msg}, ensure_ascii=False)
+            return (error_json, [""], error_json)
+
+
+class MiniMaxMetrics:
+    """指标节点 - 输出进程内累计的各阶段延迟与吞吐指标"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {},
+        }
+    
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("prometheus", "snapshot")
+    
+    FUNCTION = "run"
+    
+    OUTPUT_NODE = True
+    
+    @classmethod
+    def IS_CHANGED(s, **kwargs):
+        # 指标随时间累计，每次都重新执行
+        return float("nan")
+    
+    CATEGORY = "MiniMax"
+    
+    def run(self):
+        snapshot_json = json.dumps(_METRICS.snapshot(), ensure_ascii=False, indent=2)
+        return (_METRICS.render_prometheus(), snapshot_json)
+
+
+def _video_source(video, video_path):
+    """抽帧的输入来源：VIDEO 对象、本地路径、URL，或生成节点输出的 response JSON"""
+    if video is not None and video != "":
+        if isinstance(video, str):
+            return video
+        if hasattr(video, "get_stream_source"):
+            source = video.get_stream_source()
+        else:
+            source = getattr(video, "_VideoFromFile__file", None)
+        if hasattr(source, "seek"):
+            source.seek(0)
+        if source is not None:
+            return source
+    video_path = (video_path or "").strip()
+    if video_path.startswith("{"):
+        data = json.loads(video_path)
+        video_path = data.get("video_path") or data.get("download_url") or ""
+    if not video_path:
+        raise ValueError("video 与 video_path 至少提供其一")
+    return video_path
+
+
+class MiniMaxVideoToFrames:
+    """抽帧节点 - 把生成的视频逐帧解码为 IMAGE，支持抽帧间隔、时间范围与缩放"""
+    
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {},
+            "optional": {
+                "video": ("STRING" if not VIDEO_FROM_FILE_AVAILABLE else "VIDEO",),
+                "video_path": ("STRING", {"default": "", "tooltip": "本地路径、下载 URL 或生成节点的 response JSON；未连接 video 时使用"}),
+                "frame_stride": ("INT", {"default": 1, "min": 1, "max": 1000, "tooltip": "每 N 帧保留一帧"}),
+                "start_time": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 3600.0, "step": 0.1}),
+                "end_time": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 3600.0, "step": 0.1, "tooltip": "0 表示到视频结尾"}),
+                "width": ("INT", {"default": 0, "min": 0, "max": 8192, "tooltip": "0 表示按 height 保持比例（都为 0 时保持原尺寸）"}),
+                "height": ("INT", {"default": 0, "min": 0, "max": 8192, "tooltip": "0 表示按 width 保持比例（都为 0 时保持原尺寸）"}),
+                "max_frames": ("INT", {"default": 0, "min": 0, "max": 100000, "tooltip": "0 表示不限制"}),
+                "chunk_size": ("INT", {"default": 16, "min": 1, "max": 1024, "tooltip": "每次转换为 float32 的帧数"}),
+                "use_memmap": ("BOOLEAN", {"default": False, "tooltip": "输出映射到缓存目录下的文件，不占用常驻内存"}),
+            }
+        }
+    
+    RETURN_TYPES = ("IMAGE", "FLOAT", "INT")
+    RETURN_NAMES = ("frames", "fps", "frame_count")
+    
+    FUNCTION = "run"
+    
+    CATEGORY = "MiniMax"
+    
+    @_profiled_node
+    @_traced
+    def run(self, video=None, video_path="", frame_stride=1, start_time=0.0, end_time=0.0, width=0, height=0,
+            max_frames=0, chunk_size=16, use_memmap=False):
+        if end_time and end_time <= start_time:
+            raise ValueError("end_time 必须大于 start_time")
+        source = _video_source(video, video_path)
+        frames, fps = _decode_video_frames(source, frame_stride, start_time, end_time, width, height,
+                                           max_frames, chunk_size, use_memmap)
+        return (frames, fps, frames.shape[0])
+
+
 # 节点映射
 NODE_CLASS_MAPPINGS = {
     "MiniMaxTextToVideo": MiniMaxTextToVideo,
@@ -1011,6 +2576,12 @@ NODE_CLASS_MAPPINGS = {
     "MiniMaxStartEndToVideo": MiniMaxStartEndToVideo,
     "MiniMaxSubjectReferenceToVideo": MiniMaxSubjectReferenceToVideo,
     "MiniMaxSmartVideoGeneration": MiniMaxSmartVideoGeneration,
+    "MiniMaxBatchVideoGeneration": MiniMaxBatchVideoGeneration,
+    "MiniMaxResumeTasks": MiniMaxResumeTasks,
+    "MiniMaxSubmit": MiniMaxSubmit,
+    "MiniMaxCollect": MiniMaxCollect,
+    "MiniMaxMetrics": MiniMaxMetrics,
+    "MiniMaxVideoToFrames": MiniMaxVideoToFrames,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -1019,5 +2590,11 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "MiniMaxStartEndToVideo": "MiniMax Start-End to Video",
     "MiniMaxSubjectReferenceToVideo": "MiniMax Subject Reference to Video",
     "MiniMaxSmartVideoGeneration": "MiniMax Smart Video Generation",
+    "MiniMaxBatchVideoGeneration": "MiniMax Batch Video Generation",
+    "MiniMaxResumeTasks": "MiniMax Resume Tasks",
+    "MiniMaxSubmit": "MiniMax Submit",
+    "MiniMaxCollect": "MiniMax Collect",
+    "MiniMaxMetrics": "MiniMax Metrics",
+    "MiniMaxVideoToFrames": "MiniMax Video to Frames",
 }
 
@@ -0,0 +1,87 @@
+import random
+import threading
+from .config import POLL_MIN_INTERVAL, POLL_QUEUEING_INTERVAL, POLL_MAX_INTERVAL, POLL_BACKOFF_MAX
+
+
+def _poll_profile(request_data):
+    """从请求数据中提取用于估计渲染耗时的 (model, duration, resolution)"""
+    if not isinstance(request_data, dict):
+        return None
+    return (
+        request_data.get("model", ""),
+        request_data.get("duration", 6),
+        request_data.get("resolution", ""),
+    )
+
+
+class _PollPolicy:
+    """自适应轮询策略
+
+    - Queueing 阶段放慢轮询；
+    - Processing 阶段根据同一 (model, duration, resolution) 的历史完成耗时估计结束时间，
+      距离结束较远时拉长间隔，接近结束时加密轮询；
+    - 请求异常时按指数退避并加入随机抖动。
+    """
+
+    def __init__(self, min_interval=1.0, queueing_interval=15.0, max_interval=30.0,
+                 backoff_max=60.0, smoothing=0.3):
+        self.min_interval = min_interval
+        self.queueing_interval = queueing_interval
+        self.max_interval = max_interval
+        self.backoff_max = backoff_max
+        self.smoothing = smoothing
+        # profile -> 指数加权平均的完成耗时（秒）
+        self._history = {}
+        self._lock = threading.Lock()
+
+    def expected_duration(self, profile):
+        """返回该 profile 的历史平均完成耗时，没有记录时返回 None"""
+        if profile is None:
+            return None
+        with self._lock:
+            return self._history.get(profile)
+
+    def record_completion(self, profile, elapsed):
+        """记录一次成功完成的耗时，更新指数加权平均"""
+        if profile is None or elapsed <= 0:
+            return
+        with self._lock:
+            previous = self._history.get(profile)
+            if previous is None:
+                self._history[profile] = elapsed
+            else:
+                self._history[profile] = previous + self.smoothing * (elapsed - previous)
+
+    def next_interval(self, status, elapsed, base_interval, profile=None):
+        """根据任务状态与已等待时间计算下一次轮询前的等待秒数"""
+        if status == "Queueing":
+            return max(base_interval, self.queueing_interval)
+
+        if status == "Processing":
+            expected = self.expected_duration(profile)
+            if expected is None:
+                return base_interval
+            remaining = expected - elapsed
+            if remaining > 2 * base_interval:
+                # 距离预计完成还远：睡一半剩余时间，但不超过上限
+                return min(self.max_interval, max(base_interval, remaining / 2))
+            if remaining > -base_interval:
+                # 接近预计完成时间：加密轮询，减少超过完成点的等待
+                return min(base_interval, self.min_interval)
+            return base_interval
+
+        return base_interval
+
+    def error_backoff(self, attempt, base_interval):
+        """第 attempt 次连续失败后的等待秒数（指数退避 + 抖动）"""
+        delay = min(self.backoff_max, base_interval * (2 ** max(0, attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+
+# 进程内共享的轮询策略，同步与异步轮询共用同一份历史耗时
+_POLL_POLICY = _PollPolicy(
+    min_interval=POLL_MIN_INTERVAL,
+    queueing_interval=POLL_QUEUEING_INTERVAL,
+    max_interval=POLL_MAX_INTERVAL,
+    backoff_max=POLL_BACKOFF_MAX,
+)
@@ -0,0 +1,260 @@
+import asyncio
+import heapq
+import itertools
+from collections import OrderedDict
+from .config import CALLBACK_EARLY_RESULT_TTL
+from .logging import logger, _POLL_LOG
+from .poll_policy import _PollPolicy
+from .metrics import _StatusClock, _current_trace
+from .resilience import _RETRY_POLICY, _CIRCUIT_BREAKER, _is_fatal_http_error, _retry_after_of
+
+# 仍在进行中的状态：继续按计划轮询，其余状态视为终态
+PENDING_STATUSES = ("Preparing", "Queueing", "Processing")
+
+
+class _PollEntry:
+    """调度表中的一个在途任务，同一 task_id 的多个等待者共享一条记录"""
+
+    def __init__(self, task_id, session, api_key, poll_interval, profile, started_at):
+        self.task_id = task_id
+        self.session = session
+        self.api_key = api_key
+        self.poll_interval = poll_interval
+        self.profile = profile
+        self.started_at = started_at
+        self.waiters = []
+        self.status = None
+        self.last_error = None
+        self.errors = 0
+        self.polls = 0
+        # 各状态停留时间；traces 为各等待者所在节点执行的指标追踪
+        self.clock = _StatusClock(started_at)
+        self.traces = []
+        # 由回调推送完成状态时的兜底轮询间隔；None 表示按轮询策略正常轮询
+        self.push_interval = None
+        # 每次重新调度时更新（全局递增），用于识别堆中的过期条目
+        self.generation = 0
+
+
+class _PollScheduler:
+    """进程内共享的轮询调度器
+
+    所有在途 task_id 登记在同一张表里，由一个后台协程按最早到期时间（最小堆）
+    依次查询；同一 task_id 的重复等待会合并为一次轮询，只有任务到达终态时才唤醒
+    对应的等待者。下一次查询时间由 _PollPolicy 根据任务状态决定。必须在包事件循环中使用。
+    """
+
+    def __init__(self, query_fn, max_concurrent_queries=16, policy=None, early_result_ttl=CALLBACK_EARLY_RESULT_TTL):
+        # query_fn(session, task_id, api_key) -> 查询接口返回的 dict
+        self._query_fn = query_fn
+        self._policy = policy or _PollPolicy()
+        self._max_concurrent_queries = max_concurrent_queries
+        self._entries = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._runner = None
+        self._query_semaphore = None
+        # 在等待者登记之前就通过回调到达的终态结果：task_id → (结果, 过期时间)，按到达顺序排列
+        self._early_results = OrderedDict()
+        self._early_result_ttl = early_result_ttl
+
+    async def wait(self, session, task_id, api_key, poll_interval, max_wait_time, profile=None, push_interval=None):
+        """登记 task_id 并等待其到达终态，超时返回与原轮询函数一致的错误结构
+
+        push_interval 不为空时表示完成状态会通过回调推送（见 notify），
+        此时只按该间隔做稀疏的兜底轮询。
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_runner()
+
+        self._prune_early_results(loop.time())
+        early_result = self._early_results.pop(task_id, None)
+        if early_result is not None:
+            logger.info(f"[MiniMax] 任务 {task_id} 已通过回调完成")
+            return dict(early_result[0])
+
+        entry = self._entries.get(task_id)
+        if entry is None:
+            entry = _PollEntry(task_id, session, api_key, poll_interval, profile, loop.time())
+            entry.push_interval = push_interval
+            self._entries[task_id] = entry
+            # 回调模式下首次查询也推迟到兜底间隔之后
+            self._schedule(entry, loop.time() + (push_interval or 0))
+        else:
+            # 合并重复等待：沿用已有记录，取更短的轮询间隔
+            logger.info(f"[MiniMax] 任务 {task_id} 已在轮询中，合并等待")
+            entry.poll_interval = min(entry.poll_interval, poll_interval)
+            if push_interval is None:
+                entry.push_interval = None
+
+        waiter = loop.create_future()
+        entry.waiters.append(waiter)
+        trace = _current_trace()
+        if trace is not None and trace not in entry.traces:
+            entry.traces.append(trace)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), max_wait_time)
+        except asyncio.TimeoutError:
+            self._remove_waiter(entry, waiter)
+            if entry.last_error:
+                error_msg = f"任务轮询超时 ({max_wait_time}秒)，最后一次请求出错: {entry.last_error}"
+            else:
+                error_msg = f"任务轮询超时 ({max_wait_time}秒)"
+            logger.info(f"[MiniMax] {error_msg}")
+            return {"error": error_msg, "task_id": task_id}
+        except asyncio.CancelledError:
+            self._remove_waiter(entry, waiter)
+            raise
+
+    def notify(self, task_id, result_data):
+        """接收外部推送（如回调）的任务状态，终态直接唤醒等待者"""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            # 等待者尚未登记：暂存终态结果，登记时直接返回
+            if result_data.get("status", "") not in PENDING_STATUSES:
+                now = asyncio.get_running_loop().time()
+                self._early_results.pop(task_id, None)
+                self._early_results[task_id] = (result_data, now + self._early_result_ttl)
+                self._prune_early_results(now)
+            return
+        self._apply_status(entry, result_data, asyncio.get_running_loop().time())
+
+    def _prune_early_results(self, now):
+        """丢弃过期的暂存结果，并把数量限制在 1024 条以内（按到达顺序，最早的在前）"""
+        while self._early_results:
+            _, (_, expires_at) = next(iter(self._early_results.items()))
+            if expires_at > now and len(self._early_results) <= 1024:
+                break
+            self._early_results.popitem(last=False)
+
+    def _remove_waiter(self, entry, waiter):
+        """移除一个等待者，没有等待者时停止轮询该任务"""
+        if waiter in entry.waiters:
+            entry.waiters.remove(waiter)
+        if not entry.waiters and self._entries.get(entry.task_id) is entry:
+            del self._entries[entry.task_id]
+            self._wakeup.set()
+
+    def _schedule(self, entry, due):
+        """把任务放入最小堆，若比当前堆顶更早则唤醒调度协程"""
+        entry.generation = next(self._seq)
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due, entry.generation, entry.task_id))
+        if self._wakeup is not None and (earliest is None or due < earliest):
+            self._wakeup.set()
+
+    def _ensure_runner(self):
+        """确保调度协程在运行"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._query_semaphore = asyncio.Semaphore(self._max_concurrent_queries)
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        """调度主循环：取出所有到期任务并发查询，其余时间休眠到下一个到期点"""
+        loop = asyncio.get_running_loop()
+        while self._entries:
+            self._wakeup.clear()
+            now = loop.time()
+
+            due_entries = []
+            while self._heap and self._heap[0][0] <= now:
+                _, generation, task_id = heapq.heappop(self._heap)
+                entry = self._entries.get(task_id)
+                # 跳过已结束或已重新调度的过期条目
+                if entry is None or entry.generation != generation:
+                    continue
+                due_entries.append(entry)
+
+            for entry in due_entries:
+                asyncio.ensure_future(self._poll_once(entry))
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._runner = None
+
+    async def _poll_once(self, entry):
+        """查询一次任务状态：终态唤醒等待者，进行中则按间隔重新调度"""
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._query_semaphore:
+                entry.polls += 1
+                result_data = await self._query_fn(entry.session, entry.task_id, entry.api_key)
+        except Exception as e:
+            entry.last_error = str(e)
+            entry.errors += 1
+            _RETRY_POLICY.record(e)
+            if self._entries.get(entry.task_id) is not entry:
+                return
+            # 鉴权失败、任务不存在等 4xx 错误重试也不会成功，直接结束
+            if _is_fatal_http_error(e):
+                error_msg = f"轮询请求失败: {str(e)}"
+                logger.info(f"[MiniMax] {error_msg}")
+                self._complete(entry, {"error": error_msg, "task_id": entry.task_id})
+                return
+            if _POLL_LOG.allow((entry.task_id, "error")):
+                logger.info(f"[MiniMax] 轮询过程出错: {str(e)}，继续重试...")
+            # 指数退避；服务端给出 Retry-After 或 API 熔断时至少等待对应时长
+            delay = max(self._policy.error_backoff(entry.errors, entry.poll_interval),
+                        _retry_after_of(e) or 0, _CIRCUIT_BREAKER.remaining())
+            self._schedule(entry, loop.time() + delay)
+            return
+        _RETRY_POLICY.record(None)
+
+        if self._entries.get(entry.task_id) is not entry:
+            return
+
+        entry.errors = 0
+        if self._apply_status(entry, result_data, loop.time()):
+            return
+
+        # 仍在进行中：按策略（或回调模式的兜底间隔）安排下一次查询
+        if entry.push_interval is not None:
+            delay = entry.push_interval
+        else:
+            elapsed = loop.time() - entry.started_at
+            delay = self._policy.next_interval(entry.status, elapsed, entry.poll_interval, entry.profile)
+        self._schedule(entry, loop.time() + delay)
+
+    def _apply_status(self, entry, result_data, now):
+        """更新任务状态，到达终态时结束该任务并返回 True"""
+        task_status = result_data.get("status", "")
+        if _POLL_LOG.allow(entry.task_id, task_status):
+            logger.info(f"[MiniMax] 任务 {entry.task_id} 状态: {task_status}")
+        entry.status = task_status
+        entry.clock.observe(task_status, now)
+
+        if task_status in PENDING_STATUSES:
+            return False
+
+        entry.clock.polls = entry.polls
+        entry.clock.finish(entry.traces)
+
+        if task_status == "Success":
+            self._policy.record_completion(entry.profile, now - entry.started_at)
+            logger.info(f"[MiniMax] 任务完成成功")
+        elif task_status == "Fail":
+            error_msg = result_data.get("base_resp", {}).get("status_msg", "任务执行失败")
+            logger.info(f"[MiniMax] 任务执行失败: {error_msg}")
+        else:
+            logger.info(f"[MiniMax] 未知任务状态: {task_status}")
+        _POLL_LOG.forget(entry.task_id)
+        _POLL_LOG.forget((entry.task_id, "error"))
+        self._complete(entry, result_data)
+        return True
+
+    def _complete(self, entry, result_data):
+        """任务结束：移出调度表并唤醒该任务的所有等待者"""
+        if self._entries.get(entry.task_id) is entry:
+            del self._entries[entry.task_id]
+            self._wakeup.set()
+        for waiter in entry.waiters:
+            if not waiter.done():
+                waiter.set_result(dict(result_data))
+        entry.waiters.clear()
@@ -0,0 +1,246 @@
+import asyncio
+import contextvars
+import cProfile
+import functools
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from .config import (
+    PROFILE_ENABLED, PROFILE_DIR, PROFILE_KEEP, PROFILE_SAMPLE_RATE, PROFILE_TOP_N, PROFILE_TRACEMALLOC_FRAMES
+)
+from .storage import _cache_dir
+from .logging import logger
+
+# 当前节点执行是否被抽中做性能分析；None 表示不在节点执行中（如线程池中的下载），单独抽样
+_PROFILE_SAMPLED = contextvars.ContextVar("minimax_profile_sampled", default=None)
+
+# 每个线程同一时间只能有一个 cProfile 在运行，嵌套调用的开销计入外层
+_thread_state = threading.local()
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _profile_dir():
+    directory = PROFILE_DIR or os.path.join(_cache_dir(), "profiles")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _start_tracemalloc():
+    """引用计数地启动 tracemalloc，返回起始快照"""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc(start_snapshot):
+    """取结束快照并与起始快照比较，返回 (峰值字节数, 增长最多的分配位置)；最后一个使用者停止追踪"""
+    global _tracemalloc_users
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    # 忽略 tracemalloc 自身和本模块的分配
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    stats = snapshot.filter_traces(filters).compare_to(start_snapshot.filter_traces(filters), "lineno")
+    return peak, [stat for stat in stats if stat.size_diff > 0][:PROFILE_TOP_N]
+
+
+def _rotate(directory):
+    """只保留最近 PROFILE_KEEP 次的分析结果"""
+    reports = sorted(glob.glob(os.path.join(directory, "*.txt")), key=os.path.getmtime)
+    for path in reports[:max(0, len(reports) - PROFILE_KEEP)]:
+        for stale in (path, path[:-4] + ".prof"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+class _ProfileSession:
+    """一次被抽样调用的 cProfile + tracemalloc 采集，结束后写入轮转目录并生成摘要"""
+
+    def __init__(self, label):
+        self.label = label
+        self.profiler = cProfile.Profile()
+        self.summary = None
+
+    def start(self):
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Python 3.12+ 的 cProfile 基于 sys.monitoring，同一时间只能有一个线程在采集
+            self.profiler = None
+        self.start_snapshot = _start_tracemalloc()
+        self.wall_started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        wall = time.perf_counter() - self.wall_started
+        cpu = time.thread_time() - self.cpu_started
+        peak, allocations = _stop_tracemalloc(self.start_snapshot)
+        try:
+            self.summary = self._write(wall, cpu, peak, allocations)
+        except Exception as e:
+            logger.info(f"[MiniMax] 写入性能分析结果失败: {str(e)}")
+            self.summary = {"label": self.label, "wall_seconds": round(wall, 4), "cpu_seconds": round(cpu, 4)}
+        return self.summary
+
+    def _write(self, wall, cpu, peak, allocations):
+        directory = _profile_dir()
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        base = os.path.join(directory, f"{stamp}-{self.label}-{os.getpid()}-{threading.get_ident()}")
+
+        report = io.StringIO()
+        top_functions = []
+        if self.profiler is not None:
+            stats = pstats.Stats(self.profiler, stream=report)
+            stats.dump_stats(base + ".prof")
+            stats.sort_stats("cumulative").print_stats(30)
+            # 按函数自身耗时排序的热点
+            entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP_N]
+            top_functions = [
+                {"function": f"{os.path.basename(filename)}:{line}({name})", "self_seconds": round(tt, 4), "calls": nc}
+                for (filename, line, name), (_, nc, tt, _, _) in entries
+            ]
+        else:
+            report.write("cProfile 未启用：另一个线程正在采集\n")
+        top_allocations = [
+            {"location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             "bytes": stat.size_diff, "count": stat.count_diff}
+            for stat in allocations
+        ]
+
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"{self.label}: wall {wall:.4f}s, cpu {cpu:.4f}s, tracemalloc peak {peak} bytes\n\n")
+            f.write("Top allocations (growth during call):\n")
+            for stat in allocations:
+                f.write(f"  {stat}\n")
+            f.write("\n")
+            f.write(report.getvalue())
+        _rotate(directory)
+
+        return {
+            "label": self.label,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_traced_bytes": peak,
+            "top_functions": top_functions,
+            "top_allocations": top_allocations,
+            "file": base + (".prof" if self.profiler is not None else ".txt"),
+        }
+
+
+def _should_profile():
+    """是否对本次调用做性能分析：节点执行内沿用节点的抽样结果，否则按 PROFILE_SAMPLE_RATE 单独抽样"""
+    sampled = _PROFILE_SAMPLED.get()
+    if sampled is None:
+        return random.random() < PROFILE_SAMPLE_RATE
+    return sampled
+
+
+def _begin(label):
+    """当前线程没有正在运行的分析时开始一次新的分析，返回会话或 None"""
+    if getattr(_thread_state, "active", False) or not _should_profile():
+        return None
+    session = _ProfileSession(label)
+    _thread_state.active = True
+    session.start()
+    return session
+
+
+def _end(session):
+    try:
+        return session.stop()
+    finally:
+        _thread_state.active = False
+
+
+def _profiled(fn):
+    """对函数（或协程函数）做可选的 cProfile + tracemalloc 采集，由 MINIMAX_PROFILE 开启
+
+    同一线程上的嵌套调用不单独采集，其开销计入外层；事件循环线程上交错执行的协程
+    也计入最先开始的那个协程的分析结果。
+    """
+    if not PROFILE_ENABLED:
+        return fn
+    label = fn.__name__.strip("_")
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            session = _begin(label)
+            if session is None:
+                return await fn(*args, **kwargs)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _end(session)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = _begin(label)
+        if session is None:
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _end(session)
+    return wrapper
+
+
+def _attach_profile(outputs, summary):
+    """把摘要写入节点输出中第一个 JSON 对象（response，或列表型节点的 status）"""
+    summary = dict(summary, top_functions=summary.get("top_functions", [])[:3],
+                   top_allocations=summary.get("top_allocations", [])[:3])
+    outputs = list(outputs)
+    for i, value in enumerate(outputs):
+        if not isinstance(value, str) or not value.startswith("{"):
+            continue
+        try:
+            data = json.loads(value)
+        except ValueError:
+            continue
+        data["profile"] = summary
+        outputs[i] = json.dumps(data, ensure_ascii=False, indent=2)
+        break
+    return tuple(outputs)
+
+
+def _profiled_node(run):
+    """节点 run 方法的分析装饰器：每次执行单独决定是否抽样，并把摘要附加到输出的 JSON 中"""
+    if not PROFILE_ENABLED:
+        return run
+    label = "node-" + run.__qualname__.split(".")[0]
+
+    @functools.wraps(run)
+    def wrapper(*args, **kwargs):
+        token = _PROFILE_SAMPLED.set(random.random() < PROFILE_SAMPLE_RATE)
+        try:
+            session = _begin(label)
+            if session is None:
+                return run(*args, **kwargs)
+            try:
+                outputs = run(*args, **kwargs)
+            finally:
+                summary = _end(session)
+            return _attach_profile(outputs, summary)
+        finally:
+            _PROFILE_SAMPLED.reset(token)
+    return wrapper
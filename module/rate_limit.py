@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from .config import (
+    SUBMIT_RATE_PER_MINUTE, SUBMIT_BURST, QUERY_RATE_PER_MINUTE, QUERY_BURST, MAX_IN_FLIGHT_TASKS
+)
+
+
+class _TokenBucket:
+    """线程安全的令牌桶（GCRA 实现）
+
+    每次 reserve 原子地预约下一个可用时间点并返回需要等待的秒数，
+    先预约者先通过，因此排队天然是 FIFO 的；同步路径 time.sleep，异步路径 asyncio.sleep。
+    """
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.tolerance = self.interval * max(0, burst - 1)
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预约一个令牌，返回需要等待的秒数"""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            self._tat = tat + self.interval
+            return max(0.0, tat - self.tolerance - now)
+
+    def delay(self):
+        """当前预约一个令牌需要等待的秒数（不预约）"""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            return max(0.0, max(self._tat, now) - self.tolerance - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class _FairSemaphore:
+    """同步线程与 asyncio 协程共用的 FIFO 信号量
+
+    release 时直接把许可交给队首的等待者，先到先得，不会被后来者插队。
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self._available = value
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def in_use(self):
+        with self._lock:
+            return self.value - self._available
+
+    def queued(self):
+        with self._lock:
+            return len(self._waiters)
+
+    def acquire(self):
+        with self._lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                return
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                return
+            waiter = _Waiter(loop=loop, future=loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # 许可已交给本协程但它被取消：转交给下一个等待者
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._available += 1
+                return
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(_resolve_waiter, waiter.future)
+
+
+def _resolve_waiter(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class _KeyLimiter:
+    """单个 api_key 的限流器：提交令牌桶、查询令牌桶与在途任务数信号量"""
+
+    def __init__(self):
+        self.submit = _TokenBucket(SUBMIT_RATE_PER_MINUTE, SUBMIT_BURST)
+        self.query = _TokenBucket(QUERY_RATE_PER_MINUTE, QUERY_BURST)
+        self.in_flight = _FairSemaphore(MAX_IN_FLIGHT_TASKS) if MAX_IN_FLIGHT_TASKS > 0 else None
+
+    def acquire_task(self):
+        if self.in_flight is not None:
+            self.in_flight.acquire()
+
+    async def acquire_task_async(self):
+        if self.in_flight is not None:
+            await self.in_flight.acquire_async()
+
+    def release_task(self):
+        if self.in_flight is not None:
+            self.in_flight.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _get_limiter(api_key):
+    """获取 api_key 对应的进程内共享限流器，所有节点与同步/异步路径共用"""
+    key = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = _limiters[key] = _KeyLimiter()
+    return limiter
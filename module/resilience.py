@@ -0,0 +1,248 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import aiohttp
+import requests
+from urllib3.exceptions import NewConnectionError
+from .config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+)
+from .logging import logger
+
+# base_resp.status_code 分类：可重试的临时错误（超时、限流、服务内部错误），其余非 0 值视为不可重试
+_RETRYABLE_STATUS_CODES = (1000, 1001, 1002, 1013, 1039)
+
+# 限流：base_resp 1002（触发限流）/ 1039（token 限制）与 HTTP 429，只重试，不计入熔断失败
+_THROTTLE_STATUS_CODES = (1002, 1039)
+
+# 请求肯定未被服务端处理的 HTTP 状态，非幂等请求（提交任务）也可以安全重试
+_REJECTED_HTTP_STATUSES = (429, 503)
+
+
+class _RetryableError(Exception):
+    """可重试的临时错误，retry_after 为服务端建议的等待秒数，response_data 为触发错误的响应"""
+
+    def __init__(self, message, retry_after=None, response_data=None, status_code=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.response_data = response_data
+        self.status_code = status_code
+
+
+class _CircuitOpenError(Exception):
+    """熔断期间直接失败，不再请求 API"""
+
+
+def _check_base_resp(response_data):
+    """base_resp.status_code 为临时错误时抛出 _RetryableError，其余情况交给调用方处理"""
+    base_resp = response_data.get("base_resp", {}) if isinstance(response_data, dict) else {}
+    status_code = base_resp.get("status_code", 0)
+    if status_code in _RETRYABLE_STATUS_CODES:
+        raise _RetryableError(f"{status_code} {base_resp.get('status_msg', '')}".strip(), response_data=response_data,
+                              status_code=status_code)
+
+
+def _parse_retry_after(value):
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_status_of(error):
+    """从 requests / aiohttp 异常中取出 HTTP 状态与响应头"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code, error.response.headers
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status, error.headers or {}
+    return None, {}
+
+
+def _retry_after_of(error):
+    if isinstance(error, _RetryableError):
+        return error.retry_after
+    _, headers = _http_status_of(error)
+    return _parse_retry_after(headers.get("Retry-After")) if headers else None
+
+
+def _is_fatal_http_error(error):
+    """4xx（429 除外）：鉴权失败、参数错误、任务不存在等，重试也不会成功"""
+    status, _ = _http_status_of(error)
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+def _is_throttled(error):
+    """限流错误：说明服务端正常但当前 key 超出配额，不代表 API 故障"""
+    if isinstance(error, _RetryableError):
+        return error.status_code in _THROTTLE_STATUS_CODES
+    status, _ = _http_status_of(error)
+    return status == 429
+
+
+def _is_transient(error, idempotent=True):
+    """判断错误是否值得重试
+
+    非幂等请求只在能确定服务端没有处理时重试：连接未建立、429/503、base_resp 临时错误码；
+    幂等请求还会在读超时、连接中断与其它 5xx 时重试。
+    """
+    if isinstance(error, _RetryableError):
+        return True
+    status, _ = _http_status_of(error)
+    if status is not None:
+        if status in _REJECTED_HTTP_STATUSES:
+            return True
+        return idempotent and status >= 500
+    if isinstance(error, (requests.exceptions.ConnectTimeout, aiohttp.ClientConnectorError)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        if isinstance(reason, NewConnectionError):
+            return True
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                          requests.exceptions.ChunkedEncodingError, asyncio.TimeoutError,
+                          aiohttp.ServerDisconnectedError, aiohttp.ClientOSError, aiohttp.ClientPayloadError)):
+        return idempotent
+    return False
+
+
+class _CircuitBreaker:
+    """熔断器：连续 failure_threshold 次临时错误后打开，reset_timeout 秒内直接失败；
+    之后进入半开状态放行一次试探请求，成功则关闭，临时错误则重新打开，
+    其它结果（不可重试的错误、限流、被取消）只释放试探名额。"""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """熔断剩余秒数，未熔断返回 0"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self):
+        """熔断中抛出 _CircuitOpenError；返回本次调用是否为半开状态的试探请求"""
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                raise _CircuitOpenError("MiniMax API 暂时不可用（熔断中），请稍后重试")
+            # 半开：只放行一个试探请求
+            self._probing = True
+            return True
+
+    def end_probe(self):
+        """试探请求结束：无论结果如何都释放试探名额"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("[MiniMax] API 恢复，关闭熔断")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logger.info(f"[MiniMax] 连续 {self._failures} 次请求失败，熔断 {self.reset_timeout:.0f} 秒")
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class _RetryPolicy:
+    """带抖动的指数退避重试，服务端给出 Retry-After 时以其为准"""
+
+    def __init__(self, breaker, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, error=None):
+        retry_after = _retry_after_of(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def record(self, error):
+        """记录一次请求结果到熔断器，只有临时错误计入失败，限流不计入"""
+        if error is None:
+            self.breaker.record_success()
+        elif _is_transient(error) and not _is_throttled(error):
+            self.breaker.record_failure()
+
+    def _should_retry(self, error, attempt, idempotent):
+        return attempt < self.max_attempts and _is_transient(error, idempotent)
+
+    def call(self, fn, idempotent=True, what="请求"):
+        """同步执行 fn()，临时错误时退避重试"""
+        attempt = 0
+        while True:
+            attempt += 1
+            probing = self.breaker.before_call()
+            try:
+                result = fn()
+            except Exception as e:
+                self.record(e)
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+                delay = self.delay(attempt, e)
+                logger.info(f"[MiniMax] {what}失败 (第 {attempt} 次): {str(e)}，{delay:.1f} 秒后重试")
+                time.sleep(delay)
+                continue
+            finally:
+                if probing:
+                    self.breaker.end_probe()
+            self.record(None)
+            return result
+
+    async def call_async(self, coro_fn, idempotent=True, what="请求"):
+        """异步执行 await coro_fn()，临时错误时退避重试"""
+        attempt = 0
+        while True:
+            attempt += 1
+            probing = self.breaker.before_call()
+            try:
+                result = await coro_fn()
+            except Exception as e:
+                self.record(e)
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+                delay = self.delay(attempt, e)
+                logger.info(f"[MiniMax] {what}失败 (第 {attempt} 次): {str(e)}，{delay:.1f} 秒后重试")
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if probing:
+                    self.breaker.end_probe()
+            self.record(None)
+            return result
+
+
+# 进程内共享的熔断器与重试策略，同步与异步路径共用
+_CIRCUIT_BREAKER = _CircuitBreaker()
+_RETRY_POLICY = _RetryPolicy(_CIRCUIT_BREAKER)
@@ -0,0 +1,256 @@
+import calendar
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+from .config import CACHE_MAX_BYTES, CACHE_MAX_AGE, DOWNLOAD_URL_DEFAULT_TTL
+from .storage import _cache_dir
+from .logging import logger
+
+# 缓存模式：use=命中则直接返回，refresh=重新生成并覆盖缓存，bypass=不读也不写缓存
+CACHE_MODES = ["use", "refresh", "bypass"]
+
+# 不影响生成结果、不参与缓存键计算的字段
+_KEY_IGNORED_FIELDS = ("callback_url",)
+
+
+def _canonical_request(value):
+    """把请求数据规范化：data URI 图片替换为内容哈希，避免把整张图片放入缓存键"""
+    if isinstance(value, dict):
+        return {k: _canonical_request(v) for k, v in value.items() if k not in _KEY_IGNORED_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_request(v) for v in value]
+    if isinstance(value, str) and value.startswith("data:"):
+        return "sha256:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+    return value
+
+
+def _request_cache_key(request_data):
+    """请求数据的规范化哈希，作为结果缓存键"""
+    canonical = json.dumps(_canonical_request(request_data), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _signed_url_expiry(url, default_ttl=DOWNLOAD_URL_DEFAULT_TTL, now=None):
+    """解析签名下载 URL 的过期时间戳（支持 Expires / x-oss-expires / X-Amz-Date+X-Amz-Expires）"""
+    now = time.time() if now is None else now
+    try:
+        query = {k.lower(): v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        for name in ("expires", "x-oss-expires", "x-expires"):
+            if name in query and query[name].isdigit():
+                return float(query[name])
+        if "x-amz-date" in query and "x-amz-expires" in query:
+            signed_at = calendar.timegm(time.strptime(query["x-amz-date"], "%Y%m%dT%H%M%SZ"))
+            return signed_at + float(query["x-amz-expires"])
+    except Exception:
+        pass
+    return now + default_ttl
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    task_id TEXT,
+    file_id TEXT,
+    download_url TEXT,
+    url_expires_at REAL NOT NULL DEFAULT 0,
+    video_path TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    result TEXT NOT NULL,
+    key_hash TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+"""
+
+# 旧版本数据库缺少的列
+_MIGRATIONS = (
+    ("key_hash", "TEXT NOT NULL DEFAULT ''"),
+)
+
+# 命中时最近访问时间的更新粒度（秒）：LRU 淘汰不需要精确到每次访问，避免每次命中都写库
+_ACCESS_RESOLUTION = 600
+
+
+class _ResultCache:
+    """按请求哈希寻址的磁盘结果缓存
+
+    results.sqlite3 记录 task_id、file_id、下载 URL 及其过期时间、完整结果和视频文件路径；
+    视频文件保存在 videos/ 下。按最近访问时间（LRU）和创建时间淘汰。
+    多个进程共享同一缓存目录时由 SQLite 保证逐条读写，互不覆盖。
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = None
+        self.enabled = True
+
+    def _paths(self):
+        directory = _cache_dir()
+        video_dir = os.path.join(directory, "videos")
+        os.makedirs(video_dir, exist_ok=True)
+        return os.path.join(directory, "results.sqlite3"), video_dir
+
+    def _connect(self):
+        """惰性打开数据库（调用方需持有锁），失败时禁用缓存"""
+        if self._conn is None and self.enabled:
+            try:
+                db_path, _ = self._paths()
+                conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=10)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SCHEMA)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(results)")}
+                for name, definition in _MIGRATIONS:
+                    if name not in columns:
+                        conn.execute(f"ALTER TABLE results ADD COLUMN {name} {definition}")
+                self._conn = conn
+                self._import_legacy_index(conn)
+            except sqlite3.Error as e:
+                logger.info(f"[MiniMax] 结果缓存不可用: {str(e)}")
+                self.enabled = False
+        return self._conn
+
+    def _import_legacy_index(self, conn):
+        """导入旧版本的 index.json（只导入一次，之后改名保留）"""
+        index_path = os.path.join(_cache_dir(), "index.json")
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, entry in index.items():
+            conn.execute(
+                "INSERT OR IGNORE INTO results (key, task_id, file_id, download_url, url_expires_at, video_path, size, "
+                "created_at, last_access, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.get("task_id", ""), entry.get("file_id", ""), entry.get("download_url", ""),
+                 entry.get("url_expires_at", 0), entry.get("video_path", ""), entry.get("size", 0),
+                 entry.get("created_at", 0), entry.get("last_access", 0),
+                 json.dumps(entry.get("result", {}), ensure_ascii=False)),
+            )
+        try:
+            os.replace(index_path, index_path + ".migrated")
+        except OSError:
+            pass
+
+    def _execute(self, sql, params=(), fetch=False):
+        """执行一条语句，fetch=True 时返回全部行，否则返回受影响的行数；出错返回 None"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                cursor = conn.execute(sql, params)
+                return [dict(row) for row in cursor.fetchall()] if fetch else cursor.rowcount
+            except sqlite3.Error as e:
+                logger.info(f"[MiniMax] 访问结果缓存失败: {str(e)}")
+                return None
+
+    def get(self, key):
+        """查找缓存条目，视频文件已丢失时清除其路径；未命中返回 None"""
+        rows = self._execute("SELECT * FROM results WHERE key = ?", (key,), fetch=True)
+        if not rows:
+            return None
+        entry = rows[0]
+        now = time.time()
+        if now - entry["created_at"] > self.max_age:
+            self._remove([entry])
+            return None
+        if entry["video_path"] and not os.path.exists(entry["video_path"]):
+            entry["video_path"] = ""
+            entry["size"] = 0
+            self._execute("UPDATE results SET video_path = '', size = 0 WHERE key = ?", (key,))
+        if now - entry["last_access"] > _ACCESS_RESOLUTION:
+            self._execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+        try:
+            entry["result"] = json.loads(entry["result"])
+        except ValueError:
+            return None
+        return entry
+
+    def put(self, key, result, video_path=None, key_hash=""):
+        """保存成功的生成结果；若有本地视频文件，硬链接（失败则复制）到缓存目录
+
+        key_hash 是创建任务的 API Key 的哈希，之后刷新下载 URL 时用它找回同一个 Key。
+        """
+        if not isinstance(result, dict) or result.get("status") != "Success":
+            return
+        _, video_dir = self._paths()
+        cached_video = ""
+        size = 0
+        if video_path and os.path.exists(video_path):
+            cached_video = os.path.join(video_dir, f"{key}{os.path.splitext(video_path)[1] or '.mp4'}")
+            try:
+                if os.path.abspath(video_path) != os.path.abspath(cached_video):
+                    if os.path.exists(cached_video):
+                        os.remove(cached_video)
+                    try:
+                        os.link(video_path, cached_video)
+                    except OSError:
+                        shutil.copyfile(video_path, cached_video)
+                size = os.path.getsize(cached_video)
+            except OSError as e:
+                logger.info(f"[MiniMax] 缓存视频文件失败: {str(e)}")
+                cached_video = ""
+
+        download_url = result.get("download_url", "")
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO results (key, task_id, file_id, download_url, url_expires_at, video_path, size, "
+            "created_at, last_access, result, key_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, result.get("task_id", ""), result.get("file_id", ""), download_url,
+             _signed_url_expiry(download_url, now=now) if download_url else 0, cached_video, size, now, now,
+             json.dumps(result, ensure_ascii=False), key_hash or ""),
+        )
+        self._evict()
+
+    def update_download_url(self, key, download_url):
+        """刷新条目中已过期的下载 URL"""
+        rows = self._execute("SELECT result FROM results WHERE key = ?", (key,), fetch=True)
+        if not rows:
+            return
+        try:
+            result = json.loads(rows[0]["result"])
+        except ValueError:
+            return
+        result["download_url"] = download_url
+        self._execute(
+            "UPDATE results SET download_url = ?, url_expires_at = ?, result = ? WHERE key = ?",
+            (download_url, _signed_url_expiry(download_url), json.dumps(result, ensure_ascii=False), key),
+        )
+
+    def _remove(self, entries):
+        """删除条目及其视频文件"""
+        for entry in entries:
+            if self._execute("DELETE FROM results WHERE key = ?", (entry["key"],)) and entry.get("video_path"):
+                try:
+                    os.remove(entry["video_path"])
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """淘汰过期条目，再按最近访问时间淘汰直到总大小不超过上限"""
+        expired = self._execute("SELECT key, video_path FROM results WHERE created_at < ?",
+                                (time.time() - self.max_age,), fetch=True) or []
+        self._remove(expired)
+        rows = self._execute("SELECT key, video_path, size FROM results WHERE size > 0 ORDER BY last_access",
+                             fetch=True) or []
+        total = sum(row["size"] for row in rows)
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            total -= row["size"]
+            self._remove([row])
+            logger.info(f"[MiniMax] 缓存淘汰: {row['key']}")
+
+
+# 进程内共享的结果缓存
+_RESULT_CACHE = _ResultCache()
@@ -0,0 +1,113 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+import time
+import aiohttp
+from .config import AIOHTTP_CONNECTION_LIMIT
+from .logging import logger
+from .callback_server import _stop_callback_server
+
+# 在 ComfyUI 中运行时用于检测用户中断当前 prompt
+try:
+    import comfy.model_management as model_management
+    MODEL_MANAGEMENT_AVAILABLE = True
+except ImportError:
+    MODEL_MANAGEMENT_AVAILABLE = False
+
+# 等待结果期间检查中断的间隔（秒）
+_INTERRUPT_CHECK_INTERVAL = 0.5
+
+# 包内共享的事件循环、后台线程与 aiohttp 会话
+_loop = None
+_loop_thread = None
+_session = None
+_lock = threading.Lock()
+
+
+def _get_event_loop():
+    """获取包内共享的后台事件循环，首次调用时启动"""
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="MiniMaxEventLoop", daemon=True
+            )
+            _loop_thread.start()
+            logger.info("[MiniMax] 已启动共享事件循环")
+        return _loop
+
+
+async def _get_client_session():
+    """获取共享的 aiohttp ClientSession（只能在包事件循环中调用）"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=AIOHTTP_CONNECTION_LIMIT, keepalive_timeout=60)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+def _processing_interrupted():
+    return MODEL_MANAGEMENT_AVAILABLE and model_management.processing_interrupted()
+
+
+def _run_coroutine(coro, timeout=None):
+    """在包事件循环中执行协程，阻塞当前线程直到得到结果
+
+    最多等待 timeout 秒（None 表示不限）；超时或 ComfyUI 中断当前 prompt 时取消协程
+    （在途的轮询登记、限流名额随之释放），并抛出 TimeoutError 或 ComfyUI 的中断异常。
+    """
+    loop = _get_event_loop()
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = _INTERRUPT_CHECK_INTERVAL
+        if deadline is not None:
+            wait = max(0.0, min(wait, deadline - time.monotonic()))
+        try:
+            return future.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            # 协程自身抛出的 TimeoutError 直接向上传递
+            if future.done():
+                raise
+        if _processing_interrupted():
+            future.cancel()
+            logger.info("[MiniMax] 执行被中断，已取消等待中的请求")
+            model_management.throw_exception_if_processing_interrupted()
+        if deadline is not None and time.monotonic() >= deadline:
+            future.cancel()
+            raise TimeoutError(f"等待结果超时 ({timeout:.0f}秒)")
+
+
+def _submit_coroutine(coro):
+    """在包事件循环中调度协程，立即返回 concurrent.futures.Future"""
+    loop = _get_event_loop()
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+async def _close_client_session():
+    """关闭共享的 aiohttp 会话"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _shutdown():
+    """进程退出时关闭回调服务与会话，并停止事件循环"""
+    global _loop
+    with _lock:
+        loop = _loop
+        _loop = None
+    if loop is None or loop.is_closed():
+        return
+    for cleanup in (_stop_callback_server, _close_client_session):
+        try:
+            asyncio.run_coroutine_threadsafe(cleanup(), loop).result(timeout=5)
+        except Exception:
+            pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import re
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager, asynccontextmanager
+from .config import DOWNLOAD_DIR, CACHE_DIR
+
+# 尝试使用 ComfyUI 的临时目录
+try:
+    import folder_paths
+    FOLDER_PATHS_AVAILABLE = True
+except ImportError:
+    FOLDER_PATHS_AVAILABLE = False
+
+
+def _download_dir():
+    """下载视频的目录：优先环境变量，其次 ComfyUI 临时目录，最后系统临时目录"""
+    if DOWNLOAD_DIR:
+        directory = DOWNLOAD_DIR
+    elif FOLDER_PATHS_AVAILABLE:
+        directory = os.path.join(folder_paths.get_temp_directory(), "minimax")
+    else:
+        directory = os.path.join(tempfile.gettempdir(), "minimax")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _download_path(name=None, suffix=".mp4"):
+    """为下载的视频生成本地路径，name 通常为 file_id"""
+    if name:
+        safe_name = re.sub(r"[^0-9A-Za-z_.-]", "_", str(name))
+    else:
+        safe_name = uuid.uuid4().hex
+    return os.path.join(_download_dir(), f"minimax_{safe_name}{suffix}")
+
+
+class _PathLocks:
+    """按本地路径加锁：同一进程内同时写同一个文件（如同一 file_id 的多次下载）时排队执行"""
+
+    def __init__(self):
+        # path → [锁, 引用数]；没有使用者时移除
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _acquire_entry(self, path):
+        with self._guard:
+            entry = self._locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_entry(self, path):
+        with self._guard:
+            entry = self._locks[path]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[path]
+
+    @contextmanager
+    def hold(self, path):
+        lock = self._acquire_entry(path)
+        try:
+            with lock:
+                yield
+        finally:
+            self._release_entry(path)
+
+    @asynccontextmanager
+    async def hold_async(self, path):
+        """异步版本：轮询尝试获取，不阻塞事件循环，取消时不会遗留锁"""
+        lock = self._acquire_entry(path)
+        try:
+            while not lock.acquire(blocking=False):
+                await asyncio.sleep(0.05)
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._release_entry(path)
+
+
+# 进程内共享的下载路径锁
+_DOWNLOAD_LOCKS = _PathLocks()
+
+
+def _cache_dir():
+    """结果缓存目录：优先环境变量，否则使用用户缓存目录（不随 ComfyUI 临时目录清理）"""
+    directory = CACHE_DIR or os.path.join(os.path.expanduser("~"), ".cache", "comfyui-minimax")
+    os.makedirs(directory, exist_ok=True)
+    return directory
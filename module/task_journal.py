@@ -0,0 +1,243 @@
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from .config import TASK_JOURNAL_ENABLED, TASK_JOURNAL_PATH, TASK_RESUME_MAX_AGE, TASK_LEASE_SECONDS
+from .storage import _cache_dir
+from .logging import logger
+
+# 本进程的标识；同一主机上的多个 ComfyUI 进程共享任务日志，靠 pid / 主机名 / 租约判断任务归属
+_INSTANCE_ID = uuid.uuid4().hex
+_PID = os.getpid()
+_HOSTNAME = socket.gethostname()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    key_hash TEXT NOT NULL,
+    model TEXT,
+    duration INTEGER,
+    resolution TEXT,
+    status TEXT NOT NULL,
+    file_id TEXT,
+    owner TEXT NOT NULL,
+    owner_pid INTEGER NOT NULL DEFAULT 0,
+    owner_host TEXT NOT NULL DEFAULT '',
+    lease_until REAL NOT NULL DEFAULT 0,
+    collected INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_fingerprint ON tasks (fingerprint, key_hash);
+"""
+
+# 旧版本数据库缺少的列
+_MIGRATIONS = (
+    ("owner_pid", "INTEGER NOT NULL DEFAULT 0"),
+    ("owner_host", "TEXT NOT NULL DEFAULT ''"),
+    ("lease_until", "REAL NOT NULL DEFAULT 0"),
+)
+
+
+def _key_hash(api_key):
+    """API Key 只以哈希形式落盘"""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:32]
+
+
+def _pid_alive(pid):
+    """同一主机上的进程是否仍在运行；Windows 上 os.kill 会结束进程，无法探测，视为存活（只看租约）"""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 没有权限发送信号说明进程存在
+        return True
+    return True
+
+
+def _owner_gone(row, now=None):
+    """任务的归属进程确定已不在：租约已过期，或同一主机上的进程已退出"""
+    now = time.time() if now is None else now
+    if (row.get("lease_until") or 0) < now:
+        return True
+    return row.get("owner_host") == _HOSTNAME and not _pid_alive(row.get("owner_pid") or 0)
+
+
+class _TaskJournal:
+    """SQLite 任务日志
+
+    每个提交的 task_id 记录请求指纹、API Key 哈希、轮询画像、状态与 file_id，以及提交它的进程
+    （实例 ID、pid、主机名）和归属租约。进程在后台定期为自己的未取回任务续约。
+    结果交付给调用方后标记为 collected。只有归属进程确定已退出（同一主机上 pid 不存在）
+    或租约过期时，相同请求才会接管（claim）它未取回结果的任务，而不是重新提交；
+    共享同一日志的其它存活进程的在途任务不会被接管。本进程自己的未取回任务在没有等待者时
+    （等待超时、被中断）同样可以接管。
+    """
+
+    def __init__(self, path=None, enabled=TASK_JOURNAL_ENABLED, max_age=TASK_RESUME_MAX_AGE, lease=TASK_LEASE_SECONDS):
+        self.path = path
+        self.enabled = enabled
+        self.max_age = max_age
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._conn = None
+        self._heartbeat = None
+        # 本进程中正在等待结果的 task_id → 等待者个数
+        self._waiting = {}
+        self._waiting_lock = threading.Lock()
+
+    def _connect(self):
+        """惰性打开数据库（调用方需持有锁），失败时禁用日志"""
+        if self._conn is None and self.enabled:
+            try:
+                path = self.path or TASK_JOURNAL_PATH or os.path.join(_cache_dir(), "tasks.sqlite3")
+                conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(_SCHEMA)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+                for name, definition in _MIGRATIONS:
+                    if name not in columns:
+                        conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {definition}")
+                # 清理早已过期的记录
+                conn.execute("DELETE FROM tasks WHERE updated_at < ?", (time.time() - 7 * self.max_age,))
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.info(f"[MiniMax] 任务日志不可用: {str(e)}")
+                self.enabled = False
+        return self._conn
+
+    def _execute(self, sql, params=(), fetch=False):
+        """执行一条语句，fetch=True 时返回全部行，否则返回受影响的行数；出错返回 None"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                cursor = conn.execute(sql, params)
+                return [dict(row) for row in cursor.fetchall()] if fetch else cursor.rowcount
+            except sqlite3.Error as e:
+                logger.info(f"[MiniMax] 访问任务日志失败: {str(e)}")
+                return None
+
+    def _ensure_heartbeat(self):
+        """启动续约线程（只启动一次）"""
+        if self._heartbeat is None and self.enabled:
+            with self._lock:
+                if self._heartbeat is None:
+                    self._heartbeat = threading.Thread(target=self._renew_loop, name="MiniMaxTaskLease", daemon=True)
+                    self._heartbeat.start()
+
+    def _renew_loop(self):
+        while self.enabled:
+            time.sleep(max(1.0, self.lease / 3))
+            self._execute("UPDATE tasks SET lease_until = ? WHERE owner = ? AND collected = 0",
+                          (time.time() + self.lease, _INSTANCE_ID))
+
+    def record_submit(self, task_id, fingerprint, api_key, profile=None):
+        """记录新提交的任务"""
+        model, duration, resolution = profile or ("", None, "")
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO tasks (task_id, fingerprint, key_hash, model, duration, resolution, "
+            "status, file_id, owner, owner_pid, owner_host, lease_until, collected, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'Submitted', '', ?, ?, ?, ?, 0, ?, ?)",
+            (str(task_id), fingerprint, _key_hash(api_key), model, duration, resolution,
+             _INSTANCE_ID, _PID, _HOSTNAME, now + self.lease, now, now),
+        )
+        self._ensure_heartbeat()
+
+    def update(self, task_id, task_result, collected=False):
+        """记录轮询得到的状态与 file_id；collected 表示结果已交付给调用方"""
+        if not isinstance(task_result, dict) or "error" in task_result:
+            return
+        status = task_result.get("status", "")
+        if not status:
+            return
+        self._execute(
+            "UPDATE tasks SET status = ?, file_id = ?, collected = MAX(collected, ?), updated_at = ? WHERE task_id = ?",
+            (status, task_result.get("file_id", "") or "", 1 if collected else 0, time.time(), str(task_id)),
+        )
+
+    def mark_collected(self, task_id):
+        self._execute("UPDATE tasks SET collected = 1, updated_at = ? WHERE task_id = ?", (time.time(), str(task_id)))
+
+    def key_hash_of(self, task_id):
+        """提交该任务的 Key 的哈希；没有记录时返回空字符串"""
+        rows = self._execute("SELECT key_hash FROM tasks WHERE task_id = ?", (str(task_id),), fetch=True)
+        return rows[0]["key_hash"] if rows else ""
+
+    @contextmanager
+    def waiting(self, task_id):
+        """标记本进程正在等待该任务的结果；等待结束（完成、超时或取消）后它才能被重新接管"""
+        task_id = str(task_id)
+        with self._waiting_lock:
+            self._waiting[task_id] = self._waiting.get(task_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._waiting_lock:
+                if self._waiting.get(task_id, 0) <= 1:
+                    self._waiting.pop(task_id, None)
+                else:
+                    self._waiting[task_id] -= 1
+
+    def _claimable(self, row, now):
+        """已退出进程留下的任务，或本进程提交、但已没有等待者的任务（等待超时、被中断、Submit 后未 Collect）"""
+        if row["owner"] == _INSTANCE_ID:
+            with self._waiting_lock:
+                return row["task_id"] not in self._waiting
+        return _owner_gone(row, now)
+
+    def claim(self, fingerprint, api_key):
+        """接管结果尚未取回的相同请求（见 _claimable），返回 task_id；没有则返回 None"""
+        rows = self._execute(
+            "SELECT task_id, owner, owner_pid, owner_host, lease_until FROM tasks WHERE fingerprint = ? "
+            "AND key_hash = ? AND collected = 0 AND status != 'Fail' AND created_at > ? "
+            "ORDER BY created_at DESC",
+            (fingerprint, _key_hash(api_key), time.time() - self.max_age),
+            fetch=True,
+        ) or []
+        now = time.time()
+        for row in rows:
+            if self._claimable(row, now) and self.claim_task(row["task_id"], row["owner"]):
+                return row["task_id"]
+        return None
+
+    def unfinished(self, api_key=None):
+        """结果尚未取回、且没有进程在等待的任务（见 _claimable）"""
+        sql = ("SELECT * FROM tasks WHERE collected = 0 AND status != 'Fail' AND created_at > ?")
+        params = [time.time() - self.max_age]
+        if api_key is not None:
+            sql += " AND key_hash = ?"
+            params.append(_key_hash(api_key))
+        rows = self._execute(sql + " ORDER BY created_at", params, fetch=True) or []
+        now = time.time()
+        return [row for row in rows if self._claimable(row, now)]
+
+    def claim_task(self, task_id, owner):
+        """接管指定任务，成功返回 True；以原 owner 为条件更新，保证同一任务只被接管一次"""
+        now = time.time()
+        claimed = self._execute(
+            "UPDATE tasks SET owner = ?, owner_pid = ?, owner_host = ?, lease_until = ?, updated_at = ? "
+            "WHERE task_id = ? AND owner = ?",
+            (_INSTANCE_ID, _PID, _HOSTNAME, now + self.lease, now, str(task_id), owner),
+        ) == 1
+        if claimed:
+            self._ensure_heartbeat()
+        return claimed
+
+
+# 进程内共享的任务日志
+_TASK_JOURNAL = _TaskJournal()
@@ -0,0 +1,78 @@
+import threading
+import numpy as np
+import torch
+
+# 分块转换时每块的元素个数，浮点临时缓冲区大小固定为 4M 个 float32（16MB）
+_CHUNK_ELEMENTS = 4 * 1024 * 1024
+
+# 线程内复用的 uint8 输出缓冲区上限（字节），足够容纳单张 4K RGBA；更大的批次每次单独分配，用完即释放
+_UINT8_BUFFER_MAX_BYTES = 64 * 1024 * 1024
+
+# 每个线程复用的缓冲区：uint8 输出缓冲区按形状缓存，浮点临时缓冲区按 dtype 缓存
+_buffers = threading.local()
+
+
+def _uint8_buffer(shape):
+    """获取当前线程可复用的 uint8 输出缓冲区（下次同形状转换时会被覆盖）
+
+    超过 _UINT8_BUFFER_MAX_BYTES 的批次不缓存，避免每个工作线程长期占用数百 MB。
+    """
+    shape = tuple(shape)
+    if int(np.prod(shape)) > _UINT8_BUFFER_MAX_BYTES:
+        return np.empty(shape, dtype=np.uint8)
+    cache = getattr(_buffers, "uint8", None)
+    if cache is None or cache.shape != shape:
+        cache = np.empty(shape, dtype=np.uint8)
+        _buffers.uint8 = cache
+    return cache
+
+
+def _scratch_buffer(dtype):
+    """获取当前线程可复用的浮点临时缓冲区"""
+    scratch = getattr(_buffers, "scratch", None)
+    if scratch is None or scratch.dtype != dtype:
+        scratch = torch.empty(_CHUNK_ELEMENTS, dtype=dtype)
+        _buffers.scratch = scratch
+    return scratch
+
+
+def _tensor_to_uint8(tensor, out=None):
+    """把 [0, 1] 浮点图片 tensor（任意形状，通常为 (H, W, C) 或整个 (B, H, W, C) 批次）转换为 uint8 numpy 数组
+
+    一次向量化处理整个 tensor：乘 255、四舍五入并裁剪到 [0, 255]（NaN 视为 0），
+    按块写入输出缓冲区，不产生与整张图片同样大小的浮点中间数组。
+    不传 out 时返回线程内复用的缓冲区，调用方需在下一次转换前用完（或自行 copy）。
+    """
+    t = tensor.detach()
+    if out is None:
+        out = _uint8_buffer(t.shape)
+    elif out.shape != tuple(t.shape) or out.dtype != np.uint8:
+        raise ValueError(f"输出缓冲区形状不匹配: {out.shape} != {tuple(t.shape)}")
+    out_flat = torch.from_numpy(out).view(-1)
+
+    if t.dtype == torch.uint8:
+        out_flat.copy_(t.reshape(-1))
+        return out
+
+    if t.device.type != "cpu":
+        # 在设备上完成转换，只把 uint8 结果传回 CPU
+        converted = t.float().mul(255.0).add_(0.5).nan_to_num_(0.0).clamp_(0.0, 255.0).to(torch.uint8)
+        out_flat.copy_(converted.reshape(-1))
+        return out
+
+    flat = t.reshape(-1)
+    scratch_dtype = torch.float64 if flat.dtype == torch.float64 else torch.float32
+    scratch = _scratch_buffer(scratch_dtype)
+    for start in range(0, flat.numel(), _CHUNK_ELEMENTS):
+        end = min(start + _CHUNK_ELEMENTS, flat.numel())
+        chunk = scratch[:end - start]
+        source = flat[start:end]
+        if source.dtype == scratch_dtype:
+            torch.mul(source, 255.0, out=chunk)
+        else:
+            # float16 / bfloat16 先升为 float32 再缩放，直接乘会按半精度计算导致部分像素差 1
+            chunk.copy_(source).mul_(255.0)
+        # +0.5 后截断即四舍五入；裁剪保证越界值不会回绕
+        chunk.add_(0.5).nan_to_num_(0.0).clamp_(0.0, 255.0)
+        out_flat[start:end].copy_(chunk)
+    return out
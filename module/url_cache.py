@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+from .config import DOWNLOAD_URL_CACHE_SIZE, DOWNLOAD_URL_MIN_REMAINING, DOWNLOAD_URL_REFRESH_AHEAD, METRICS_ENABLED
+from .metrics import _METRICS
+from .result_cache import _signed_url_expiry
+
+_URL_CACHE_LOOKUPS = _METRICS.counter("minimax_download_url_cache_total", "下载 URL 缓存的查询结果", ("result",))
+
+
+class _DownloadUrlCache:
+    """file_id → (download_url, bytes, created_at) 的内存缓存，按签名 URL 的过期时间失效
+
+    同一个 file_id 在多个节点、重复执行或扇出的图中只需调用一次 /v1/files/retrieve。
+    剩余有效期不足 refresh_ahead 秒的条目仍然返回，同时提示调用方在后台重新获取；
+    不足 min_remaining 秒的条目视为未命中，避免交给下载的 URL 在中途过期。
+    """
+
+    def __init__(self, max_entries=DOWNLOAD_URL_CACHE_SIZE, min_remaining=DOWNLOAD_URL_MIN_REMAINING,
+                 refresh_ahead=DOWNLOAD_URL_REFRESH_AHEAD):
+        self.max_entries = max_entries
+        self.min_remaining = min_remaining
+        self.refresh_ahead = max(refresh_ahead, min_remaining)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+
+    def get(self, file_id):
+        """返回 (仍然有效的下载 URL 或 None, 是否需要后台刷新)"""
+        if not file_id or self.max_entries <= 0:
+            return None, False
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is not None:
+                remaining = entry["expires_at"] - now
+                if remaining > self.min_remaining:
+                    self._entries.move_to_end(file_id)
+                    stale = remaining <= self.refresh_ahead
+                    self._count("refresh" if stale else "hit")
+                    return entry["download_url"], stale
+                del self._entries[file_id]
+        self._count("miss")
+        return None, False
+
+    def put(self, file_id, download_url, size=0):
+        if not file_id or not download_url or self.max_entries <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[file_id] = {
+                "download_url": download_url,
+                "bytes": int(size or 0),
+                "created_at": now,
+                "expires_at": _signed_url_expiry(download_url, now=now),
+            }
+            self._entries.move_to_end(file_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, file_id):
+        """标记 file_id 正在后台刷新；已有刷新在进行时返回 False"""
+        with self._lock:
+            if file_id in self._refreshing:
+                return False
+            self._refreshing.add(file_id)
+            return True
+
+    def end_refresh(self, file_id):
+        with self._lock:
+            self._refreshing.discard(file_id)
+
+    @staticmethod
+    def _count(result):
+        if METRICS_ENABLED:
+            _URL_CACHE_LOOKUPS.inc(result=result)
+
+
+# 进程内共享的下载 URL 缓存
+_DOWNLOAD_URL_CACHE = _DownloadUrlCache()
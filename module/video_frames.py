@@ -0,0 +1,132 @@
+import glob
+import os
+import uuid
+import numpy as np
+import torch
+from .storage import _cache_dir
+from .metrics import _timed_stage
+from .profiling import _profiled
+from .logging import logger
+
+# PyAV 为可选依赖（ComfyUI 自带），不可用时抽帧节点报错提示安装
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+# 打开网络视频时的连接 / 读取超时（秒）
+_OPEN_TIMEOUT = 60
+
+
+def _frames_dir():
+    directory = os.path.join(_cache_dir(), "frames")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _remove_stale_memmaps(directory):
+    """删除之前遗留的帧文件；仍被映射的文件（Windows 上无法删除）跳过"""
+    for path in glob.glob(os.path.join(directory, "*.f32")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _target_size(src_width, src_height, width, height):
+    """目标尺寸：都为 0 时保持原尺寸，只给一边时按原比例计算另一边"""
+    if width <= 0 and height <= 0:
+        return src_width, src_height
+    if width <= 0:
+        width = max(1, round(src_width * height / src_height))
+    elif height <= 0:
+        height = max(1, round(src_height * width / src_width))
+    return width, height
+
+
+def _allocate_frames(shape, use_memmap):
+    """分配 float32 帧 tensor；use_memmap 时映射到缓存目录下的文件，不占用常驻内存"""
+    if not use_memmap:
+        return torch.empty(shape, dtype=torch.float32)
+    directory = _frames_dir()
+    _remove_stale_memmaps(directory)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.f32")
+    array = np.memmap(path, dtype=np.float32, mode="w+", shape=shape)
+    try:
+        # POSIX 上删除后映射仍然有效，释放映射时回收磁盘空间
+        os.remove(path)
+    except OSError:
+        pass
+    return torch.from_numpy(array)
+
+
+@_profiled
+def _decode_video_frames(source, frame_stride=1, start_time=0.0, end_time=0.0, width=0, height=0,
+                         max_frames=0, chunk_size=16, use_memmap=False):
+    """逐帧解码视频为 ComfyUI IMAGE tensor（N, H, W, 3，float32，取值 [0, 1]），返回 (frames, fps)
+
+    source 可以是本地路径、URL 或文件对象。只保留 [start_time, end_time) 内每 frame_stride 帧中的一帧，
+    缩放在解码后立即由 libswscale 完成，保留的帧以 uint8 分块暂存，最后逐块转换写入 float32 输出，
+    峰值内存约为输出大小的 1.25 倍（use_memmap 时输出在磁盘映射中）。
+    """
+    if not AV_AVAILABLE:
+        raise ImportError("视频抽帧需要 PyAV，请先安装: pip install av")
+    frame_stride = max(1, int(frame_stride))
+    chunk_size = max(1, int(chunk_size))
+
+    with _timed_stage("decode") as measure:
+        chunks = []
+        pending = []
+        count = 0
+        with av.open(source, timeout=_OPEN_TIMEOUT) as container:
+            if not container.streams.video:
+                raise ValueError("文件中没有视频流")
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            rate = stream.average_rate or stream.guessed_rate
+            fps = float(rate) if rate else 0.0
+            size = _target_size(stream.codec_context.width, stream.codec_context.height, width, height)
+
+            if start_time > 0 and stream.time_base:
+                # 跳到起始时间之前最近的关键帧，再丢弃起始时间之前的帧
+                container.seek(int(start_time / stream.time_base), stream=stream)
+
+            index = 0
+            for frame in container.decode(stream):
+                frame_time = frame.time
+                if frame_time is None and fps:
+                    frame_time = start_time + index / fps
+                if frame_time is not None:
+                    if frame_time < start_time - 1e-6:
+                        continue
+                    if end_time > 0 and frame_time >= end_time:
+                        break
+                selected = index % frame_stride == 0
+                index += 1
+                if not selected:
+                    continue
+                pending.append(frame.reformat(width=size[0], height=size[1], format="rgb24",
+                                              interpolation="AREA").to_ndarray())
+                count += 1
+                if len(pending) >= chunk_size:
+                    chunks.append(np.stack(pending))
+                    pending = []
+                if max_frames and count >= max_frames:
+                    break
+        if pending:
+            chunks.append(np.stack(pending))
+        if not count:
+            raise ValueError("指定的时间范围内没有解码到任何帧")
+
+        frames = _allocate_frames((count, size[1], size[0], 3), use_memmap)
+        offset = 0
+        while chunks:
+            # 逐块转换并释放 uint8 暂存，copy_ 直接把 uint8 转成 float32 写入输出
+            chunk = torch.from_numpy(chunks.pop(0))
+            frames[offset:offset + len(chunk)].copy_(chunk).mul_(1.0 / 255.0)
+            offset += len(chunk)
+        measure["bytes"] = frames.numel() * frames.element_size()
+
+    logger.info(f"[MiniMax] 视频抽帧完成: {count} 帧, {size[0]}x{size[1]}, 源帧率 {fps:.3f}")
+    return frames, fps / frame_stride if fps else 0.0